@@ -0,0 +1,127 @@
+from django.apps import apps as django_apps
+from django.db import transaction
+
+from .clone import get_previous_survey_schedule_values, get_registered_dobs
+from .model_mixins import clone_age_in_years
+
+
+class CloneAgeRefresh:
+
+    """Recomputes `age_in_years` of every cloned member in a
+    survey_schedule from the member's `report_datetime`, for example
+    after report datetimes or schedule dates were corrected.
+
+    Follows the same rules as `CloneModelMixin.clone`: the
+    RegisteredSubject dob if known, otherwise the age of the member
+    it was cloned from (the same internal_identifier in the most
+    recent previous survey_schedule) on that member's report_datetime.
+
+    Members are read in chunks by pk. Per chunk, dobs and source
+    members are fetched with one query each and members are updated
+    with one UPDATE per distinct new age.
+
+        counts = CloneAgeRefresh(survey_schedule=...).refresh()
+    """
+
+    model = 'member.householdmember'
+    chunk_size = 1000
+
+    def __init__(self, survey_schedule=None, model=None, chunk_size=None):
+        self.model = model or self.model
+        self.survey_schedule = survey_schedule
+        self.chunk_size = chunk_size or self.chunk_size
+
+    def __repr__(self):
+        return '{}(survey_schedule={})'.format(
+            self.__class__.__name__, self.survey_schedule)
+
+    @property
+    def model_cls(self):
+        try:
+            return django_apps.get_model(*self.model.split('.'))
+        except AttributeError:
+            return self.model
+
+    def chunks(self):
+        """Yields lists of (pk, internal_identifier, report_datetime,
+        age_in_years) for cloned members ordered by pk.
+        """
+        members = self.model_cls.objects.filter(
+            survey_schedule=self.survey_schedule.field_value,
+            cloned=True).order_by('pk')
+        last_pk = None
+        while True:
+            chunk = members.filter(pk__gt=last_pk) if last_pk else members
+            chunk = list(chunk.values_list(
+                'pk', 'internal_identifier', 'report_datetime',
+                'age_in_years')[:self.chunk_size])
+            if not chunk:
+                break
+            yield chunk
+            last_pk = chunk[-1][0]
+
+    def sources(self, internal_identifiers):
+        """Returns a dictionary of {internal_identifier: (report_datetime,
+        age_in_years)} of the source member in the most recent previous
+        survey_schedule.
+        """
+        previous_survey_schedules = get_previous_survey_schedule_values(self.survey_schedule)
+        sources = {}
+        for internal_identifier, survey_schedule, report_datetime, age_in_years in (
+                self.model_cls.objects.filter(
+                    internal_identifier__in=internal_identifiers,
+                    survey_schedule__in=previous_survey_schedules).values_list(
+                        'internal_identifier', 'survey_schedule', 'report_datetime',
+                        'age_in_years')):
+            rank = previous_survey_schedules.index(survey_schedule)
+            if internal_identifier not in sources or rank < sources[internal_identifier][0]:
+                sources[internal_identifier] = (rank, report_datetime, age_in_years)
+        return {k: v[1:] for k, v in sources.items()}
+
+    def refresh_chunk(self, chunk):
+        """Updates a chunk and returns a tuple of (updated, skipped).
+
+        Members with neither a dob nor a source member are skipped.
+        """
+        internal_identifiers = [row[1] for row in chunk]
+        dobs = get_registered_dobs(internal_identifiers)
+        sources = {}
+        if [i for i in internal_identifiers if not dobs.get(i.hex)]:
+            sources = self.sources(
+                [i for i in internal_identifiers if not dobs.get(i.hex)])
+        pks_by_age = {}
+        skipped = 0
+        for pk, internal_identifier, report_datetime, age_in_years in chunk:
+            dob = dobs.get(internal_identifier.hex)
+            source_report_datetime, source_age_in_years = sources.get(
+                internal_identifier, (None, None))
+            if not dob and (source_report_datetime is None or source_age_in_years is None):
+                skipped += 1
+                continue
+            new_age_in_years = clone_age_in_years(
+                dob=dob,
+                age_in_years=source_age_in_years,
+                source_report_datetime=source_report_datetime,
+                report_datetime=report_datetime)
+            if new_age_in_years != age_in_years:
+                pks_by_age.setdefault(new_age_in_years, []).append(pk)
+        with transaction.atomic():
+            for new_age_in_years, pks in pks_by_age.items():
+                self.model_cls.objects.filter(pk__in=pks).update(
+                    age_in_years=new_age_in_years)
+        return sum(len(pks) for pks in pks_by_age.values()), skipped
+
+    def refresh(self):
+        """Refreshes ages and returns a dictionary of counts.
+
+            * updated: members whose age changed.
+            * unchanged: members whose age was already correct.
+            * skipped: members with neither a dob nor a source member.
+        """
+        counts = dict(updated=0, unchanged=0, skipped=0)
+        for chunk in self.chunks():
+            updated, skipped = self.refresh_chunk(chunk)
+            counts['updated'] += updated
+            counts['skipped'] += skipped
+            counts['unchanged'] += len(chunk) - updated - skipped
+        return counts
@@ -3,3 +3,13 @@ from django.apps import AppConfig as DjangoApponfig
 
 class AppConfig(DjangoApponfig):
     name = 'member_clone'
+
+    def ready(self):
+        from django.conf import settings
+        from .site_clone_dependents import site_clone_dependents
+        site_clone_dependents.autodiscover()
+        queue_models = getattr(settings, 'MEMBER_CLONE_QUEUE_MODELS', [])
+        if queue_models:
+            from .clone_queue import connect_clone_queue
+            for model in queue_models:
+                connect_clone_queue(model=model)
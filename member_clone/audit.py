@@ -0,0 +1,240 @@
+import csv
+
+from django.apps import apps as django_apps
+from edc_constants.constants import ALIVE
+
+from .clone import get_previous_survey_schedule_values, get_registered_dobs
+from .constants import HEAD_OF_HOUSEHOLD
+from .managers import clone_not_updated_q
+from .model_mixins import clone_age_in_years
+from .snapshots import import_numpy
+
+# fields `CloneModelMixin.build_clone` copies unchanged from the source member
+COPIED_FIELDS = [
+    'first_name', 'initials', 'gender', 'subject_identifier', 'subject_identifier_as_pk']
+
+MEMBER_FIELDS = [
+    'internal_identifier', 'report_datetime', 'age_in_years', 'relation',
+    'survival_status'] + COPIED_FIELDS
+
+
+class CloneAudit:
+
+    """Compares the cloned members of a survey_schedule with the
+    members they were cloned from and yields discrepancies.
+
+    The source of a cloned member is the member with the same
+    internal_identifier in the most recent previous survey_schedule.
+    Expected values follow `CloneModelMixin.build_clone`: copied
+    fields are unchanged, the relation of a head of household is
+    reset, survival_status defaults to ALIVE and age_in_years is
+    recalculated from the RegisteredSubject dob or the source age.
+
+    Target and source columns are loaded with one query each (dobs
+    in chunks), joined on internal_identifier and compared with
+    NumPy array operations. Ages are calculated per array at the
+    date level; mismatches and members on their birthday are checked
+    again with `clone_age_in_years`.
+
+        * include_updated: if True, also audits cloned members that
+          were updated after the clone. Default: False.
+
+        for discrepancy in CloneAudit(survey_schedule=...).discrepancies():
+            ...
+
+    Requires numpy, imported on first use.
+    """
+
+    model = 'member.householdmember'
+    chunk_size = 5000
+    fieldnames = ['pk', 'internal_identifier', 'field', 'expected', 'actual']
+
+    def __init__(self, survey_schedule=None, model=None, include_updated=None,
+                 chunk_size=None):
+        self.model = model or self.model
+        self.survey_schedule = survey_schedule
+        self.include_updated = include_updated
+        self.chunk_size = chunk_size or self.chunk_size
+        self.summary = {}
+
+    def __repr__(self):
+        return '{}(survey_schedule={})'.format(
+            self.__class__.__name__, self.survey_schedule)
+
+    @property
+    def model_cls(self):
+        try:
+            return django_apps.get_model(*self.model.split('.'))
+        except AttributeError:
+            return self.model
+
+    @property
+    def targets(self):
+        members = self.model_cls.objects.filter(
+            survey_schedule=self.survey_schedule.field_value, cloned=True)
+        if not self.include_updated:
+            members = members.filter(clone_not_updated_q())
+        return members
+
+    def columns(self, rows, names):
+        """Returns a dictionary of {name: array} from a list of row tuples.
+        """
+        numpy = import_numpy()
+        columns = {}
+        for index, name in enumerate(names):
+            column = numpy.empty(len(rows), dtype=object)
+            column[:] = [row[index] for row in rows]
+            columns.update({name: column})
+        return columns
+
+    def load_targets(self):
+        rows = list(self.targets.order_by('internal_identifier').values_list(
+            'pk', *MEMBER_FIELDS))
+        return self.columns(rows, ['pk'] + MEMBER_FIELDS)
+
+    def load_sources(self):
+        """Returns columns of source members, one per internal_identifier
+        sorted by internal_identifier.
+        """
+        numpy = import_numpy()
+        previous_survey_schedules = get_previous_survey_schedule_values(self.survey_schedule)
+        rows = list(self.model_cls.objects.filter(
+            survey_schedule__in=previous_survey_schedules,
+            internal_identifier__in=self.targets.values('internal_identifier')).values_list(
+                'survey_schedule', *MEMBER_FIELDS))
+        columns = self.columns(rows, ['survey_schedule'] + MEMBER_FIELDS)
+        identifiers = self.identifiers(columns['internal_identifier'])
+        rank = numpy.array(
+            [previous_survey_schedules.index(value) for value in columns['survey_schedule']],
+            dtype=int)
+        order = numpy.lexsort((rank, identifiers))
+        _, first = numpy.unique(identifiers[order], return_index=True)
+        keep = order[first]
+        return {name: column[keep] for name, column in columns.items()}
+
+    def load_dobs(self, identifiers):
+        """Returns an array of RegisteredSubject dobs (or None) aligned
+        with `identifiers`.
+        """
+        numpy = import_numpy()
+        dobs = get_registered_dobs(identifiers, chunk_size=self.chunk_size)
+        column = numpy.empty(len(identifiers), dtype=object)
+        column[:] = [dobs.get(str(identifier)) for identifier in identifiers]
+        return column
+
+    @staticmethod
+    def identifiers(column):
+        numpy = import_numpy()
+        return numpy.array([value.hex for value in column], dtype='U32')
+
+    @staticmethod
+    def date_parts(values):
+        """Returns arrays of (year, month, day) of dates or of the UTC
+        date of datetimes.
+        """
+        numpy = import_numpy()
+        days = numpy.array([
+            (value.date() if hasattr(value, 'date') else value).isoformat()
+            for value in values], dtype='datetime64[D]')
+        months = days.astype('datetime64[M]')
+        return (months.astype(int) // 12 + 1970,
+                months.astype(int) % 12 + 1,
+                (days - months.astype('datetime64[D]')).astype(int) + 1)
+
+    @staticmethod
+    def days_in_month(years, months):
+        first = ((years - 1970) * 12 + months - 1).astype('datetime64[M]')
+        return ((first + 1).astype('datetime64[D]') - first.astype('datetime64[D]')).astype(int)
+
+    def expected_ages(self, dobs, source_ages, source_report_datetimes, report_datetimes):
+        """Returns a tuple of (expected ages, boundary) where boundary
+        is True for members on their birthday.
+
+        Ages without a dob or source age are -1.
+        """
+        numpy = import_numpy()
+        has_dob = numpy.array([dob is not None for dob in dobs], dtype=bool)
+        has_age = numpy.array([value is not None for value in source_ages], dtype=bool)
+        known = has_dob | has_age
+        born_y, born_m, born_d = self.date_parts([
+            dob if dob is not None else (source_report_datetime if source_report_datetime
+                                         else report_datetime)
+            for dob, source_report_datetime, report_datetime in zip(
+                dobs, source_report_datetimes, report_datetimes)])
+        ages = numpy.array(
+            [value or 0 for value in source_ages], dtype=int)
+        born_y = numpy.where(has_dob, born_y, born_y - ages)
+        born_d = numpy.minimum(born_d, self.days_in_month(born_y, born_m))
+        ref_y, ref_m, ref_d = self.date_parts(report_datetimes)
+        shifted_d = numpy.minimum(born_d, self.days_in_month(ref_y, ref_m))
+        months = (ref_y - born_y) * 12 + (ref_m - born_m) - (shifted_d > ref_d)
+        expected = numpy.where(known, months // 12, -1)
+        return expected, known & (shifted_d == ref_d)
+
+    def discrepancies(self):
+        """Yields a dictionary per discrepancy and updates `summary`.
+        """
+        numpy = import_numpy()
+        self.summary = dict(audited=0, discrepancies=0, missing_source=0)
+        target = self.load_targets()
+        source = self.load_sources()
+        self.summary['audited'] = len(target['pk'])
+        target_ids = self.identifiers(target['internal_identifier'])
+        source_ids = self.identifiers(source['internal_identifier'])
+        index = numpy.searchsorted(source_ids, target_ids)
+        found = index < len(source_ids)
+        found[found] = source_ids[index[found]] == target_ids[found]
+        for row in numpy.flatnonzero(~found):
+            self.summary['missing_source'] += 1
+            self.summary['discrepancies'] += 1
+            yield self.discrepancy(target, row, 'source', None, None)
+        target = {name: column[found] for name, column in target.items()}
+        source = {name: column[index[found]] for name, column in source.items()}
+        target_ids = target_ids[found]
+
+        expected = {name: source[name] for name in COPIED_FIELDS}
+        expected['relation'] = numpy.where(
+            source['relation'] == HEAD_OF_HOUSEHOLD, None, source['relation'])
+        empty = numpy.array([not value for value in source['survival_status']], dtype=bool)
+        expected['survival_status'] = numpy.where(empty, ALIVE, source['survival_status'])
+        for name in COPIED_FIELDS + ['relation', 'survival_status']:
+            for row in numpy.flatnonzero(expected[name] != target[name]):
+                self.summary['discrepancies'] += 1
+                yield self.discrepancy(target, row, name, expected[name][row], target[name][row])
+
+        dobs = self.load_dobs(target_ids)
+        expected_ages, boundary = self.expected_ages(
+            dobs, source['age_in_years'], source['report_datetime'], target['report_datetime'])
+        actual_ages = numpy.array(
+            [-1 if value is None else value for value in target['age_in_years']], dtype=int)
+        for row in numpy.flatnonzero((expected_ages != actual_ages) | boundary):
+            if expected_ages[row] == -1:
+                expected_age = None
+            else:
+                expected_age = clone_age_in_years(
+                    dob=dobs[row],
+                    age_in_years=source['age_in_years'][row],
+                    source_report_datetime=source['report_datetime'][row],
+                    report_datetime=target['report_datetime'][row])
+            if expected_age != target['age_in_years'][row]:
+                self.summary['discrepancies'] += 1
+                yield self.discrepancy(
+                    target, row, 'age_in_years', expected_age, target['age_in_years'][row])
+
+    def discrepancy(self, target, row, field, expected, actual):
+        return dict(
+            pk=str(target['pk'][row]),
+            internal_identifier=str(target['internal_identifier'][row]),
+            field=field,
+            expected=expected,
+            actual=actual)
+
+    def write_csv(self, f):
+        """Writes discrepancies as CSV to the file object and returns
+        the summary.
+        """
+        writer = csv.DictWriter(f, fieldnames=self.fieldnames)
+        writer.writeheader()
+        for discrepancy in self.discrepancies():
+            writer.writerow(discrepancy)
+        return self.summary
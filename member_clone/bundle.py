@@ -0,0 +1,243 @@
+import base64
+import json
+import zlib
+
+from django.apps import apps as django_apps
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.utils.dateparse import parse_date
+
+from .clone import (
+    CloneMembersExistError, get_member_pks, get_previous_members, get_registered_dobs)
+from .model_mixins import CloneRegisteredSubjectError, validate_clone_report_datetime
+from .plan import plan_value
+from .signals import members_cloned
+from .site_clone_dependents import site_clone_dependents
+
+BUNDLE_VERSION = 1
+
+# fields of the source member read by `CloneModelMixin.clone`
+SOURCE_FIELDS = [
+    'internal_identifier', 'first_name', 'initials', 'gender',
+    'survival_status', 'age_in_years', 'relation', 'subject_identifier',
+    'subject_identifier_as_pk', 'report_datetime']
+
+# fields of a bundle member row; bundles without `source_pk` are
+# applied without cloning dependents
+BUNDLE_FIELDS = SOURCE_FIELDS + ['dob', 'source_pk']
+
+
+class CloneBundle:
+
+    """A compact, serializable bundle for cloning the members of one
+    household on a device (e.g. an offline field tablet).
+
+    The bundle is built on the server and holds, per source member,
+    only the fields `CloneModelMixin.clone` copies plus the
+    RegisteredSubject dob and its pk. On the device, `apply` computes
+    ages for the device's report_datetime and inserts all members in
+    one bulk insert without further queries to RegisteredSubject.
+
+    On the server:
+
+        data = CloneBundle.build(household_structure=...).dumps(compress=True)
+
+    On the device:
+
+        members = CloneBundle.loads(data).apply(report_datetime=...)
+
+    Note: the bulk insert does not call `save` or send per-row signals.
+    `members_cloned` is sent once per household.
+    """
+
+    model = 'member.householdmember'
+
+    def __init__(self, household_structure_id=None, survey_schedule=None,
+                 members=None, model=None):
+        self.model = model or self.model
+        self.household_structure_id = household_structure_id
+        self.survey_schedule = survey_schedule
+        self.members = members or []
+        self.dependents_counts = {}
+
+    def __repr__(self):
+        return '{}(household_structure_id={})'.format(
+            self.__class__.__name__, self.household_structure_id)
+
+    @property
+    def model_cls(self):
+        try:
+            return django_apps.get_model(*self.model.split('.'))
+        except AttributeError:
+            return self.model
+
+    @property
+    def household_structure_model_cls(self):
+        return self.model_cls._meta.get_field('household_structure').related_model
+
+    @classmethod
+    def build(cls, household_structure=None, model=None):
+        """Returns a bundle for cloning members into `household_structure`.
+
+        Raises CloneRegisteredSubjectError if a source member has no
+        RegisteredSubject and ObjectDoesNotExist if the household has
+        no household_structure in a previous survey_schedule. See
+        `iter_bundles` to skip and report these households.
+        """
+        previous_members = get_previous_members(
+            household_structure.household,
+            household_structure.survey_schedule_object)
+        rows = [
+            [getattr(obj, name) for name in SOURCE_FIELDS] + [obj.pk]
+            for obj in previous_members]
+        dobs = get_registered_dobs([row[0] for row in rows], raise_missing=True)
+        members = []
+        for row in rows:
+            members.append([
+                plan_value(value) for value in row[:-1] + [dobs[row[0].hex], row[-1]]])
+        return cls(
+            household_structure_id=str(household_structure.pk),
+            survey_schedule=household_structure.survey_schedule,
+            members=members,
+            model=model)
+
+    def to_dict(self):
+        return dict(
+            version=BUNDLE_VERSION,
+            model=self.model_cls._meta.label_lower,
+            household_structure_id=self.household_structure_id,
+            survey_schedule=self.survey_schedule,
+            fields=BUNDLE_FIELDS,
+            members=self.members)
+
+    @classmethod
+    def from_dict(cls, data):
+        if data['version'] != BUNDLE_VERSION:
+            raise ValueError('Unsupported clone bundle version. Got {}.'.format(
+                data['version']))
+        fields = data['fields']
+        members = [
+            [dict(zip(fields, row)).get(name) for name in BUNDLE_FIELDS]
+            for row in data['members']]
+        return cls(
+            household_structure_id=data['household_structure_id'],
+            survey_schedule=data['survey_schedule'],
+            members=members,
+            model=data['model'])
+
+    def dumps(self, compress=None):
+        """Returns the bundle as compact JSON or, if `compress`, as
+        base64 encoded zlib compressed JSON.
+        """
+        data = json.dumps(self.to_dict(), separators=(',', ':'))
+        if compress:
+            return base64.b64encode(zlib.compress(data.encode('utf-8'))).decode('ascii')
+        return data
+
+    @classmethod
+    def loads(cls, data):
+        """Returns a bundle from the output of `dumps`.
+        """
+        if not data.lstrip().startswith('{'):
+            data = zlib.decompress(base64.b64decode(data)).decode('utf-8')
+        return cls.from_dict(json.loads(data))
+
+    def source_members(self):
+        """Returns a list of tuples of (unsaved source member, dob).
+
+        The source member's pk is that of the member on the server,
+        if bundled.
+        """
+        objs = []
+        for row in self.members:
+            data = dict(zip(BUNDLE_FIELDS, row))
+            options = {}
+            for name in SOURCE_FIELDS:
+                field = self.model_cls._meta.get_field(name)
+                value = data.get(name)
+                options.update({name: None if value is None else field.to_python(value)})
+            if data.get('source_pk'):
+                options.update({
+                    self.model_cls._meta.pk.attname:
+                        self.model_cls._meta.pk.to_python(data.get('source_pk'))})
+            objs.append((
+                self.model_cls(**options),
+                parse_date(data.get('dob')) if data.get('dob') else None))
+        return objs
+
+    def apply(self, report_datetime=None, user_created=None, dependents=None):
+        """Creates the members in the bundle's household_structure with
+        one bulk insert and returns the list of new members.
+
+            * dependents: registry of models cloned with the members.
+              Default: `site_clone_dependents`.
+
+        Uses the same rules as `Clone`: the household_structure is
+        locked, CloneMembersExistError is raised if it already has
+        members, members are cloned with `CloneModelMixin.clone` using
+        the bundled dobs and registered dependents of the source members are
+        cloned in the same transaction; `dependents_counts` has the
+        number created per model.
+        """
+        dependents = dependents or site_clone_dependents
+        with transaction.atomic():
+            household_structure = (
+                self.household_structure_model_cls.objects.select_for_update().get(
+                    pk=self.household_structure_id))
+            if self.model_cls.objects.filter(
+                    household_structure=household_structure).exists():
+                raise CloneMembersExistError(
+                    'Cannot clone household. Members already exist in '
+                    'household for {}.'.format(self.survey_schedule))
+            source_members = self.source_members()
+            if source_members:
+                validate_clone_report_datetime(
+                    household_structure.survey_schedule_object, report_datetime)
+            new_objs = [
+                obj.clone(
+                    household_structure,
+                    report_datetime,
+                    dob=dob,
+                    validate=False,
+                    user_created=user_created or household_structure.user_created)
+                for obj, dob in source_members]
+            self.model_cls.objects.bulk_create(new_objs)
+            if new_objs:
+                source_pks = {
+                    obj.internal_identifier: obj.pk for obj, _ in source_members if obj.pk}
+                self.dependents_counts = dependents.clone(
+                    member_model_cls=self.model_cls,
+                    member_pks=get_member_pks(
+                        self.model_cls, new_objs, source_pks, household_structure))
+                members_cloned.send(
+                    sender=self.model_cls,
+                    members=new_objs,
+                    household_structure=household_structure,
+                    bulk=True)
+        return new_objs
+
+
+def iter_bundles(survey_schedule=None, model=None, compress=None, errors=None):
+    """Yields a tuple of (household_structure pk, serialized bundle)
+    for each household_structure in `survey_schedule` without members.
+
+        * errors: a dictionary updated with {household_structure pk:
+          error message} for households skipped because they cannot
+          be bundled, see `CloneBundle.build`. Default: None.
+    """
+    errors = {} if errors is None else errors
+    bundle_model_cls = CloneBundle(model=model).model_cls
+    household_structure_model_cls = bundle_model_cls._meta.get_field(
+        'household_structure').related_model
+    household_structures = household_structure_model_cls.objects.filter(
+        survey_schedule=survey_schedule.field_value).exclude(
+            pk__in=bundle_model_cls.objects.filter(
+                survey_schedule=survey_schedule.field_value).values(
+                    'household_structure')).order_by('household')
+    for household_structure in household_structures.iterator():
+        try:
+            bundle = CloneBundle.build(household_structure=household_structure, model=model)
+        except (CloneRegisteredSubjectError, ObjectDoesNotExist) as e:
+            errors.update({household_structure.pk: str(e)})
+            continue
+        yield household_structure.pk, bundle.dumps(compress=compress)
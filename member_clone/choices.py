@@ -1,8 +1,23 @@
 from edc_constants.constants import OTHER, NOT_APPLICABLE
 
+from .constants import QUEUED, RUNNING, DONE, FAILED
+
 DETAILS_CHANGE_REASON = (
     ('married', 'Married'),
     ('parent_married', 'Parent Married'),
     (OTHER, 'Other'),
     (NOT_APPLICABLE, 'Not Applicable')
 )
+
+CLONE_JOB_STATUS = (
+    (QUEUED, 'Queued'),
+    (RUNNING, 'Running'),
+    (DONE, 'Done'),
+    (FAILED, 'Failed'),
+)
+
+CLONE_RUN_STATUS = (
+    (RUNNING, 'Running'),
+    (DONE, 'Done'),
+    (FAILED, 'Failed'),
+)
@@ -0,0 +1,77 @@
+import logging
+
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveChunkSize:
+
+    """Adjusts a chunk size from the latency and errors of the
+    chunks processed so far.
+
+        * chunk_size: initial chunk size.
+        * min_chunk_size, max_chunk_size: bounds.
+        * target_seconds: target time per chunk. A chunk slower than
+          1.5 times the target shrinks the size in proportion; a
+          chunk faster than half the target doubles it.
+        * window: number of recent chunks for the error rate.
+        * max_error_rate: the size does not grow while the error
+          rate over `window` exceeds this. Default: 0.
+
+    An error (e.g. a lock wait timeout) halves the size.
+
+    Every adjustment is logged and appended to `adjustments` as a
+    tuple of (old size, new size, reason).
+    """
+
+    min_chunk_size = 10
+    max_chunk_size = 1000
+    target_seconds = 2.0
+    window = 10
+    max_error_rate = 0
+
+    def __init__(self, chunk_size=None, min_chunk_size=None, max_chunk_size=None,
+                 target_seconds=None, window=None, max_error_rate=None):
+        self.min_chunk_size = min_chunk_size or self.min_chunk_size
+        self.max_chunk_size = max_chunk_size or self.max_chunk_size
+        self.target_seconds = target_seconds or self.target_seconds
+        self.max_error_rate = max_error_rate or self.max_error_rate
+        self.chunk_size = self.bounded(chunk_size or self.min_chunk_size)
+        self.errors = deque(maxlen=window or self.window)
+        self.adjustments = []
+
+    def __repr__(self):
+        return '{}(chunk_size={})'.format(self.__class__.__name__, self.chunk_size)
+
+    @property
+    def error_rate(self):
+        return sum(self.errors) / len(self.errors) if self.errors else 0
+
+    def bounded(self, chunk_size):
+        return max(self.min_chunk_size, min(self.max_chunk_size, int(chunk_size)))
+
+    def record(self, size, seconds=None, error=None):
+        """Records a chunk of `size` that took `seconds` or raised
+        `error` and returns the next chunk size.
+        """
+        self.errors.append(1 if error else 0)
+        if error:
+            chunk_size = size // 2
+            reason = 'error: {}'.format(error)
+        elif seconds > self.target_seconds * 1.5:
+            chunk_size = size * self.target_seconds / seconds
+            reason = 'slow: {:.3f}s for {}'.format(seconds, size)
+        elif (seconds < self.target_seconds * 0.5 and size >= self.chunk_size
+                and self.error_rate <= self.max_error_rate):
+            chunk_size = size * 2
+            reason = 'fast: {:.3f}s for {}'.format(seconds, size)
+        else:
+            return self.chunk_size
+        chunk_size = self.bounded(chunk_size)
+        if chunk_size != self.chunk_size:
+            logger.info(
+                'Chunk size %s -> %s (%s)', self.chunk_size, chunk_size, reason)
+            self.adjustments.append((self.chunk_size, chunk_size, reason))
+            self.chunk_size = chunk_size
+        return self.chunk_size
@@ -1,4 +1,15 @@
+import threading
+
+from functools import partial
+
 from django.apps import apps as django_apps
+from django.conf import settings
+from django.db import close_old_connections, connections, router, transaction
+
+from .constants import TRANSIENT_ERRORS, TRANSIENT_ERROR_CODES, TRANSIENT_ERROR_MESSAGES
+from .routers import clone_reads_from
+from .signals import members_cloned
+from .site_clone_dependents import site_clone_dependents
 
 
 class CloneAmbiguousOptionsError(Exception):
@@ -9,15 +20,187 @@ class CloneMembersExistError(Exception):
     pass
 
 
+def run_in_worker(func, *args, **kwargs):
+    """Calls `func` and, if called from a worker thread, closes
+    that thread's unusable or expired database connections when done.
+
+    Other connections are kept for the next call on the same thread,
+    as for requests (see CONN_MAX_AGE). Use as the target when
+    offloading ORM work with `loop.run_in_executor`.
+    """
+    try:
+        return func(*args, **kwargs)
+    finally:
+        if threading.current_thread() is not threading.main_thread():
+            close_old_connections()
+
+
+def run_in_thread(func, *args, **kwargs):
+    """Calls `func` and closes all of the thread's database
+    connections when done.
+
+    Use as the target of a thread that exits after `func`.
+    """
+    try:
+        return func(*args, **kwargs)
+    finally:
+        connections.close_all()
+
+
+def is_transient_error(exception):
+    """Returns True if `exception` is a lock timeout, deadlock or
+    serialization failure, i.e. worth retrying.
+
+    Other database errors, e.g. a missing table or bad credentials,
+    are not. The driver's error code (`TRANSIENT_ERROR_CODES`) is read
+    from the exception Django wrapped, if any; otherwise the message
+    is matched against `TRANSIENT_ERROR_MESSAGES`.
+    """
+    if not isinstance(exception, TRANSIENT_ERRORS):
+        return False
+    for error in [exception, exception.__cause__]:
+        if error is None:
+            continue
+        if getattr(error, 'pgcode', None) in TRANSIENT_ERROR_CODES:
+            return True
+        if error.args and isinstance(error.args[0], int):
+            return error.args[0] in TRANSIENT_ERROR_CODES
+    message = str(exception).lower()
+    return any(fragment in message for fragment in TRANSIENT_ERROR_MESSAGES)
+
+
+def get_member_pks(model_cls, new_objs, source_pks, household_structure):
+    """Returns a dictionary of {source member pk: new member pk} for
+    saved or bulk inserted `new_objs`.
+
+    Bulk inserts on backends that do not return pks (e.g. integer
+    pks on sqlite) are read back from the database.
+    """
+    if any(obj.pk is None for obj in new_objs):
+        new_pks = dict(model_cls.objects.filter(
+            household_structure=household_structure).values_list(
+                'internal_identifier', 'pk'))
+    else:
+        new_pks = {obj.internal_identifier: obj.pk for obj in new_objs}
+    return {source_pks[internal_identifier]: pk
+            for internal_identifier, pk in new_pks.items()
+            if internal_identifier in source_pks}
+
+
+def get_previous_survey_schedules(survey_schedule):
+    """Returns a list of survey_schedule objects before
+    `survey_schedule`, most recent first.
+    """
+    previous_survey_schedules = []
+    survey_schedule = survey_schedule.previous
+    while survey_schedule:
+        previous_survey_schedules.append(survey_schedule)
+        survey_schedule = survey_schedule.previous
+    return previous_survey_schedules
+
+
+def get_previous_survey_schedule_values(survey_schedule):
+    """Returns a list of field values of the survey_schedules before
+    `survey_schedule`, most recent first.
+    """
+    return [obj.field_value for obj in get_previous_survey_schedules(survey_schedule)]
+
+
+def get_registered_dobs(internal_identifiers, chunk_size=None, raise_missing=None):
+    """Returns a dictionary of {internal_identifier.hex: dob} of the
+    RegisteredSubjects of `internal_identifiers`, UUIDs or hex strings.
+
+        * chunk_size: if set, RegisteredSubject is queried in chunks
+          of this many identifiers. Default: one query.
+        * raise_missing: if True, raises CloneRegisteredSubjectError if
+          an identifier has no RegisteredSubject, otherwise it is left
+          out. Default: False.
+    """
+    from edc_registration.models import RegisteredSubject
+
+    registration_identifiers = [
+        str(getattr(internal_identifier, 'hex', internal_identifier))
+        for internal_identifier in internal_identifiers]
+    chunk_size = chunk_size or len(registration_identifiers) or 1
+    dobs = {}
+    for index in range(0, len(registration_identifiers), chunk_size):
+        dobs.update(RegisteredSubject.objects.filter(
+            registration_identifier__in=registration_identifiers[
+                index:index + chunk_size]).values_list('registration_identifier', 'dob'))
+    if raise_missing:
+        from .model_mixins import CloneRegisteredSubjectError
+
+        for registration_identifier in registration_identifiers:
+            if registration_identifier not in dobs:
+                raise CloneRegisteredSubjectError(
+                    'RegisteredSubject instance unexpectedly missing when '
+                    'cloning member! Got internal identifier = {}.'.format(
+                        registration_identifier))
+    return dobs
+
+
+def get_previous_members(household, survey_schedule, session=None):
+    """Returns the members of `household` in the most recent
+    survey_schedule before `survey_schedule` that has members, or an
+    empty list.
+
+    If `session`, the chain of previous survey_schedules is read
+    from the session's cache.
+    """
+    if session:
+        previous_survey_schedules = session.get_previous_survey_schedules(survey_schedule)
+    else:
+        previous_survey_schedules = get_previous_survey_schedules(survey_schedule)
+    for survey_schedule in previous_survey_schedules:
+        previous_household_structure = household.householdstructure_set.get(
+            survey_schedule=survey_schedule.field_value)
+        previous_members = previous_household_structure.householdmember_set.all()
+        if previous_members.exists():
+            return previous_members
+    return []
+
+
 class Clone:
 
     model = 'member.householdmember'
 
     def __init__(self, household=None, survey_schedule=None, report_datetime=None,
-                 household_structure=None, create=None, model=None):
+                 household_structure=None, create=None, model=None, read_database=None,
+                 bulk=None, session=None, profiler=None, dependents=None):
         """Clone household members for a new survey_schedule.
 
             * survey_schedule: adds new members for this survey_schedule.
+            * read_database: database alias, e.g. a replica, for reading
+              previous members and RegisteredSubjects. Requires
+              `CloneReadRouter`. Default: settings.MEMBER_CLONE_READ_DATABASE
+              or None. Checks for existing members and inserts always
+              use the default (write) database.
+            * bulk: if True, inserts members with one bulk insert
+              instead of calling `save` per member, so no per-row
+              save signals are sent. Default: False.
+            * session: a `CloneSession` shared by the clones of a run.
+              Model classes, previous survey_schedules, validated
+              report_datetimes and RegisteredSubject dobs are read
+              from its caches. Default: None.
+            * profiler: a `CloneProfiler`. If the clone is sampled,
+              its cProfile stats and memory snapshot are written to
+              the profiler's directory. Default: None.
+            * dependents: registry of models cloned with the members.
+              Default: `site_clone_dependents`.
+
+        Registered dependents of the source members are cloned in the
+        same transaction with one bulk insert per model;
+        `dependents_counts` has the number created per model.
+
+        Sends `members_cloned` once with the list of new members.
+
+        Previous members who already exist in another household in
+        this survey_schedule (e.g. cloned there by `CloneMovers`) are
+        not cloned again; their internal_identifiers are listed in
+        `moved`.
+
+        `source_pks` maps the internal_identifier of each new member
+        to the pk of the member it was cloned from.
         """
         self.model = model or self.model
         create = True if create is None else create
@@ -34,7 +217,36 @@ class Clone:
             self.household = household
             self.survey_schedule = survey_schedule
         self.report_datetime = report_datetime
-        self.members = self.clone(create=create)
+        self.read_database = read_database or getattr(
+            settings, 'MEMBER_CLONE_READ_DATABASE', None)
+        self.bulk = bulk
+        self.session = session
+        self.dependents = dependents or site_clone_dependents
+        self.dependents_counts = {}
+        self.source_pks = {}
+        self.moved = []
+        if profiler:
+            with profiler.capture('clone-{}-{}'.format(
+                    self.household.pk, self.survey_schedule.field_value)):
+                self.members = self.clone(create=create)
+        else:
+            self.members = self.clone(create=create)
+
+    @classmethod
+    async def acreate(cls, executor=None, **kwargs):
+        """Returns a Clone instance, running the clone in a worker
+        thread so the event loop is not blocked.
+
+            * executor: a concurrent.futures executor. Default: the
+              event loop's default executor.
+
+        Accepts the same keyword arguments as `Clone`.
+        """
+        import asyncio
+
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            executor, partial(run_in_worker, cls, **kwargs))
 
     def clone(self, create=None):
         """Returns a queryset or list of household_members, depending on `create`.
@@ -43,46 +255,119 @@ class Clone:
 
         If created=True, returns a QuerySet, else a list of non-persisted
         model instances.
+
+        If created=True, the target household_structure is locked
+        (select_for_update) for the duration of the clone so that
+        concurrent clones of the same household cannot both pass
+        `safe_to_clone_or_raise` and insert duplicate members. Other
+        households are not affected by the lock.
         """
-        household_members = []
-        self.safe_to_clone_or_raise()
-        household_structure = self.household.householdstructure_set.get(
-            survey_schedule=self.survey_schedule.field_value)
-
-        survey_schedule = self.survey_schedule.previous
-        while survey_schedule:
-            previous_household_structure = self.household.householdstructure_set.get(
-                survey_schedule=survey_schedule.field_value)
-            previous_members = previous_household_structure.householdmember_set.all()
-            for obj in previous_members:
-                new_obj = obj.clone(
-                    household_structure=household_structure,
-                    report_datetime=self.report_datetime,
-                    user_created=household_structure.user_created)
-                if create:
-                    new_obj.save()
+        with transaction.atomic():
+            household_structure = self.get_household_structure(lock=create)
+            self.safe_to_clone_or_raise(household_structure=household_structure)
+            with clone_reads_from(self.read_database):
+                previous_members = self.exclude_moved(get_previous_members(
+                    self.household, self.survey_schedule, session=self.session))
+                if self.session:
+                    new_objs = self.build_clones(previous_members, household_structure)
                 else:
-                    household_members.append(new_obj)
-            if previous_members.count() > 0:
-                break
-            else:
-                survey_schedule = survey_schedule.previous
+                    new_objs = []
+                    for obj in previous_members:
+                        new_objs.append(obj.clone(
+                            household_structure=household_structure,
+                            report_datetime=self.report_datetime,
+                            user_created=household_structure.user_created))
+                        self.source_pks.update({obj.internal_identifier: obj.pk})
+            if create and self.bulk:
+                self.model_cls.objects.bulk_create(new_objs)
+            elif create:
+                for new_obj in new_objs:
+                    new_obj.save()
+            if create and new_objs:
+                self.dependents_counts = self.dependents.clone(
+                    member_model_cls=self.model_cls,
+                    member_pks=get_member_pks(
+                        self.model_cls, new_objs, self.source_pks, household_structure))
+                members_cloned.send(
+                    sender=self.model_cls,
+                    members=new_objs,
+                    household_structure=household_structure,
+                    bulk=bool(self.bulk))
         if create:
             return self.model_cls.objects.filter(
                 household_structure__household=self.household,
                 survey_schedule=self.survey_schedule.field_value)
-        return household_members
+        return new_objs
+
+    def build_clones(self, previous_members, household_structure):
+        """Returns a list of new unsaved members using the session's
+        cached dobs and report_datetime validation.
+
+        Members are cloned with `CloneModelMixin.clone`, as without a
+        session, passing the cached dob and `validate=False`. Existing
+        members were already ruled out by `safe_to_clone_or_raise`.
+        As for `CloneModelMixin.clone`, report_datetime is only
+        validated if there are members to clone.
+        """
+        previous_members = list(previous_members)
+        if not previous_members:
+            return []
+        self.session.validate_report_datetime(self.survey_schedule, self.report_datetime)
+        dobs = self.session.get_dobs([obj.internal_identifier for obj in previous_members])
+        new_objs = []
+        for obj in previous_members:
+            new_objs.append(obj.clone(
+                household_structure,
+                self.report_datetime,
+                dob=dobs.get(obj.internal_identifier.hex),
+                validate=False,
+                user_created=household_structure.user_created))
+            self.source_pks.update({obj.internal_identifier: obj.pk})
+        return new_objs
+
+    def exclude_moved(self, previous_members):
+        """Returns a list of `previous_members` less those who already
+        exist in this survey_schedule, and updates `moved`.
+
+        Uses one query on the write database so it is not affected by
+        replica lag (see `CloneReadRouter`).
+        """
+        previous_members = list(previous_members)
+        if not previous_members:
+            return previous_members
+        moved = set(self.model_cls.objects.using(
+            router.db_for_write(self.model_cls)).filter(
+                survey_schedule=self.survey_schedule.field_value,
+                internal_identifier__in=[
+                    obj.internal_identifier for obj in previous_members]).values_list(
+                        'internal_identifier', flat=True))
+        self.moved = [
+            obj.internal_identifier for obj in previous_members
+            if obj.internal_identifier in moved]
+        return [obj for obj in previous_members if obj.internal_identifier not in moved]
+
+    def get_household_structure(self, lock=None):
+        """Returns the household_structure for this survey_schedule.
+
+        If `lock` is True, the row is selected for update. Must be
+        called within a transaction.
+        """
+        queryset = self.household.householdstructure_set.all()
+        if lock:
+            queryset = queryset.select_for_update()
+        return queryset.get(survey_schedule=self.survey_schedule.field_value)
 
-    def safe_to_clone_or_raise(self):
-        current = self.household.householdstructure_set.get(
-            survey_schedule=self.survey_schedule.field_value)
-        if current.householdmember_set.all().count() > 0:
+    def safe_to_clone_or_raise(self, household_structure=None):
+        current = household_structure or self.get_household_structure()
+        if current.householdmember_set.all().exists():
             raise CloneMembersExistError(
                 'Cannot clone household. Members already exist in '
                 'household for {}.'.format(self.survey_schedule))
 
     @property
     def model_cls(self):
+        if self.session:
+            return self.session.get_model(self.model)
         try:
             return django_apps.get_model(*self.model.split('.'))
         except AttributeError:
@@ -0,0 +1,83 @@
+from django.apps import apps as django_apps
+
+# fields set by the model on a new instance instead of copied
+AUDIT_FIELDS = [
+    'created', 'modified', 'user_created', 'user_modified', 'hostname_created',
+    'hostname_modified', 'revision']
+
+
+class CloneDependent:
+
+    """Declares how a model related to the household member is cloned
+    with the member, see `site_clone_dependents`.
+
+        * model: label_lower of the dependent model.
+        * member_field: name of the dependent's foreign key to the
+          household member. Default: 'household_member'.
+        * exclude_fields: fields not copied to the new instance, in
+          addition to the primary key and AUDIT_FIELDS.
+
+    Override `build` to change values on the new instance, e.g.:
+
+        class MemberDetailDependent(CloneDependent):
+
+            def build(self, obj, member_pk):
+                new_obj = super().build(obj, member_pk)
+                new_obj.status = None
+                return new_obj
+
+        site_clone_dependents.register(
+            MemberDetailDependent(model='member.memberdetail'))
+    """
+
+    member_field = 'household_member'
+    exclude_fields = []
+
+    def __init__(self, model=None, member_field=None, exclude_fields=None):
+        self.model = model
+        self.member_field = member_field or self.member_field
+        self.exclude_fields = exclude_fields or self.exclude_fields
+
+    def __repr__(self):
+        return '{}(model={})'.format(self.__class__.__name__, self.model)
+
+    @property
+    def model_cls(self):
+        try:
+            return django_apps.get_model(*self.model.split('.'))
+        except AttributeError:
+            return self.model
+
+    @property
+    def member_model_cls(self):
+        return self.model_cls._meta.get_field(self.member_field).related_model
+
+    @property
+    def member_attname(self):
+        return self.model_cls._meta.get_field(self.member_field).attname
+
+    @property
+    def copied_fields(self):
+        """Returns a list of the attnames of the fields copied.
+        """
+        return [
+            field.attname for field in self.model_cls._meta.concrete_fields
+            if not field.primary_key
+            and field.name != self.member_field
+            and field.name not in AUDIT_FIELDS
+            and field.name not in self.exclude_fields]
+
+    def sources(self, member_pks):
+        """Returns a queryset of the instances related to the source
+        members.
+        """
+        return self.model_cls.objects.filter(
+            **{'{}__in'.format(self.member_field): member_pks})
+
+    def build(self, obj, member_pk):
+        """Returns a new unsaved instance copied from `obj` and related
+        to the new member.
+        """
+        options = {attname: getattr(obj, attname) for attname in self.copied_fields}
+        options.update({self.member_attname: member_pk})
+        return self.model_cls(**options)
@@ -0,0 +1,297 @@
+import socket
+import threading
+
+from datetime import timedelta
+
+from django.apps import apps as django_apps
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import Count, F, Q
+from edc_base.utils import get_utcnow
+
+from .clone import Clone, CloneMembersExistError, is_transient_error, run_in_thread
+from .constants import QUEUED, RUNNING, DONE, FAILED, CLONED, SKIPPED, TRANSIENT_ERRORS
+from .model_mixins import CloneReportDatetimeError, validate_clone_report_datetime
+from .signals import household_structure_visited
+
+
+class CloneQueue:
+
+    """A database backed queue of household clone jobs.
+
+    Adding a job returns immediately; workers (see `CloneQueueWorker`)
+    lease and process jobs in the background. Jobs are unique per
+    household_structure, so enqueuing the same household_structure
+    twice returns the existing job.
+
+    For example, when a new household_structure is visited:
+
+        CloneQueue().enqueue(
+            household_structure=household_structure,
+            report_datetime=report_datetime)
+
+    To enqueue automatically when household_structures are visited,
+    see `connect_clone_queue`.
+    """
+
+    model = 'member.householdmember'
+    job_model = 'member_clone.clonejob'
+    lease_duration = timedelta(minutes=10)
+    retry_delay = timedelta(seconds=30)
+    max_attempts = 3
+
+    def __init__(self, model=None, lease_duration=None, retry_delay=None,
+                 max_attempts=None):
+        self.model = model or self.model
+        self.lease_duration = lease_duration or self.lease_duration
+        self.retry_delay = retry_delay or self.retry_delay
+        self.max_attempts = max_attempts or self.max_attempts
+
+    def __repr__(self):
+        return '{}(model={})'.format(self.__class__.__name__, self.model_label)
+
+    @property
+    def model_cls(self):
+        try:
+            return django_apps.get_model(*self.model.split('.'))
+        except AttributeError:
+            return self.model
+
+    @property
+    def model_label(self):
+        return self.model_cls._meta.label_lower
+
+    @property
+    def household_structure_model_cls(self):
+        return self.model_cls._meta.get_field('household_structure').related_model
+
+    @property
+    def job_model_cls(self):
+        return django_apps.get_model(*self.job_model.split('.'))
+
+    @property
+    def jobs(self):
+        return self.job_model_cls.objects.filter(member_model=self.model_label)
+
+    def enqueue(self, household_structure=None, report_datetime=None):
+        """Returns a tuple of (job, created) for a clone of
+        members into this household_structure.
+
+        A job that previously failed, or that finished without
+        cloning any members (e.g. the previous survey_schedule had no
+        members yet), is queued again.
+        """
+        job, created = self.job_model_cls.objects.get_or_create(
+            member_model=self.model_label,
+            household_structure_pk=str(household_structure.pk),
+            defaults=dict(
+                survey_schedule=household_structure.survey_schedule,
+                report_datetime=report_datetime,
+                max_attempts=self.max_attempts))
+        if not created and (job.status == FAILED or (
+                job.status == DONE and job.result == CLONED and not job.members_count)):
+            job.status = QUEUED
+            job.report_datetime = report_datetime
+            job.attempts = 0
+            job.last_error = None
+            job.available_datetime = get_utcnow()
+            job.save()
+        return job, created
+
+    def get_job(self, household_structure=None):
+        """Returns the job for this household_structure or None.
+        """
+        try:
+            return self.jobs.get(household_structure_pk=str(household_structure.pk))
+        except ObjectDoesNotExist:
+            return None
+
+    def counts(self):
+        """Returns a dictionary of the number of jobs by status.
+        """
+        counts = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+        counts.update({
+            row['status']: row['count'] for row in self.jobs.values(
+                'status').annotate(count=Count('id')).order_by()})
+        return counts
+
+    def lease(self, leased_by=None):
+        """Returns the next available job leased to `leased_by`,
+        or None if there are no jobs available.
+
+        A job is available if queued or if its lease has expired.
+        Jobs are claimed with a conditional update so two workers
+        never lease the same job.
+        """
+        while True:
+            now = get_utcnow()
+            candidates = self.jobs.filter(
+                Q(status=QUEUED, available_datetime__lte=now)
+                | Q(status=RUNNING, lease_expires__lt=now)).order_by(
+                    'available_datetime')[:10]
+            if not candidates:
+                return None
+            for job in candidates:
+                claim = self.jobs.filter(
+                    pk=job.pk, status=job.status, attempts=job.attempts)
+                if job.attempts >= job.max_attempts:
+                    claim.update(
+                        status=FAILED, lease_expires=None, modified=now,
+                        last_error=job.last_error or 'Lease expired')
+                elif claim.update(
+                        status=RUNNING,
+                        leased_by=leased_by,
+                        lease_expires=now + self.lease_duration,
+                        attempts=F('attempts') + 1,
+                        modified=now):
+                    job.refresh_from_db()
+                    return job
+
+    def complete(self, job, result=None, members_count=None):
+        job.status = DONE
+        job.result = result
+        job.members_count = members_count or 0
+        job.lease_expires = None
+        job.save()
+
+    def fail(self, job, exception=None, retry=None):
+        """Updates the job after an exception.
+
+        If `retry` and attempts remain, the job is queued again
+        after `retry_delay` times the number of attempts.
+        """
+        now = get_utcnow()
+        job.last_error = '{}: {}'.format(exception.__class__.__name__, exception)
+        job.lease_expires = None
+        if retry and job.attempts < job.max_attempts:
+            job.status = QUEUED
+            job.available_datetime = now + self.retry_delay * job.attempts
+        else:
+            job.status = FAILED
+        job.save()
+
+
+class CloneQueueWorker:
+
+    """Leases and processes jobs from a `CloneQueue`.
+
+        worker = CloneQueueWorker(queue=CloneQueue())
+        worker.drain()  # processes jobs until the queue is empty
+
+    Run several workers as threads with `run_workers` or as separate
+    processes with the `process_clone_queue` management command.
+    """
+
+    clone_cls = Clone
+
+    def __init__(self, queue=None, name=None):
+        self.queue = queue or CloneQueue()
+        self.name = name or '{}:{}'.format(
+            socket.gethostname(), threading.current_thread().name)
+        self.processed = 0
+
+    def __repr__(self):
+        return '{}(name={})'.format(self.__class__.__name__, self.name)
+
+    def process(self, job):
+        try:
+            household_structure = self.queue.household_structure_model_cls.objects.get(
+                pk=job.household_structure_pk)
+            clone = self.clone_cls(
+                household_structure=household_structure,
+                report_datetime=job.report_datetime,
+                model=self.queue.model)
+        except CloneMembersExistError:
+            self.queue.complete(job, result=SKIPPED)
+        except TRANSIENT_ERRORS as e:
+            self.queue.fail(job, exception=e, retry=is_transient_error(e))
+        except Exception as e:
+            self.queue.fail(job, exception=e)
+        else:
+            self.queue.complete(
+                job, result=CLONED, members_count=clone.members.count())
+        return job
+
+    def process_next(self):
+        """Leases and processes the next job. Returns the job or
+        None if no job is available.
+        """
+        job = self.queue.lease(leased_by=self.name)
+        if job:
+            self.process(job)
+            self.processed += 1
+        return job
+
+    def drain(self, max_jobs=None):
+        """Processes jobs until none are available or `max_jobs`
+        have been processed. Returns the number processed.
+        """
+        processed = 0
+        while max_jobs is None or processed < max_jobs:
+            if not self.process_next():
+                break
+            processed += 1
+        return processed
+
+
+def run_workers(queue=None, workers=None, max_jobs=None):
+    """Drains the queue with a pool of worker threads and returns
+    the total number of jobs processed.
+    """
+    queue = queue or CloneQueue()
+    clone_workers = []
+    threads = []
+    for index in range(0, workers or 4):
+        worker = CloneQueueWorker(
+            queue=queue, name='{}:{}'.format(socket.gethostname(), index))
+        clone_workers.append(worker)
+        threads.append(threading.Thread(
+            target=run_in_thread, args=(worker.drain, ), kwargs=dict(max_jobs=max_jobs)))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(worker.processed for worker in clone_workers)
+
+
+def connect_clone_queue(model=None, queue=None):
+    """Connects a `household_structure_visited` receiver that
+    enqueues a clone job when a household_structure of the member
+    `model` is visited, and returns the receiver. Disconnect with the
+    receiver's `dispatch_uid`.
+
+    Jobs use the time of the visit as report_datetime. Visits to
+    household_structures of the first survey_schedule, or outside the
+    survey_schedule's window, are not enqueued.
+
+    Apps send the signal from their visit event, e.g.
+
+        household_structure_visited.send(
+            sender=HouseholdStructure,
+            household_structure=household_structure,
+            report_datetime=report_datetime)
+
+    Called by `AppConfig.ready` for each member model label in
+    settings.MEMBER_CLONE_QUEUE_MODELS, e.g.
+
+        MEMBER_CLONE_QUEUE_MODELS = ['member.householdmember']
+    """
+    queue = queue or CloneQueue(model=model)
+
+    def enqueue_clone(sender, household_structure=None, report_datetime=None, **kwargs):
+        survey_schedule = household_structure.survey_schedule_object
+        if not survey_schedule.previous:
+            return
+        try:
+            validate_clone_report_datetime(survey_schedule, report_datetime)
+        except CloneReportDatetimeError:
+            return
+        queue.enqueue(
+            household_structure=household_structure, report_datetime=report_datetime)
+
+    enqueue_clone.dispatch_uid = 'member_clone.enqueue_clone.{}'.format(queue.model_label)
+    household_structure_visited.connect(
+        enqueue_clone,
+        sender=queue.household_structure_model_cls,
+        weak=False,
+        dispatch_uid=enqueue_clone.dispatch_uid)
+    return enqueue_clone
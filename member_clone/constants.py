@@ -1 +1,30 @@
+from django.db import OperationalError
+
 HEAD_OF_HOUSEHOLD = 'head'
+
+CLONED = 'cloned'
+SKIPPED = 'skipped'
+FAILED = 'failed'
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+
+READY = 'ready'
+MEMBERS_EXIST = 'members_exist'
+NO_PREVIOUS_MEMBERS = 'no_previous_members'
+MISSING_HOUSEHOLD_STRUCTURE = 'missing_household_structure'
+
+# exceptions that may be worth retrying; see `is_transient_error` for
+# which of these are retried
+TRANSIENT_ERRORS = (OperationalError, )
+
+# retried: serialization failure, deadlock and lock not available
+# (PostgreSQL SQLSTATE) and lock wait timeout and deadlock (MySQL)
+TRANSIENT_ERROR_CODES = ('40001', '40P01', '55P03', 1205, 1213)
+
+# retried if the message contains one of these, e.g. sqlite's
+# 'database is locked'
+TRANSIENT_ERROR_MESSAGES = (
+    'deadlock', 'lock wait timeout', 'lock timeout', 'database is locked',
+    'database table is locked', 'could not serialize access')
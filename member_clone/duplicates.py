@@ -0,0 +1,121 @@
+import csv
+
+from django.apps import apps as django_apps
+
+
+class CloneDuplicateIdentityError(Exception):
+    pass
+
+
+class DuplicateIdentityDetector:
+
+    """Finds internal_identifiers that appear in more than one
+    household within the same survey_schedule.
+
+    Streams (internal_identifier, survey_schedule, household) ordered
+    by key and compares each row with the previous one, so memory
+    does not grow with the number of members (on PostgreSQL,
+    `iterator` reads from a server-side cursor). The member model
+    should index (internal_identifier, survey_schedule).
+
+        * survey_schedules: survey_schedule objects to check.
+          Default: all survey_schedules.
+
+        for duplicate in DuplicateIdentityDetector().duplicates():
+            ...
+
+    See also `CloneRunner(check_duplicates=True)`.
+    """
+
+    model = 'member.householdmember'
+    fieldnames = ['survey_schedule', 'internal_identifier', 'households']
+
+    def __init__(self, survey_schedules=None, model=None):
+        self.model = model or self.model
+        self.survey_schedules = survey_schedules
+        self.summary = {}
+
+    def __repr__(self):
+        return '{}(survey_schedules={})'.format(
+            self.__class__.__name__, self.survey_schedules)
+
+    @property
+    def model_cls(self):
+        try:
+            return django_apps.get_model(*self.model.split('.'))
+        except AttributeError:
+            return self.model
+
+    def identities(self):
+        """Returns an iterator of (internal_identifier, survey_schedule,
+        household) ordered by key.
+        """
+        members = self.model_cls.objects.all()
+        if self.survey_schedules is not None:
+            members = members.filter(survey_schedule__in=[
+                survey_schedule.field_value for survey_schedule in self.survey_schedules])
+        return members.order_by(
+            'internal_identifier', 'survey_schedule',
+            'household_structure__household').values_list(
+                'internal_identifier', 'survey_schedule',
+                'household_structure__household').iterator()
+
+    def duplicates(self):
+        """Yields a dictionary per duplicate identity and updates `summary`.
+
+            * survey_schedule: the survey_schedule field value.
+            * internal_identifier: the duplicated internal_identifier.
+            * households: list of household pks.
+        """
+        self.summary = dict(members=0, duplicates=0)
+        key = None
+        households = []
+        for internal_identifier, survey_schedule, household in self.identities():
+            self.summary['members'] += 1
+            if (internal_identifier, survey_schedule) != key:
+                if len(households) > 1:
+                    self.summary['duplicates'] += 1
+                    yield self.duplicate(key, households)
+                key = (internal_identifier, survey_schedule)
+                households = []
+            if household not in households:
+                households.append(household)
+        if len(households) > 1:
+            self.summary['duplicates'] += 1
+            yield self.duplicate(key, households)
+
+    def duplicate(self, key, households):
+        internal_identifier, survey_schedule = key
+        return dict(
+            survey_schedule=survey_schedule,
+            internal_identifier=str(internal_identifier),
+            households=[str(household) for household in households])
+
+    def exists(self):
+        """Returns True as soon as one duplicate is found.
+        """
+        for _ in self.duplicates():
+            return True
+        return False
+
+    def check_or_raise(self):
+        """Raises CloneDuplicateIdentityError on the first duplicate.
+        """
+        for duplicate in self.duplicates():
+            raise CloneDuplicateIdentityError(
+                'Member {internal_identifier} appears in more than one '
+                'household in {survey_schedule}. Got {households}.'.format(
+                    internal_identifier=duplicate['internal_identifier'],
+                    survey_schedule=duplicate['survey_schedule'],
+                    households=', '.join(duplicate['households'])))
+
+    def write_csv(self, f):
+        """Writes duplicates as CSV, one row per duplicate, to the
+        file object and returns the summary.
+        """
+        writer = csv.DictWriter(f, fieldnames=self.fieldnames)
+        writer.writeheader()
+        for duplicate in self.duplicates():
+            duplicate.update(households=' '.join(duplicate['households']))
+            writer.writerow(duplicate)
+        return self.summary
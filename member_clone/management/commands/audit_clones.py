@@ -0,0 +1,57 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from survey.site_surveys import site_surveys
+
+from ...audit import CloneAudit
+
+
+class Command(BaseCommand):
+
+    help = ('List differences between cloned household members of a survey schedule '
+            'and the members they were cloned from. Requires numpy.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--survey-schedule',
+            dest='survey_schedule',
+            help='survey schedule field value to audit')
+
+        parser.add_argument(
+            '--model',
+            dest='model',
+            default=CloneAudit.model,
+            help='household member model label_lower. Default: %(default)s')
+
+        parser.add_argument(
+            '--include-updated',
+            dest='include_updated',
+            action='store_true',
+            default=False,
+            help='also audit cloned members updated since the clone')
+
+        parser.add_argument(
+            '--output',
+            dest='output',
+            default=None,
+            help='output file. Default: stdout')
+
+    def handle(self, *args, **options):
+        survey_schedule = site_surveys.get_survey_schedule_from_field_value(
+            options['survey_schedule'])
+        if not survey_schedule:
+            raise CommandError(
+                'Invalid survey schedule. Got {}'.format(options['survey_schedule']))
+        audit = CloneAudit(
+            survey_schedule=survey_schedule,
+            model=options['model'],
+            include_updated=options['include_updated'])
+        try:
+            if options['output']:
+                with open(options['output'], 'w', newline='') as f:
+                    summary = audit.write_csv(f)
+            else:
+                summary = audit.write_csv(sys.stdout)
+        except ImportError as e:
+            raise CommandError(e)
+        self.stderr.write('{}'.format(summary))
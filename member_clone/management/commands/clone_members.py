@@ -0,0 +1,161 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+from survey.site_surveys import site_surveys
+
+from ...chunking import AdaptiveChunkSize
+from ...duplicates import CloneDuplicateIdentityError
+from ...models import CloneRun
+from ...runner import CloneRunner
+
+
+class Command(BaseCommand):
+
+    help = ('Clone household members into every household of a survey schedule. '
+            'Progress is checkpointed; use --resume to continue an interrupted run.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--survey-schedule',
+            dest='survey_schedule',
+            help='survey schedule field value to clone into')
+
+        parser.add_argument(
+            '--report-datetime',
+            dest='report_datetime',
+            help='report datetime of the new members in ISO format, e.g. 2017-01-01T00:00Z')
+
+        parser.add_argument(
+            '--model',
+            dest='model',
+            default=CloneRunner.model,
+            help='household member model label_lower. Default: %(default)s')
+
+        parser.add_argument(
+            '--chunk-size',
+            dest='chunk_size',
+            type=int,
+            default=CloneRunner.chunk_size,
+            help='households per chunk. Default: %(default)s')
+
+        parser.add_argument(
+            '--read-database',
+            dest='read_database',
+            default=None,
+            help=('database alias, e.g. a replica, for reads while cloning. '
+                  'Requires member_clone.routers.CloneReadRouter'))
+
+        parser.add_argument(
+            '--bulk',
+            dest='bulk',
+            action='store_true',
+            default=False,
+            help=('bulk insert members per household. Sends members_cloned '
+                  'but no per-row save signals'))
+
+        parser.add_argument(
+            '--check-duplicates',
+            dest='check_duplicates',
+            action='store_true',
+            default=False,
+            help=('do not clone if a member appears in more than one household '
+                  'in this or a previous survey schedule'))
+
+        parser.add_argument(
+            '--adaptive',
+            dest='adaptive',
+            action='store_true',
+            default=False,
+            help=('adjust the chunk size between --min-chunk-size and '
+                  '--max-chunk-size from the time taken per chunk'))
+
+        parser.add_argument(
+            '--min-chunk-size',
+            dest='min_chunk_size',
+            type=int,
+            default=AdaptiveChunkSize.min_chunk_size,
+            help='smallest chunk size with --adaptive. Default: %(default)s')
+
+        parser.add_argument(
+            '--max-chunk-size',
+            dest='max_chunk_size',
+            type=int,
+            default=AdaptiveChunkSize.max_chunk_size,
+            help='largest chunk size with --adaptive. Default: %(default)s')
+
+        parser.add_argument(
+            '--target-seconds',
+            dest='target_seconds',
+            type=float,
+            default=AdaptiveChunkSize.target_seconds,
+            help='target seconds per chunk with --adaptive. Default: %(default)s')
+
+        parser.add_argument(
+            '--profile-directory',
+            dest='profile_directory',
+            default=None,
+            help=('write cProfile stats and memory snapshots of sampled chunks '
+                  'to a directory per run below this directory. Chunks are cloned '
+                  'sequentially so each capture covers only its chunk'))
+
+        parser.add_argument(
+            '--profile-every',
+            dest='profile_every',
+            type=int,
+            default=1,
+            help='profile every nth chunk with --profile-directory. Default: %(default)s')
+
+        parser.add_argument(
+            '--resume',
+            dest='resume',
+            default=None,
+            help='id of a CloneRun to resume')
+
+    def handle(self, *args, **options):
+        if options['resume']:
+            try:
+                clone_run = CloneRun.objects.get(pk=options['resume'])
+            except (CloneRun.DoesNotExist, ValidationError, ValueError):
+                raise CommandError('Invalid CloneRun. Got {}'.format(options['resume']))
+            runner = CloneRunner.from_clone_run(
+                clone_run,
+                chunk_size=options['chunk_size'],
+                read_database=options['read_database'],
+                bulk=options['bulk'],
+                check_duplicates=options['check_duplicates'],
+                adaptive=options['adaptive'],
+                min_chunk_size=options['min_chunk_size'],
+                max_chunk_size=options['max_chunk_size'],
+                target_seconds=options['target_seconds'],
+                profile_directory=options['profile_directory'],
+                profile_every=options['profile_every'])
+        else:
+            survey_schedule = site_surveys.get_survey_schedule_from_field_value(
+                options['survey_schedule'])
+            if not survey_schedule:
+                raise CommandError(
+                    'Invalid survey schedule. Got {}'.format(options['survey_schedule']))
+            report_datetime = parse_datetime(options['report_datetime'] or '')
+            if not report_datetime:
+                raise CommandError(
+                    'Invalid report datetime. Got {}'.format(options['report_datetime']))
+            runner = CloneRunner(
+                survey_schedule=survey_schedule,
+                report_datetime=report_datetime,
+                model=options['model'],
+                chunk_size=options['chunk_size'],
+                read_database=options['read_database'],
+                bulk=options['bulk'],
+                check_duplicates=options['check_duplicates'],
+                adaptive=options['adaptive'],
+                min_chunk_size=options['min_chunk_size'],
+                max_chunk_size=options['max_chunk_size'],
+                target_seconds=options['target_seconds'],
+                profile_directory=options['profile_directory'],
+                profile_every=options['profile_every'])
+        try:
+            counts = runner.run()
+        except CloneDuplicateIdentityError as e:
+            raise CommandError(e)
+        self.stdout.write('CloneRun {}: {}, {} members cloned.'.format(
+            runner.clone_run.pk, counts, runner.members_count))
@@ -0,0 +1,53 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from survey.site_surveys import site_surveys
+
+from ...report import ClonePreflightReport
+
+
+class Command(BaseCommand):
+
+    help = ('Report, per household, what cloning into a survey schedule '
+            'would do without cloning.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--survey-schedule',
+            dest='survey_schedule',
+            help='survey schedule field value to report on')
+
+        parser.add_argument(
+            '--model',
+            dest='model',
+            default=ClonePreflightReport.model,
+            help='household member model label_lower. Default: %(default)s')
+
+        parser.add_argument(
+            '--format',
+            dest='format',
+            choices=['csv', 'json'],
+            default='csv',
+            help='output format. Default: %(default)s')
+
+        parser.add_argument(
+            '--output',
+            dest='output',
+            default=None,
+            help='output file. Default: stdout')
+
+    def handle(self, *args, **options):
+        survey_schedule = site_surveys.get_survey_schedule_from_field_value(
+            options['survey_schedule'])
+        if not survey_schedule:
+            raise CommandError(
+                'Invalid survey schedule. Got {}'.format(options['survey_schedule']))
+        report = ClonePreflightReport(
+            survey_schedule=survey_schedule, model=options['model'])
+        write = report.write_csv if options['format'] == 'csv' else report.write_json
+        if options['output']:
+            with open(options['output'], 'w', newline='') as f:
+                summary = write(f)
+        else:
+            summary = write(sys.stdout)
+        self.stderr.write('{}'.format(summary))
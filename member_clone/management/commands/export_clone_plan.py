@@ -0,0 +1,64 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+from survey.site_surveys import site_surveys
+
+from ...plan import ClonePlan
+
+
+class Command(BaseCommand):
+
+    help = 'Write the members a survey-wide clone would create to a JSONL or CSV file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--survey-schedule',
+            dest='survey_schedule',
+            help='survey schedule field value to clone into')
+
+        parser.add_argument(
+            '--report-datetime',
+            dest='report_datetime',
+            help='report datetime of the new members in ISO format, e.g. 2017-01-01T00:00Z')
+
+        parser.add_argument(
+            '--model',
+            dest='model',
+            default=ClonePlan.model,
+            help='household member model label_lower. Default: %(default)s')
+
+        parser.add_argument(
+            '--format',
+            dest='format',
+            choices=['jsonl', 'csv'],
+            default='jsonl',
+            help='output format. Default: %(default)s')
+
+        parser.add_argument(
+            '--output',
+            dest='output',
+            default=None,
+            help='output file. Default: stdout')
+
+    def handle(self, *args, **options):
+        survey_schedule = site_surveys.get_survey_schedule_from_field_value(
+            options['survey_schedule'])
+        if not survey_schedule:
+            raise CommandError(
+                'Invalid survey schedule. Got {}'.format(options['survey_schedule']))
+        report_datetime = parse_datetime(options['report_datetime'] or '')
+        if not report_datetime:
+            raise CommandError(
+                'Invalid report datetime. Got {}'.format(options['report_datetime']))
+        plan = ClonePlan(
+            survey_schedule=survey_schedule,
+            report_datetime=report_datetime,
+            model=options['model'])
+        write = plan.write_jsonl if options['format'] == 'jsonl' else plan.write_csv
+        if options['output']:
+            with open(options['output'], 'w', newline='') as f:
+                summary = write(f)
+        else:
+            summary = write(sys.stdout)
+        self.stderr.write('{}'.format(summary))
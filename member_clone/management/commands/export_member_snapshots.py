@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+from survey.site_surveys import site_surveys
+
+from ...snapshots import MemberSnapshot
+
+
+class Command(BaseCommand):
+
+    help = ('Write a memory-mappable columnar snapshot of household members '
+            'per survey schedule. Requires numpy.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--survey-schedule',
+            dest='survey_schedule',
+            default=None,
+            help='survey schedule field value to export. Default: all')
+
+        parser.add_argument(
+            '--directory',
+            dest='directory',
+            help='output directory')
+
+        parser.add_argument(
+            '--model',
+            dest='model',
+            default=MemberSnapshot.model,
+            help='household member model label_lower. Default: %(default)s')
+
+    def handle(self, *args, **options):
+        if not options['directory']:
+            raise CommandError('Expected --directory.')
+        if options['survey_schedule']:
+            survey_schedule = site_surveys.get_survey_schedule_from_field_value(
+                options['survey_schedule'])
+            if not survey_schedule:
+                raise CommandError(
+                    'Invalid survey schedule. Got {}'.format(options['survey_schedule']))
+            survey_schedules = [survey_schedule]
+        else:
+            survey_schedules = site_surveys.get_survey_schedules()
+        for survey_schedule in survey_schedules:
+            try:
+                path = MemberSnapshot.write(
+                    survey_schedule=survey_schedule,
+                    directory=options['directory'],
+                    model=options['model'])
+            except ImportError as e:
+                raise CommandError(e)
+            self.stdout.write('Wrote {}'.format(path))
@@ -0,0 +1,49 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from survey.site_surveys import site_surveys
+
+from ...duplicates import DuplicateIdentityDetector
+
+
+class Command(BaseCommand):
+
+    help = ('List household members whose internal_identifier appears in more '
+            'than one household within a survey schedule.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--survey-schedule',
+            dest='survey_schedule',
+            default=None,
+            help='survey schedule field value to check. Default: all')
+
+        parser.add_argument(
+            '--model',
+            dest='model',
+            default=DuplicateIdentityDetector.model,
+            help='household member model label_lower. Default: %(default)s')
+
+        parser.add_argument(
+            '--output',
+            dest='output',
+            default=None,
+            help='output file. Default: stdout')
+
+    def handle(self, *args, **options):
+        survey_schedules = None
+        if options['survey_schedule']:
+            survey_schedule = site_surveys.get_survey_schedule_from_field_value(
+                options['survey_schedule'])
+            if not survey_schedule:
+                raise CommandError(
+                    'Invalid survey schedule. Got {}'.format(options['survey_schedule']))
+            survey_schedules = [survey_schedule]
+        detector = DuplicateIdentityDetector(
+            survey_schedules=survey_schedules, model=options['model'])
+        if options['output']:
+            with open(options['output'], 'w', newline='') as f:
+                summary = detector.write_csv(f)
+        else:
+            summary = detector.write_csv(sys.stdout)
+        self.stderr.write('{}'.format(summary))
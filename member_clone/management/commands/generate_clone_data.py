@@ -0,0 +1,86 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ...synthetic import SyntheticPopulation
+
+
+class Command(BaseCommand):
+
+    help = ('Bulk create a deterministic synthetic population of households, '
+            'household structures, members and registered subjects.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--households',
+            dest='households',
+            type=int,
+            help='number of households')
+
+        parser.add_argument(
+            '--seed',
+            dest='seed',
+            type=int,
+            default=0,
+            help='random seed. Default: %(default)s')
+
+        parser.add_argument(
+            '--household-sizes',
+            dest='household_sizes',
+            default=None,
+            help='household size weights as size:weight pairs, e.g. 1:10,2:30,4:60')
+
+        parser.add_argument(
+            '--rounds',
+            dest='rounds',
+            type=int,
+            default=1,
+            help='number of survey schedules with enumerated members. Default: %(default)s')
+
+        parser.add_argument(
+            '--absence-rate',
+            dest='absence_rate',
+            type=float,
+            default=0,
+            help='probability a household skipped a round. Default: %(default)s')
+
+        parser.add_argument(
+            '--dob-rate',
+            dest='dob_rate',
+            type=float,
+            default=0.5,
+            help='probability a registered subject has a dob. Default: %(default)s')
+
+        parser.add_argument(
+            '--batch-size',
+            dest='batch_size',
+            type=int,
+            default=SyntheticPopulation.batch_size,
+            help='households per transaction. Default: %(default)s')
+
+        parser.add_argument(
+            '--model',
+            dest='model',
+            default=SyntheticPopulation.model,
+            help='household member model label_lower. Default: %(default)s')
+
+    def handle(self, *args, **options):
+        if not options['households']:
+            raise CommandError('Expected --households.')
+        household_sizes = None
+        if options['household_sizes']:
+            try:
+                household_sizes = {
+                    int(size): float(weight) for size, weight in (
+                        pair.split(':') for pair in options['household_sizes'].split(','))}
+            except ValueError:
+                raise CommandError(
+                    'Invalid household sizes. Got {}'.format(options['household_sizes']))
+        counts = SyntheticPopulation(
+            households=options['households'],
+            seed=options['seed'],
+            household_sizes=household_sizes,
+            rounds=options['rounds'],
+            absence_rate=options['absence_rate'],
+            dob_rate=options['dob_rate'],
+            batch_size=options['batch_size'],
+            model=options['model']).generate()
+        self.stdout.write('Created {}.'.format(counts))
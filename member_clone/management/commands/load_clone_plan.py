@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+
+from ...plan import ClonePlanLoader, read_csv, read_jsonl
+
+
+class Command(BaseCommand):
+
+    help = 'Create household members from a clone plan written by export_clone_plan.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'input',
+            help='clone plan file')
+
+        parser.add_argument(
+            '--model',
+            dest='model',
+            default=ClonePlanLoader.model,
+            help='household member model label_lower. Default: %(default)s')
+
+        parser.add_argument(
+            '--format',
+            dest='format',
+            choices=['jsonl', 'csv'],
+            default='jsonl',
+            help='input format. Default: %(default)s')
+
+        parser.add_argument(
+            '--batch-size',
+            dest='batch_size',
+            type=int,
+            default=ClonePlanLoader.batch_size,
+            help='members inserted per transaction, rounded up to whole households. '
+                 'Default: %(default)s')
+
+    def handle(self, *args, **options):
+        read = read_jsonl if options['format'] == 'jsonl' else read_csv
+        loader = ClonePlanLoader(
+            model=options['model'], batch_size=options['batch_size'])
+        with open(options['input'], newline='') as f:
+            counts = loader.load(read(f))
+        self.stdout.write(
+            'Created {created} members. Skipped {members_exist} members of '
+            'households that already have members.'.format(
+                **counts))
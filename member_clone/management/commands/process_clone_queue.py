@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from ...clone_queue import CloneQueue, run_workers
+
+
+class Command(BaseCommand):
+
+    help = 'Process queued household member clone jobs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model',
+            dest='model',
+            default=CloneQueue.model,
+            help='household member model label_lower. Default: %(default)s')
+
+        parser.add_argument(
+            '--workers',
+            dest='workers',
+            type=int,
+            default=4,
+            help='number of worker threads. Default: %(default)s')
+
+        parser.add_argument(
+            '--max-jobs',
+            dest='max_jobs',
+            type=int,
+            default=None,
+            help='maximum number of jobs per worker. Default: until the queue is empty')
+
+    def handle(self, *args, **options):
+        queue = CloneQueue(model=options['model'])
+        processed = run_workers(
+            queue=queue, workers=options['workers'], max_jobs=options['max_jobs'])
+        self.stdout.write('Processed {} jobs. {}'.format(processed, queue.counts()))
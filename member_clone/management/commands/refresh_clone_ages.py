@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+from survey.site_surveys import site_surveys
+
+from ...ages import CloneAgeRefresh
+
+
+class Command(BaseCommand):
+
+    help = 'Recompute age_in_years of cloned household members in a survey schedule.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--survey-schedule',
+            dest='survey_schedule',
+            help='survey schedule field value')
+
+        parser.add_argument(
+            '--model',
+            dest='model',
+            default=CloneAgeRefresh.model,
+            help='household member model label_lower. Default: %(default)s')
+
+        parser.add_argument(
+            '--chunk-size',
+            dest='chunk_size',
+            type=int,
+            default=CloneAgeRefresh.chunk_size,
+            help='members per chunk. Default: %(default)s')
+
+    def handle(self, *args, **options):
+        survey_schedule = site_surveys.get_survey_schedule_from_field_value(
+            options['survey_schedule'])
+        if not survey_schedule:
+            raise CommandError(
+                'Invalid survey schedule. Got {}'.format(options['survey_schedule']))
+        counts = CloneAgeRefresh(
+            survey_schedule=survey_schedule,
+            model=options['model'],
+            chunk_size=options['chunk_size']).refresh()
+        self.stdout.write(
+            'Updated {updated}, unchanged {unchanged}, skipped {skipped}.'.format(**counts))
@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+from survey.site_surveys import site_surveys
+
+from ...rollback import CloneRollback
+
+
+class Command(BaseCommand):
+
+    help = ('Delete cloned household members of a survey schedule. '
+            'Members updated since the clone are left in place.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--survey-schedule',
+            dest='survey_schedule',
+            help='survey schedule field value to roll back')
+
+        parser.add_argument(
+            '--cloned-after',
+            dest='cloned_after',
+            default=None,
+            help='only members cloned on or after this datetime in ISO format')
+
+        parser.add_argument(
+            '--cloned-before',
+            dest='cloned_before',
+            default=None,
+            help='only members cloned on or before this datetime in ISO format')
+
+        parser.add_argument(
+            '--model',
+            dest='model',
+            default=CloneRollback.model,
+            help='household member model label_lower. Default: %(default)s')
+
+        parser.add_argument(
+            '--chunk-size',
+            dest='chunk_size',
+            type=int,
+            default=CloneRollback.chunk_size,
+            help='members deleted per transaction. Default: %(default)s')
+
+    def handle(self, *args, **options):
+        survey_schedule = site_surveys.get_survey_schedule_from_field_value(
+            options['survey_schedule'])
+        if not survey_schedule:
+            raise CommandError(
+                'Invalid survey schedule. Got {}'.format(options['survey_schedule']))
+        window = {}
+        for option in ['cloned_after', 'cloned_before']:
+            if options[option]:
+                window[option] = parse_datetime(options[option])
+                if not window[option]:
+                    raise CommandError('Invalid {}. Got {}'.format(
+                        option.replace('_', ' '), options[option]))
+        counts = CloneRollback(
+            survey_schedule=survey_schedule,
+            model=options['model'],
+            chunk_size=options['chunk_size'],
+            **window).rollback()
+        self.stdout.write(
+            'Deleted {deleted} members ({cascaded} related rows). '
+            'Refused {refused} updated members.'.format(**counts))
@@ -0,0 +1,85 @@
+from django.db import models
+from django.db.models import BooleanField, Case, Count, IntegerField, Q, Sum, Value, When
+
+
+def clone_not_updated_q():
+    """Returns a Q for cloned members that have not been updated
+    since the clone; the database equivalent of
+    `CloneModelMixin.clone_updated` being False.
+    """
+    return Q(cloned=True) & (
+        Q(personal_details_changed__isnull=True) | Q(personal_details_changed=''))
+
+
+def clone_updated_expression():
+    """Returns a boolean expression, the database equivalent of
+    `CloneModelMixin.clone_updated`.
+    """
+    return Case(
+        When(clone_not_updated_q(), then=Value(False)),
+        default=Value(True),
+        output_field=BooleanField())
+
+
+class CloneQuerySet(models.QuerySet):
+
+    """A QuerySet for models using `CloneModelMixin`.
+
+    The pending update counts group by survey_schedule and
+    household_structure; for these to be read from an index, declare
+    on the concrete model:
+
+        index_together = (
+            ('survey_schedule', 'cloned', 'household_structure',
+             'personal_details_changed'), )
+    """
+
+    def annotate_clone_updated(self, name=None):
+        """Returns the queryset annotated with `clone_updated`
+        as a database expression.
+
+        The annotation is named `is_clone_updated` by default since
+        `clone_updated` is a property on the model.
+        """
+        return self.annotate(**{name or 'is_clone_updated': clone_updated_expression()})
+
+    def clone_updated(self):
+        return self.exclude(clone_not_updated_q())
+
+    def clone_not_updated(self):
+        return self.filter(clone_not_updated_q())
+
+    def pending_update_counts(self):
+        """Returns a values queryset of the number of cloned and
+        pending (not updated) members per survey_schedule and
+        household_structure in one GROUP BY.
+        """
+        return self.filter(cloned=True).values(
+            'survey_schedule', 'household_structure').annotate(
+                cloned_count=Count('pk'),
+                pending_count=Sum(Case(
+                    When(clone_not_updated_q(), then=Value(1)),
+                    default=Value(0),
+                    output_field=IntegerField()))).order_by()
+
+    def pending_update_counts_by_survey_schedule(self):
+        """Returns a values queryset of the number of cloned and
+        pending (not updated) members per survey_schedule.
+        """
+        return self.filter(cloned=True).values('survey_schedule').annotate(
+            cloned_count=Count('pk'),
+            pending_count=Sum(Case(
+                When(clone_not_updated_q(), then=Value(1)),
+                default=Value(0),
+                output_field=IntegerField()))).order_by()
+
+
+class CloneManager(models.Manager.from_queryset(CloneQuerySet)):
+
+    """A manager for models using `CloneModelMixin`, e.g.
+
+        objects = CloneManager()
+
+    or extend it with the model's own manager methods.
+    """
+    pass
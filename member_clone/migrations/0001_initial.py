@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-19 12:21
+from __future__ import unicode_literals
+
+import _socket
+from django.db import migrations, models
+import django_revision.revision_field
+import edc_base.model_fields.hostname_modification_field
+import edc_base.model_fields.userfield
+import edc_base.model_fields.uuid_auto_field
+import edc_base.utils
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CloneJob',
+            fields=[
+                ('created', models.DateTimeField(blank=True, default=edc_base.utils.get_utcnow)),
+                ('modified', models.DateTimeField(blank=True, default=edc_base.utils.get_utcnow)),
+                ('user_created', edc_base.model_fields.userfield.UserField(blank=True, help_text='Updated by admin.save_model', max_length=50, verbose_name='user created')),
+                ('user_modified', edc_base.model_fields.userfield.UserField(blank=True, help_text='Updated by admin.save_model', max_length=50, verbose_name='user modified')),
+                ('hostname_created', models.CharField(blank=True, default=_socket.gethostname, help_text='System field. (modified on create only)', max_length=60)),
+                ('hostname_modified', edc_base.model_fields.hostname_modification_field.HostnameModificationField(blank=True, help_text='System field. (modified on every save)', max_length=50)),
+                ('revision', django_revision.revision_field.RevisionField(blank=True, editable=False, help_text='System field. Git repository tag:branch:commit.', max_length=75, null=True, verbose_name='Revision')),
+                ('device_created', models.CharField(blank=True, max_length=10)),
+                ('device_modified', models.CharField(blank=True, max_length=10)),
+                ('id', edc_base.model_fields.uuid_auto_field.UUIDAutoField(blank=True, editable=False, help_text='System auto field. UUID primary key.', primary_key=True, serialize=False)),
+                ('member_model', models.CharField(help_text='label_lower of the household member model', max_length=100)),
+                ('household_structure_pk', models.CharField(max_length=36)),
+                ('survey_schedule', models.CharField(max_length=150)),
+                ('report_datetime', models.DateTimeField()),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='queued', max_length=15)),
+                ('result', models.CharField(max_length=15, null=True)),
+                ('members_count', models.IntegerField(default=0)),
+                ('attempts', models.IntegerField(default=0)),
+                ('max_attempts', models.IntegerField(default=3)),
+                ('available_datetime', models.DateTimeField(default=edc_base.utils.get_utcnow, help_text='job may not be leased before this datetime')),
+                ('lease_expires', models.DateTimeField(null=True)),
+                ('leased_by', models.CharField(max_length=100, null=True)),
+                ('last_error', models.TextField(null=True)),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='clonejob',
+            unique_together=set([('member_model', 'household_structure_pk')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='clonejob',
+            index_together=set([('status', 'available_datetime')]),
+        ),
+    ]
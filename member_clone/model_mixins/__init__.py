@@ -1,4 +1,5 @@
 from .clone_model_mixin import CloneModelMixin
 from .clone_model_mixin import CloneMembersExistError, CloneRegisteredSubjectError
 from .clone_model_mixin import CloneReportDatetimeError
+from .clone_model_mixin import clone_age_in_years, validate_clone_report_datetime
 from .next_model_mixin import NextMemberModelMixin
@@ -1,9 +1,5 @@
-import arrow
-from dateutil.relativedelta import relativedelta
-from django.db import models, transaction
-from edc_base.utils import age, get_utcnow
+from django.db import models, router, transaction
 from edc_constants.choices import YES_NO_NA, ALIVE
-from edc_registration.models import RegisteredSubject
 
 from ..choices import DETAILS_CHANGE_REASON
 from ..clone import CloneMembersExistError
@@ -18,6 +14,48 @@ class CloneReportDatetimeError(Exception):
     pass
 
 
+def clone_age_in_years(dob=None, age_in_years=None, source_report_datetime=None,
+                       report_datetime=None):
+    """Returns the age in years of a cloned member on `report_datetime`.
+
+    Uses the RegisteredSubject `dob` if known, otherwise a dob
+    derived from the source member's `age_in_years` on its
+    `source_report_datetime`.
+    """
+    from dateutil.relativedelta import relativedelta
+    from edc_base.utils import age
+
+    if not dob:
+        born = (source_report_datetime
+                - relativedelta(years=age_in_years))
+        return age(born, report_datetime).years
+    return age(dob, report_datetime).years
+
+
+def validate_clone_report_datetime(survey_schedule_object, report_datetime):
+    """Raises CloneReportDatetimeError if `report_datetime` does not
+    fall within the survey schedule's date range.
+    """
+    import arrow
+
+    start = survey_schedule_object.rstart
+    end = survey_schedule_object.rend
+    rdate = arrow.Arrow.fromdatetime(
+        report_datetime, report_datetime.tzinfo)
+
+    if not (start.to('utc').date()
+            <= rdate.to('utc').date()
+            <= end.to('utc').date()):
+        raise CloneReportDatetimeError(
+            'Invalid report datetime. \'{}\' does not fall within '
+            'the date range for survey schedule \'{}\'. Expected any date '
+            'from \'{}\' to \'{}\'.'.format(
+                report_datetime.strftime('%Y-%m-%d %Z'),
+                survey_schedule_object.field_value,
+                start.to('utc').strftime('%Y-%m-%d %Z'),
+                end.to('utc').strftime('%Y-%m-%d %Z')))
+
+
 class CloneModelMixin(models.Model):
 
     cloned = models.BooleanField(
@@ -54,6 +92,8 @@ class CloneModelMixin(models.Model):
         """Returns True if the cloned member instance has been updated.
 
         Uses `personal_details_changed` as a surrogate value.
+
+        See also `CloneQuerySet` for the database equivalent.
         """
         if self.cloned:
             if not self.personal_details_changed:
@@ -65,52 +105,75 @@ class CloneModelMixin(models.Model):
 
             * household_structure: the 'next' household_structure to
               which the new members will be related.
+            * dob: the RegisteredSubject dob, if already known, e.g.
+              prefetched by a `CloneSession`. If given, even as None,
+              RegisteredSubject is not queried.
+            * validate: if False, the caller has already validated
+              `report_datetime` for the survey schedule and checked
+              that the member does not exist in `household_structure`.
+              Default: True.
+
+        This is the single entry point for cloning a member; `Clone`,
+        `CloneBundle` and `CloneMovers` call it for every member, so
+        models may override it.
+
+        The check for an existing member reads the write database so
+        it is not affected by replica lag (see `CloneReadRouter`).
         """
-        with transaction.atomic():
-            try:
-                self.__class__.objects.get(
-                    internal_identifier=self.internal_identifier,
-                    household_structure=household_structure)
-            except self.__class__.DoesNotExist:
-                pass
-            else:
-                raise CloneMembersExistError(
-                    'Cannot clone a household member into a survey '
-                    'where the member already exists')
-        with transaction.atomic():
-            try:
-                registered_subject = RegisteredSubject.objects.get(
-                    registration_identifier=self.internal_identifier.hex)
-            except RegisteredSubject.DoesNotExist:
-                raise CloneRegisteredSubjectError(
-                    'RegisteredSubject instance unexpectedly missing when '
-                    'cloning member! Got internal identifier = {}.'.format(
-                        self.internal_identifier))
-            else:
-                if not registered_subject.dob:
-                    born = (self.report_datetime
-                            - relativedelta(years=self.age_in_years))
-                    age_in_years = age(born, report_datetime).years
+        from edc_registration.models import RegisteredSubject
+
+        validate = kwargs.get('validate')
+        if validate is None or validate:
+            with transaction.atomic():
+                try:
+                    self.__class__.objects.using(router.db_for_write(self.__class__)).get(
+                        internal_identifier=self.internal_identifier,
+                        household_structure=household_structure)
+                except self.__class__.DoesNotExist:
+                    pass
                 else:
-                    age_in_years = age(
-                        registered_subject.dob, report_datetime).years
-
-        start = household_structure.survey_schedule_object.rstart
-        end = household_structure.survey_schedule_object.rend
-        rdate = arrow.Arrow.fromdatetime(
-            report_datetime, report_datetime.tzinfo)
-
-        if not (start.to('utc').date()
-                <= rdate.to('utc').date()
-                <= end.to('utc').date()):
-            raise CloneReportDatetimeError(
-                'Invalid report datetime. \'{}\' does not fall within '
-                'the date range for survey schedule \'{}\'. Expected any date '
-                'from \'{}\' to \'{}\'.'.format(
-                    report_datetime.strftime('%Y-%m-%d %Z'),
-                    household_structure.survey_schedule_object.field_value,
-                    start.to('utc').strftime('%Y-%m-%d %Z'),
-                    end.to('utc').strftime('%Y-%m-%d %Z')))
+                    raise CloneMembersExistError(
+                        'Cannot clone a household member into a survey '
+                        'where the member already exists')
+        if 'dob' in kwargs:
+            dob = kwargs.pop('dob')
+        else:
+            with transaction.atomic():
+                try:
+                    registered_subject = RegisteredSubject.objects.get(
+                        registration_identifier=self.internal_identifier.hex)
+                except RegisteredSubject.DoesNotExist:
+                    raise CloneRegisteredSubjectError(
+                        'RegisteredSubject instance unexpectedly missing when '
+                        'cloning member! Got internal identifier = {}.'.format(
+                            self.internal_identifier))
+            dob = registered_subject.dob
+        return self.build_clone(
+            household_structure, report_datetime, dob=dob, **kwargs)
+
+    def build_clone(self, household_structure, report_datetime, dob=None,
+                    validate=None, **kwargs):
+        """Returns a new unsaved household member instance without
+        querying the database.
+
+            * dob: the RegisteredSubject dob, if known.
+            * validate: if False, `report_datetime` has already been
+              validated for the survey schedule. Default: True.
+
+        Called by `clone` once the RegisteredSubject dob is known;
+        override `clone`, not this method, to change how members are
+        cloned.
+        """
+        from edc_base.utils import get_utcnow
+
+        age_in_years = clone_age_in_years(
+            dob=dob,
+            age_in_years=self.age_in_years,
+            source_report_datetime=self.report_datetime,
+            report_datetime=report_datetime)
+        if validate is None or validate:
+            validate_clone_report_datetime(
+                household_structure.survey_schedule_object, report_datetime)
         return self.__class__(
             household_structure=household_structure,
             report_datetime=report_datetime,
@@ -1,12 +1,11 @@
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import models
 
-from survey.iterators import SurveyScheduleIterator
-
 
 class NextMemberModelMixin(models.Model):
 
-    survey_schedule_iterator = SurveyScheduleIterator
+    # Default: survey.iterators.SurveyScheduleIterator, imported on first use
+    survey_schedule_iterator = None
 
     @property
     def next(self):
@@ -14,9 +13,11 @@ class NextMemberModelMixin(models.Model):
         cloned household_member instance in the next
         household_structure.
         """
-        survey_schedule_iterator = self.survey_schedule_iterator(
-            model_obj=self, internal_identifier=self.internal_identifier)
-        return next(survey_schedule_iterator)
+        survey_schedule_iterator = self.survey_schedule_iterator
+        if not survey_schedule_iterator:
+            from survey.iterators import SurveyScheduleIterator as survey_schedule_iterator
+        return next(survey_schedule_iterator(
+            model_obj=self, internal_identifier=self.internal_identifier))
 
     @property
     def previous(self):
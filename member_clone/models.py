@@ -1,4 +1,101 @@
+from django.db import models
+from edc_base.model_mixins import BaseUuidModel
+from edc_base.utils import get_utcnow
+
+from .choices import CLONE_JOB_STATUS, CLONE_RUN_STATUS
+from .constants import QUEUED, RUNNING
+
 # from django.conf import settings
 #
 # if settings.APP_NAME == 'member_clone':
 #     from .tests import models
+
+
+class CloneJob(BaseUuidModel):
+
+    """A request to clone members into a household_structure.
+
+    Jobs are added by `CloneQueue.enqueue` and processed by a
+    `CloneQueueWorker`. See `member_clone.clone_queue`.
+    """
+
+    member_model = models.CharField(
+        max_length=100,
+        help_text='label_lower of the household member model')
+
+    household_structure_pk = models.CharField(max_length=36)
+
+    survey_schedule = models.CharField(max_length=150)
+
+    report_datetime = models.DateTimeField()
+
+    status = models.CharField(
+        max_length=15,
+        choices=CLONE_JOB_STATUS,
+        default=QUEUED)
+
+    result = models.CharField(max_length=15, null=True)
+
+    members_count = models.IntegerField(default=0)
+
+    attempts = models.IntegerField(default=0)
+
+    max_attempts = models.IntegerField(default=3)
+
+    available_datetime = models.DateTimeField(
+        default=get_utcnow,
+        help_text='job may not be leased before this datetime')
+
+    lease_expires = models.DateTimeField(null=True)
+
+    leased_by = models.CharField(max_length=100, null=True)
+
+    last_error = models.TextField(null=True)
+
+    def __str__(self):
+        return '{} {}'.format(self.household_structure_pk, self.status)
+
+    class Meta:
+        unique_together = ('member_model', 'household_structure_pk')
+        index_together = (('status', 'available_datetime'), )
+
+
+class CloneRun(BaseUuidModel):
+
+    """A survey-wide clone run with its progress checkpoint.
+
+    Households are processed in household order and the checkpoint
+    is updated in the same transaction as each household's clone, so
+    an interrupted run resumes after `last_household_id` with exact
+    counts. See
+    `member_clone.runner.CloneRunner`.
+    """
+
+    member_model = models.CharField(
+        max_length=100,
+        help_text='label_lower of the household member model')
+
+    survey_schedule = models.CharField(max_length=150)
+
+    report_datetime = models.DateTimeField()
+
+    status = models.CharField(
+        max_length=15,
+        choices=CLONE_RUN_STATUS,
+        default=RUNNING)
+
+    last_household_id = models.CharField(
+        max_length=36,
+        null=True,
+        help_text='household of the last checkpointed household_structure')
+
+    cloned = models.IntegerField(default=0)
+
+    skipped = models.IntegerField(default=0)
+
+    failed = models.IntegerField(default=0)
+
+    members_count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return '{} {}'.format(self.survey_schedule, self.status)
@@ -0,0 +1,166 @@
+from django.apps import apps as django_apps
+from django.db import transaction
+
+from .clone import (
+    CloneMembersExistError, get_member_pks, get_previous_survey_schedule_values,
+    get_registered_dobs)
+from .duplicates import CloneDuplicateIdentityError
+from .model_mixins import validate_clone_report_datetime
+from .signals import members_cloned
+from .site_clone_dependents import site_clone_dependents
+
+
+class CloneMovers:
+
+    """Clones members who moved into another household into
+    `household_structure`.
+
+    For each internal_identifier, the source is the member's latest
+    appearance in any household in a survey_schedule before that of
+    `household_structure`. Sources are found with one query on
+    (internal_identifier, survey_schedule); the member model should
+    index these fields. New members are cloned with
+    `CloneModelMixin.clone` so ages, report_datetime validation and
+    model overrides follow the same rules as `Clone`.
+
+        * internal_identifiers: internal_identifiers of the movers.
+        * household_structure: the household_structure to clone into.
+        * report_datetime: report_datetime for the new members.
+        * bulk: inserts members with one bulk insert, see `Clone`.
+        * dependents: registry of models cloned with the members,
+          see `Clone`. Default: `site_clone_dependents`.
+
+    Raises CloneMembersExistError if any mover already exists in
+    `household_structure`, CloneDuplicateIdentityError if any mover
+    already exists in another household in the same survey_schedule
+    (e.g. the old household was already cloned) and
+    CloneRegisteredSubjectError if a mover has no RegisteredSubject.
+    Identifiers without an earlier appearance are listed in
+    `not_found` and not cloned.
+
+        movers = CloneMovers(
+            internal_identifiers=[...],
+            household_structure=household_structure,
+            report_datetime=report_datetime)
+        movers.members  # the new members
+
+    `source_pks` maps the internal_identifier of each new member to
+    the pk of the member it was cloned from.
+    """
+
+    model = 'member.householdmember'
+
+    def __init__(self, internal_identifiers=None, household_structure=None,
+                 report_datetime=None, model=None, bulk=None, create=None,
+                 dependents=None):
+        self.model = model or self.model
+        self.internal_identifiers = [
+            self.model_cls._meta.get_field('internal_identifier').to_python(i)
+            for i in internal_identifiers or []]
+        self.household_structure = household_structure
+        self.survey_schedule = household_structure.survey_schedule_object
+        self.report_datetime = report_datetime
+        self.bulk = bulk
+        self.dependents = dependents or site_clone_dependents
+        self.dependents_counts = {}
+        self.source_pks = {}
+        self.not_found = []
+        create = True if create is None else create
+        self.members = self.clone(create=create)
+
+    def __repr__(self):
+        return '{}(household_structure={})'.format(
+            self.__class__.__name__, self.household_structure)
+
+    @property
+    def model_cls(self):
+        try:
+            return django_apps.get_model(*self.model.split('.'))
+        except AttributeError:
+            return self.model
+
+    @property
+    def household_structure_model_cls(self):
+        return self.model_cls._meta.get_field('household_structure').related_model
+
+    def latest_members(self):
+        """Returns a dictionary of {internal_identifier: member} of the
+        latest appearance of each mover before this survey_schedule.
+        """
+        previous_survey_schedules = get_previous_survey_schedule_values(self.survey_schedule)
+        latest = {}
+        for obj in self.model_cls.objects.filter(
+                internal_identifier__in=self.internal_identifiers,
+                survey_schedule__in=previous_survey_schedules).order_by(
+                    '-report_datetime'):
+            rank = previous_survey_schedules.index(obj.survey_schedule)
+            if (obj.internal_identifier not in latest
+                    or rank < latest[obj.internal_identifier][0]):
+                latest.update({obj.internal_identifier: (rank, obj)})
+        return {k: v[1] for k, v in latest.items()}
+
+    def safe_to_clone_or_raise(self, household_structure=None):
+        existing = self.model_cls.objects.filter(
+            household_structure=household_structure,
+            internal_identifier__in=self.internal_identifiers).values_list(
+                'internal_identifier', flat=True)
+        if existing:
+            raise CloneMembersExistError(
+                'Cannot clone a household member into a survey '
+                'where the member already exists. Got {}.'.format(
+                    ', '.join(str(i) for i in existing)))
+        elsewhere = self.model_cls.objects.filter(
+            survey_schedule=household_structure.survey_schedule,
+            internal_identifier__in=self.internal_identifiers).values_list(
+                'internal_identifier', 'household_structure__household')
+        if elsewhere:
+            raise CloneDuplicateIdentityError(
+                'Cannot clone a household member who already exists in '
+                'another household in {}. Got {}.'.format(
+                    household_structure.survey_schedule,
+                    ', '.join('{} in {}'.format(*row) for row in elsewhere)))
+
+    def clone(self, create=None):
+        """Returns a list of new members, saved if `create`.
+
+        If `create`, the target household_structure is locked for the
+        duration of the clone, see `Clone.clone`.
+        """
+        with transaction.atomic():
+            household_structure = self.household_structure
+            if create:
+                household_structure = (
+                    self.household_structure_model_cls.objects.select_for_update().get(
+                        pk=household_structure.pk))
+            self.safe_to_clone_or_raise(household_structure=household_structure)
+            latest = self.latest_members()
+            self.not_found = [
+                i for i in self.internal_identifiers if i not in latest]
+            dobs = get_registered_dobs(list(latest), raise_missing=True)
+            if latest:
+                validate_clone_report_datetime(self.survey_schedule, self.report_datetime)
+            new_objs = []
+            for internal_identifier, obj in latest.items():
+                new_objs.append(obj.clone(
+                    household_structure,
+                    self.report_datetime,
+                    dob=dobs.get(internal_identifier.hex),
+                    validate=False,
+                    user_created=household_structure.user_created))
+                self.source_pks.update({internal_identifier: obj.pk})
+            if create and self.bulk:
+                self.model_cls.objects.bulk_create(new_objs)
+            elif create:
+                for new_obj in new_objs:
+                    new_obj.save()
+            if create and new_objs:
+                self.dependents_counts = self.dependents.clone(
+                    member_model_cls=self.model_cls,
+                    member_pks=get_member_pks(
+                        self.model_cls, new_objs, self.source_pks, household_structure))
+                members_cloned.send(
+                    sender=self.model_cls,
+                    members=new_objs,
+                    household_structure=household_structure,
+                    bulk=bool(self.bulk))
+        return new_objs
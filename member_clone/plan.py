@@ -0,0 +1,291 @@
+import csv
+import json
+
+from datetime import date, datetime
+from uuid import UUID
+
+from django.apps import apps as django_apps
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+
+from .clone import Clone, CloneMembersExistError
+from .model_mixins import CloneRegisteredSubjectError, CloneReportDatetimeError
+from .signals import members_cloned
+from .site_clone_dependents import site_clone_dependents
+
+# fields set on a new member by `CloneModelMixin.clone`
+CLONE_FIELDS = [
+    'household_structure_id', 'survey_schedule', 'report_datetime',
+    'first_name', 'initials', 'gender', 'survival_status', 'age_in_years',
+    'relation', 'internal_identifier', 'subject_identifier',
+    'subject_identifier_as_pk', 'cloned', 'cloned_datetime',
+    'personal_details_changed', 'user_created']
+
+
+def plan_value(value):
+    """Returns a value that serializes to JSON or CSV.
+    """
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    elif isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+class ClonePlan:
+
+    """A plan of the members a survey-wide clone into `survey_schedule`
+    would create, computed without writing to the database.
+
+    Each row is one new member: `source_pk`, the pk of the member
+    it is cloned from, followed by `CLONE_FIELDS`. Rows are
+    generated one household at a time using `Clone(create=False)`
+    so memory does not grow with the number of households.
+    Households that already have members are skipped. Households that
+    cannot be cloned, e.g. with no household_structure in a previous
+    survey_schedule, are counted as failed and their errors listed in
+    the summary by household_structure pk.
+
+        plan = ClonePlan(survey_schedule=..., report_datetime=...)
+        with open('plan.jsonl', 'w') as f:
+            plan.write_jsonl(f)
+
+    Apply a plan with `ClonePlanLoader`.
+    """
+
+    model = 'member.householdmember'
+    clone_cls = Clone
+    fieldnames = ['source_pk'] + CLONE_FIELDS
+
+    def __init__(self, survey_schedule=None, report_datetime=None, model=None):
+        self.model = model or self.model
+        self.survey_schedule = survey_schedule
+        self.report_datetime = report_datetime
+        self.summary = {}
+
+    def __repr__(self):
+        return '{}(survey_schedule={})'.format(
+            self.__class__.__name__, self.survey_schedule)
+
+    @property
+    def model_cls(self):
+        try:
+            return django_apps.get_model(*self.model.split('.'))
+        except AttributeError:
+            return self.model
+
+    @property
+    def household_structure_model_cls(self):
+        return self.model_cls._meta.get_field('household_structure').related_model
+
+    def rows(self):
+        """Yields a dictionary per new member and updates `summary`.
+        """
+        self.summary = dict(households=0, skipped=0, failed=0, members=0, errors={})
+        household_structures = self.household_structure_model_cls.objects.filter(
+            survey_schedule=self.survey_schedule.field_value).order_by('household')
+        for household_structure in household_structures.iterator():
+            try:
+                clone = self.clone_cls(
+                    household_structure=household_structure,
+                    report_datetime=self.report_datetime,
+                    model=self.model,
+                    create=False)
+            except CloneMembersExistError:
+                self.summary['skipped'] += 1
+                continue
+            except (CloneRegisteredSubjectError, CloneReportDatetimeError,
+                    ObjectDoesNotExist) as e:
+                self.summary['failed'] += 1
+                self.summary['errors'].update({str(household_structure.pk): str(e)})
+                continue
+            self.summary['households'] += 1
+            for member in clone.members:
+                self.summary['members'] += 1
+                row = dict(source_pk=plan_value(
+                    clone.source_pks.get(member.internal_identifier)))
+                row.update({
+                    name: plan_value(getattr(member, name)) for name in CLONE_FIELDS})
+                yield row
+
+    def write_jsonl(self, f):
+        """Writes the plan as JSON lines to the file object and
+        returns the summary.
+        """
+        for row in self.rows():
+            f.write('{}\n'.format(json.dumps(row)))
+        return self.summary
+
+    def write_csv(self, f):
+        """Writes the plan as CSV to the file object and returns
+        the summary.
+        """
+        writer = csv.DictWriter(f, fieldnames=self.fieldnames)
+        writer.writeheader()
+        for row in self.rows():
+            writer.writerow(row)
+        return self.summary
+
+
+def read_jsonl(f):
+    """Yields plan rows from a JSON lines file object.
+    """
+    for line in f:
+        if line.strip():
+            yield json.loads(line)
+
+
+def read_csv(f):
+    """Yields plan rows from a CSV file object.
+    """
+    for row in csv.DictReader(f):
+        yield row
+
+
+class ClonePlanLoader:
+
+    """Creates the members of a clone plan with bulk inserts.
+
+    Rows are inserted in batches, one transaction per batch. A batch
+    holds whole households; rows of a household_structure are expected
+    to be contiguous, as written by `ClonePlan`. As for `Clone`, the
+    batch's household_structures are locked (select_for_update) and
+    rows for a household_structure that already has members, e.g. one
+    enumerated since the plan was exported, are not loaded. These are
+    counted as `members_exist`.
+
+        with open('plan.jsonl') as f:
+            counts = ClonePlanLoader().load(read_jsonl(f))
+
+    Registered dependents of the source members, see
+    `site_clone_dependents`, are cloned in the same transaction as
+    each batch using the rows' `source_pk`.
+
+    Note: bulk inserts do not call `save` or send per-row signals.
+    `members_cloned` is sent once per batch.
+    """
+
+    model = 'member.householdmember'
+    batch_size = 500
+
+    def __init__(self, model=None, batch_size=None, dependents=None):
+        """
+            * dependents: registry of models cloned with the members.
+              Default: `site_clone_dependents`.
+        """
+        self.model = model or self.model
+        self.batch_size = batch_size or self.batch_size
+        self.dependents = dependents or site_clone_dependents
+
+    def __repr__(self):
+        return '{}(model={})'.format(self.__class__.__name__, self.model)
+
+    @property
+    def model_cls(self):
+        try:
+            return django_apps.get_model(*self.model.split('.'))
+        except AttributeError:
+            return self.model
+
+    def to_instance(self, row):
+        """Returns an unsaved model instance for a plan row.
+
+        Empty values of nullable fields, as read from CSV, are None.
+        """
+        options = {}
+        for name in CLONE_FIELDS:
+            field = self.model_cls._meta.get_field(
+                name[:-3] if name.endswith('_id') else name)
+            value = row.get(name)
+            if value is None or (value == '' and field.null):
+                value = None
+            elif field.is_relation:
+                value = field.target_field.to_python(value)
+            else:
+                value = field.to_python(value)
+            options.update({name: value})
+        return self.model_cls(**options)
+
+    @property
+    def household_structure_model_cls(self):
+        return self.model_cls._meta.get_field('household_structure').related_model
+
+    def household_structures_with_members(self, objs):
+        """Returns a set of the pks of the household_structures of
+        `objs` that already have members.
+
+        The household_structures are locked for the rest of the
+        transaction, see `Clone.clone`.
+        """
+        pks = list(self.household_structure_model_cls.objects.select_for_update().filter(
+            pk__in=set(obj.household_structure_id for obj in objs)).order_by(
+                'pk').values_list('pk', flat=True))
+        return set(self.model_cls.objects.filter(
+            household_structure__in=pks).values_list(
+                'household_structure', flat=True).distinct())
+
+    def get_member_pks(self, objs, rows, new_objs):
+        """Returns a dictionary of {source member pk: new member pk}
+        for the bulk inserted `new_objs`, where `objs` are the
+        instances of `rows`.
+
+        Bulk inserts on backends that do not return pks are read back
+        from the database.
+        """
+        source_pks = {
+            (obj.household_structure_id, obj.internal_identifier):
+                self.model_cls._meta.pk.to_python(row.get('source_pk'))
+            for obj, row in zip(objs, rows) if row.get('source_pk')}
+        if any(obj.pk is None for obj in new_objs):
+            new_pks = {
+                (household_structure_id, internal_identifier): pk
+                for household_structure_id, internal_identifier, pk
+                in self.model_cls.objects.filter(
+                    household_structure__in=set(obj.household_structure_id for obj in new_objs),
+                    internal_identifier__in=set(
+                        obj.internal_identifier for obj in new_objs)).values_list(
+                            'household_structure', 'internal_identifier', 'pk')}
+        else:
+            new_pks = {(obj.household_structure_id, obj.internal_identifier): obj.pk
+                       for obj in new_objs}
+        return {source_pks[key]: pk for key, pk in new_pks.items() if key in source_pks}
+
+    def load_batch(self, rows):
+        objs = [self.to_instance(row) for row in rows]
+        with transaction.atomic():
+            with_members = self.household_structures_with_members(objs)
+            new_objs = [obj for obj in objs
+                        if obj.household_structure_id not in with_members]
+            self.model_cls.objects.bulk_create(new_objs)
+            if new_objs:
+                self.dependents.clone(
+                    member_model_cls=self.model_cls,
+                    member_pks=self.get_member_pks(objs, rows, new_objs))
+                members_cloned.send(
+                    sender=self.model_cls,
+                    members=new_objs,
+                    household_structure=None,
+                    bulk=True)
+        return new_objs, len(objs) - len(new_objs)
+
+    def load(self, rows):
+        """Loads plan rows and returns a dictionary of counts.
+
+        A batch is closed once it has `batch_size` rows and the next
+        row is for another household_structure.
+        """
+        counts = dict(created=0, members_exist=0)
+        batch = []
+        for row in rows:
+            if (len(batch) >= self.batch_size
+                    and row['household_structure_id'] != batch[-1]['household_structure_id']):
+                created, members_exist = self.load_batch(batch)
+                counts['created'] += len(created)
+                counts['members_exist'] += members_exist
+                batch = []
+            batch.append(row)
+        if batch:
+            created, members_exist = self.load_batch(batch)
+            counts['created'] += len(created)
+            counts['members_exist'] += members_exist
+        return counts
@@ -0,0 +1,113 @@
+import cProfile
+import io
+import os
+import pstats
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from contextlib import contextmanager
+
+
+class CloneProfiler:
+
+    """Captures cProfile stats and tracemalloc snapshots for a sample
+    of clones or chunks of a run.
+
+        * directory: directory for this run's captures. Created if
+          it does not exist. Default: a new temporary directory.
+        * every: capture every nth call to `capture`. Default: 1.
+        * top: number of entries in each summary. Default: 20.
+        * memory: if True, also traces memory allocations.
+          Default: True.
+
+    Each capture writes `<name>.prof`, loadable with `pstats`, and
+    `<name>.txt`, a summary of the top functions by cumulative time
+    and, if `memory`, the top allocations by line.
+
+        profiler = CloneProfiler(directory='/tmp/clone-profiles/run-1', every=10)
+        Clone(..., profiler=profiler)
+
+    Only one capture runs at a time; calls to `capture` from other
+    threads while a capture is running are not sampled.
+
+    Note: cProfile only profiles the thread that started the capture
+    but tracemalloc traces all threads. When households are cloned
+    concurrently, e.g. by `CloneRunner.arun`, the allocations, peak
+    memory and elapsed time of a capture include the households
+    cloned by other threads during the capture.
+    """
+
+    every = 1
+    top = 20
+
+    def __init__(self, directory=None, every=None, top=None, memory=None):
+        self.directory = directory or tempfile.mkdtemp(prefix='clone-profile-')
+        self.every = every or self.every
+        self.top = top or self.top
+        self.memory = True if memory is None else memory
+        self.calls = 0
+        self.calls_lock = threading.Lock()
+        self.captures = []
+        self.lock = threading.Lock()
+
+    def __repr__(self):
+        return '{}(directory={})'.format(self.__class__.__name__, self.directory)
+
+    def sampled(self):
+        """Returns True if this call should be captured.
+        """
+        with self.calls_lock:
+            self.calls += 1
+            return (self.calls - 1) % self.every == 0
+
+    @contextmanager
+    def capture(self, name=None):
+        """A context manager that profiles its block if sampled.
+        """
+        if not self.sampled() or not self.lock.acquire(blocking=False):
+            yield
+            return
+        try:
+            started_tracing = self.memory and not tracemalloc.is_tracing()
+            if started_tracing:
+                tracemalloc.start()
+            profile = cProfile.Profile()
+            started = time.monotonic()
+            profile.enable()
+            try:
+                yield
+            finally:
+                profile.disable()
+                elapsed = time.monotonic() - started
+                snapshot = peak = None
+                if self.memory:
+                    snapshot = tracemalloc.take_snapshot()
+                    peak = tracemalloc.get_traced_memory()[1]
+                if started_tracing:
+                    tracemalloc.stop()
+                self.write(name, profile, elapsed, snapshot, peak)
+        finally:
+            self.lock.release()
+
+    def write(self, name, profile, elapsed, snapshot=None, peak=None):
+        """Writes the capture files and returns the summary path.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, name)
+        profile.dump_stats('{}.prof'.format(path))
+        summary = io.StringIO()
+        summary.write('{}: {:.3f}s\n'.format(name, elapsed))
+        if peak is not None:
+            summary.write('peak traced memory: {} KiB\n'.format(peak // 1024))
+        summary.write('\nTop {} functions by cumulative time\n'.format(self.top))
+        pstats.Stats(profile, stream=summary).sort_stats('cumulative').print_stats(self.top)
+        if snapshot:
+            summary.write('Top {} allocations by line\n'.format(self.top))
+            for stat in snapshot.statistics('lineno')[:self.top]:
+                summary.write('{}\n'.format(stat))
+        with open('{}.txt'.format(path), 'w') as f:
+            f.write(summary.getvalue())
+        self.captures.append('{}.txt'.format(path))
+        return '{}.txt'.format(path)
@@ -0,0 +1,173 @@
+import csv
+import json
+
+from django.apps import apps as django_apps
+from django.db.models import Count
+
+from .clone import get_previous_survey_schedule_values
+from .constants import READY, MEMBERS_EXIST, NO_PREVIOUS_MEMBERS
+from .constants import MISSING_HOUSEHOLD_STRUCTURE
+
+
+class ClonePreflightReport:
+
+    """A report, per household, of what a survey-wide clone into
+    `survey_schedule` would do, without cloning.
+
+    For each household_structure in the survey_schedule gives the
+    previous survey_schedule members would be cloned from, the number
+    of members to clone and the number of members that already exist
+    (`Clone` would raise CloneMembersExistError). As for `Clone`,
+    previous members who already exist in another household in this
+    survey_schedule, e.g. moved by `CloneMovers`, are not counted as
+    members to clone.
+
+    Uses a fixed number of aggregate queries regardless of the
+    number of households. Rows are generated in household order.
+
+        report = ClonePreflightReport(survey_schedule=...)
+        with open('report.csv', 'w') as f:
+            summary = report.write_csv(f)
+    """
+
+    model = 'member.householdmember'
+    fieldnames = [
+        'household_structure', 'household', 'survey_schedule',
+        'source_survey_schedule', 'members_to_clone', 'existing_members',
+        'status']
+
+    def __init__(self, survey_schedule=None, model=None):
+        self.model = model or self.model
+        self.survey_schedule = survey_schedule
+        self.previous_survey_schedules = get_previous_survey_schedule_values(survey_schedule)
+        self.summary = {}
+
+    def __repr__(self):
+        return '{}(survey_schedule={})'.format(
+            self.__class__.__name__, self.survey_schedule)
+
+    @property
+    def model_cls(self):
+        try:
+            return django_apps.get_model(*self.model.split('.'))
+        except AttributeError:
+            return self.model
+
+    @property
+    def household_structure_model_cls(self):
+        return self.model_cls._meta.get_field('household_structure').related_model
+
+    def existing_members(self):
+        """Returns a dictionary of {household_structure: count} for
+        members already in this survey_schedule.
+        """
+        return {
+            row['household_structure']: row['count']
+            for row in self.model_cls.objects.filter(
+                survey_schedule=self.survey_schedule.field_value).values(
+                    'household_structure').annotate(count=Count('pk')).order_by()}
+
+    def previous_members(self):
+        """Returns a dictionary of {(household, survey_schedule): count}
+        for members in previous survey_schedules.
+        """
+        return {
+            (row['household_structure__household'], row['survey_schedule']): row['count']
+            for row in self.model_cls.objects.filter(
+                survey_schedule__in=self.previous_survey_schedules).values(
+                    'household_structure__household', 'survey_schedule').annotate(
+                        count=Count('pk')).order_by()}
+
+    def moved_members(self):
+        """Returns a dictionary of {(household, survey_schedule): count}
+        for members in previous survey_schedules whose
+        internal_identifier already exists in this survey_schedule.
+        """
+        return {
+            (row['household_structure__household'], row['survey_schedule']): row['count']
+            for row in self.model_cls.objects.filter(
+                survey_schedule__in=self.previous_survey_schedules,
+                internal_identifier__in=self.model_cls.objects.filter(
+                    survey_schedule=self.survey_schedule.field_value).values(
+                        'internal_identifier')).values(
+                    'household_structure__household', 'survey_schedule').annotate(
+                        count=Count('pk')).order_by()}
+
+    def previous_household_structures(self):
+        """Returns a set of (household, survey_schedule) for
+        household_structures in previous survey_schedules.
+        """
+        return set(self.household_structure_model_cls.objects.filter(
+            survey_schedule__in=self.previous_survey_schedules).values_list(
+                'household', 'survey_schedule'))
+
+    def source(self, household, previous_members, previous_household_structures,
+               moved_members=None):
+        """Returns a tuple of (status, source survey_schedule, count)
+        following the same walk back through previous
+        survey_schedules as `Clone`.
+
+        `count` excludes `moved_members`, which `Clone` does not
+        clone again (see `Clone.exclude_moved`).
+        """
+        moved_members = moved_members or {}
+        for field_value in self.previous_survey_schedules:
+            if (household, field_value) not in previous_household_structures:
+                return MISSING_HOUSEHOLD_STRUCTURE, field_value, 0
+            count = previous_members.get((household, field_value), 0)
+            if count:
+                return READY, field_value, count - moved_members.get(
+                    (household, field_value), 0)
+        return NO_PREVIOUS_MEMBERS, None, 0
+
+    def rows(self):
+        """Yields a dictionary per household_structure and updates
+        `summary` with counts by status and `members_to_clone`.
+        """
+        self.summary = {
+            READY: 0, MEMBERS_EXIST: 0, NO_PREVIOUS_MEMBERS: 0,
+            MISSING_HOUSEHOLD_STRUCTURE: 0, 'members_to_clone': 0}
+        existing_members = self.existing_members()
+        previous_members = self.previous_members()
+        previous_household_structures = self.previous_household_structures()
+        moved_members = self.moved_members()
+        household_structures = self.household_structure_model_cls.objects.filter(
+            survey_schedule=self.survey_schedule.field_value).order_by(
+                'household').values_list('pk', 'household')
+        for pk, household in household_structures.iterator():
+            status, source, count = self.source(
+                household, previous_members, previous_household_structures,
+                moved_members=moved_members)
+            existing = existing_members.get(pk, 0)
+            if existing:
+                status, count = MEMBERS_EXIST, 0
+            self.summary[status] += 1
+            self.summary['members_to_clone'] += count
+            yield dict(
+                household_structure=str(pk),
+                household=str(household),
+                survey_schedule=self.survey_schedule.field_value,
+                source_survey_schedule=source,
+                members_to_clone=count,
+                existing_members=existing,
+                status=status)
+
+    def write_csv(self, f):
+        """Writes the report as CSV to the file object and returns
+        the summary.
+        """
+        writer = csv.DictWriter(f, fieldnames=self.fieldnames)
+        writer.writeheader()
+        for row in self.rows():
+            writer.writerow(row)
+        return self.summary
+
+    def write_json(self, f):
+        """Writes the report as a JSON list to the file object, one
+        row at a time, and returns the summary.
+        """
+        f.write('[')
+        for index, row in enumerate(self.rows()):
+            f.write('{}\n{}'.format(',' if index else '', json.dumps(row)))
+        f.write('\n]\n')
+        return self.summary
@@ -0,0 +1,92 @@
+from django.apps import apps as django_apps
+from django.db import transaction
+
+from .managers import clone_not_updated_q
+
+
+class CloneRollback:
+
+    """Deletes cloned household members for a survey_schedule, for
+    example after a round was opened with the wrong report_datetime.
+
+    Only members with `cloned=True` are deleted. Members already
+    updated since the clone (see `CloneModelMixin.clone_updated`) are
+    refused and left in place.
+
+        * survey_schedule: the survey_schedule object to roll back.
+        * cloned_after, cloned_before: optional `cloned_datetime`
+          window (inclusive).
+        * chunk_size: members deleted per transaction. Default: 500.
+
+    For example:
+
+        counts = CloneRollback(survey_schedule=...).rollback()
+    """
+
+    model = 'member.householdmember'
+    chunk_size = 500
+
+    def __init__(self, survey_schedule=None, model=None, cloned_after=None,
+                 cloned_before=None, chunk_size=None):
+        self.model = model or self.model
+        self.survey_schedule = survey_schedule
+        self.cloned_after = cloned_after
+        self.cloned_before = cloned_before
+        self.chunk_size = chunk_size or self.chunk_size
+
+    def __repr__(self):
+        return '{}(survey_schedule={})'.format(
+            self.__class__.__name__, self.survey_schedule)
+
+    @property
+    def model_cls(self):
+        try:
+            return django_apps.get_model(*self.model.split('.'))
+        except AttributeError:
+            return self.model
+
+    @property
+    def cloned_members(self):
+        """Returns a queryset of all cloned members in the window.
+        """
+        options = dict(
+            survey_schedule=self.survey_schedule.field_value,
+            cloned=True)
+        if self.cloned_after:
+            options.update(cloned_datetime__gte=self.cloned_after)
+        if self.cloned_before:
+            options.update(cloned_datetime__lte=self.cloned_before)
+        return self.model_cls.objects.filter(**options)
+
+    @property
+    def members(self):
+        """Returns a queryset of cloned members that may be deleted.
+        """
+        return self.cloned_members.filter(clone_not_updated_q())
+
+    @property
+    def refused_members(self):
+        """Returns a queryset of cloned members that have been
+        updated and will not be deleted.
+        """
+        return self.cloned_members.exclude(clone_not_updated_q())
+
+    def rollback(self):
+        """Deletes members in chunks, one transaction per chunk, and
+        returns a dictionary of counts.
+
+            * deleted: household members deleted.
+            * cascaded: related rows deleted by cascade.
+            * refused: cloned members not deleted because updated.
+        """
+        counts = dict(deleted=0, cascaded=0, refused=self.refused_members.count())
+        while True:
+            pks = list(self.members.values_list('pk', flat=True)[:self.chunk_size])
+            if not pks:
+                break
+            with transaction.atomic():
+                total, deleted = self.members.filter(pk__in=pks).delete()
+            members_deleted = deleted.get(self.model_cls._meta.label, 0)
+            counts['deleted'] += members_deleted
+            counts['cascaded'] += total - members_deleted
+        return counts
@@ -0,0 +1,46 @@
+import threading
+
+from contextlib import contextmanager
+
+_clone_reads = threading.local()
+
+
+@contextmanager
+def clone_reads_from(database=None):
+    """A context manager that routes reads to `database` in this
+    thread while `CloneReadRouter` is installed.
+
+    If `database` is None, reads are routed as usual.
+    """
+    previous = getattr(_clone_reads, 'database', None)
+    _clone_reads.database = database
+    try:
+        yield
+    finally:
+        _clone_reads.database = previous
+
+
+class CloneReadRouter:
+
+    """Routes reads to a replica while cloning, see `Clone` option
+    `read_database`. Writes are not routed and go to the default
+    database.
+
+    Add to settings:
+
+        DATABASE_ROUTERS = ['member_clone.routers.CloneReadRouter']
+
+    Outside of `clone_reads_from` the router has no effect.
+    """
+
+    def db_for_read(self, model, **hints):
+        return getattr(_clone_reads, 'database', None)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """Allows relations to instances read from the replica, a
+        copy of the default database, while cloning.
+        """
+        database = getattr(_clone_reads, 'database', None)
+        if database and database in [obj1._state.db, obj2._state.db]:
+            return True
+        return None
@@ -0,0 +1,411 @@
+import asyncio
+import os
+import time
+
+from contextlib import contextmanager
+from functools import partial
+
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from edc_base.utils import get_utcnow
+from survey.site_surveys import site_surveys
+
+from .chunking import AdaptiveChunkSize
+from .clone import Clone, CloneMembersExistError, is_transient_error, run_in_worker
+from .constants import CLONED, SKIPPED, FAILED, RUNNING, DONE, TRANSIENT_ERRORS
+from .duplicates import DuplicateIdentityDetector
+from .model_mixins import CloneRegisteredSubjectError, CloneReportDatetimeError
+from .profiling import CloneProfiler
+from .routers import clone_reads_from
+from .session import CloneSession
+
+
+class CloneRunner:
+
+    """Clones household members for every household that has a
+    household_structure in the given survey_schedule.
+
+    Each household is cloned in its own transaction (see `Clone`).
+    Households that already have members are skipped.
+
+        * survey_schedule: the survey_schedule object to clone into.
+        * report_datetime: report_datetime for the new members.
+        * chunk_size: number of households per chunk, the unit for
+          prefetching and profiling. Default: 100.
+        * clone_run: a CloneRun instance to resume.
+        * read_database: database alias for reads while cloning,
+          see `Clone`.
+        * bulk: bulk insert members, see `Clone`.
+        * concurrency: maximum number of households cloned at once
+          by `arun`. Default: 4.
+        * executor: executor used by `arun` to offload ORM work.
+          Default: the event loop's default executor.
+        * check_duplicates: if True, `run` and `arun` first raise
+          CloneDuplicateIdentityError if a member appears in more
+          than one household in this or a previous survey_schedule.
+          Default: False.
+        * session: a `CloneSession` shared by all clones of the run.
+          Default: a new session per runner.
+        * adaptive: if True, `run` adjusts `chunk_size` between
+          `min_chunk_size` and `max_chunk_size` from the time taken
+          by each chunk relative to `target_seconds`, see
+          `AdaptiveChunkSize`. If a chunk raises a transient error,
+          e.g. a lock wait timeout (see `is_transient_error`), the rest of the chunk is retried
+          with a smaller size, at most `max_retries` times in a row.
+          Default: False.
+        * profile_directory: if set, captures cProfile stats and
+          memory snapshots, see `CloneProfiler`, in a directory per
+          run below this one. `run` captures chunks and `arun`
+          captures households; the memory and time of an `arun`
+          capture include the households cloned concurrently.
+          Default: None.
+        * profile_every: capture every nth chunk or household.
+          Default: 1.
+
+    `run` records progress in a CloneRun. Households are processed in
+    household order and the checkpoint is saved in the same transaction
+    as each household's clone, so the counts of a run that was killed
+    are exact when resumed. To resume an interrupted run:
+
+        runner = CloneRunner.from_clone_run(clone_run)
+        runner.run()
+
+    `arun` does not checkpoint.
+
+    For example:
+
+        runner = CloneRunner(survey_schedule=..., report_datetime=...)
+        counts = runner.run()
+
+        or, from a coroutine,
+
+        counts = await runner.arun()
+    """
+
+    model = 'member.householdmember'
+    clone_run_model = 'member_clone.clonerun'
+    clone_cls = Clone
+    chunk_size = 100
+    concurrency = 4
+    max_retries = 3
+
+    def __init__(self, survey_schedule=None, report_datetime=None, model=None,
+                 chunk_size=None, clone_run=None, read_database=None, bulk=None,
+                 concurrency=None, executor=None, check_duplicates=None, session=None,
+                 adaptive=None, min_chunk_size=None, max_chunk_size=None,
+                 target_seconds=None, profile_directory=None, profile_every=None):
+        self.model = model or self.model
+        self.profile_directory = profile_directory
+        self.profile_every = profile_every
+        self.profiler = None
+        self.chunk_size_controller = None
+        if adaptive:
+            self.chunk_size_controller = AdaptiveChunkSize(
+                chunk_size=chunk_size or self.chunk_size,
+                min_chunk_size=min_chunk_size,
+                max_chunk_size=max_chunk_size,
+                target_seconds=target_seconds)
+        self.session = session or CloneSession()
+        self.check_duplicates = check_duplicates
+        self.read_database = read_database
+        self.bulk = bulk
+        self.survey_schedule = survey_schedule
+        self.report_datetime = report_datetime
+        self.chunk_size = chunk_size or self.chunk_size
+        if self.chunk_size_controller:
+            self.chunk_size = self.chunk_size_controller.chunk_size
+        self.clone_run = clone_run
+        self.concurrency = concurrency or self.concurrency
+        self.executor = executor
+        self.counts = {CLONED: 0, SKIPPED: 0, FAILED: 0}
+        self.members_count = 0
+        self.errors = {}
+        if clone_run:
+            self.counts = {
+                CLONED: clone_run.cloned,
+                SKIPPED: clone_run.skipped,
+                FAILED: clone_run.failed}
+            self.members_count = clone_run.members_count
+
+    def __repr__(self):
+        return '{}(survey_schedule={})'.format(
+            self.__class__.__name__, self.survey_schedule)
+
+    @classmethod
+    def from_clone_run(cls, clone_run, **kwargs):
+        """Returns a runner that resumes the given CloneRun.
+        """
+        return cls(
+            survey_schedule=site_surveys.get_survey_schedule_from_field_value(
+                clone_run.survey_schedule),
+            report_datetime=clone_run.report_datetime,
+            model=clone_run.member_model,
+            clone_run=clone_run,
+            **kwargs)
+
+    @property
+    def model_cls(self):
+        try:
+            return django_apps.get_model(*self.model.split('.'))
+        except AttributeError:
+            return self.model
+
+    @property
+    def household_structure_model_cls(self):
+        return self.model_cls._meta.get_field('household_structure').related_model
+
+    @property
+    def clone_run_model_cls(self):
+        return django_apps.get_model(*self.clone_run_model.split('.'))
+
+    @property
+    def household_structures(self):
+        """Returns a queryset of household_structures in this
+        survey_schedule ordered by household_id.
+
+        Ordered by the column, not the relation, so the order matches
+        the `household__gt` filter of `next_chunk` whatever the
+        household model's default ordering.
+        """
+        return self.household_structure_model_cls.objects.filter(
+            survey_schedule=self.survey_schedule.field_value).order_by('household_id')
+
+    def household_structure_pks(self):
+        return list(self.household_structures.values_list('pk', flat=True))
+
+    def next_chunk(self, last_household_id=None):
+        """Returns a list of (pk, household_id) for the next chunk of
+        household_structures after `last_household_id`.
+        """
+        household_structures = self.household_structures
+        if last_household_id:
+            household_structures = household_structures.filter(
+                household__gt=last_household_id)
+        return list(household_structures.values_list(
+            'pk', 'household_id')[:self.chunk_size])
+
+    def get_profiler(self, name=None):
+        """Returns a profiler writing to a directory for this run
+        or None if not profiling.
+        """
+        if self.profile_directory:
+            return CloneProfiler(
+                directory=os.path.join(self.profile_directory, name),
+                every=self.profile_every)
+        return None
+
+    def clone_household(self, pk, profiler=None):
+        """Clones members into the household_structure with this pk
+        and returns a tuple of (status, number of members cloned).
+
+        Errors specific to the household, e.g. no household_structure
+        in a previous survey_schedule, are recorded in `errors` and
+        the household counted as FAILED.
+        """
+        try:
+            household_structure = self.household_structure_model_cls.objects.get(pk=pk)
+            clone = self.clone_cls(
+                household_structure=household_structure,
+                report_datetime=self.report_datetime,
+                model=self.model,
+                read_database=self.read_database,
+                bulk=self.bulk,
+                session=self.session,
+                profiler=profiler)
+        except CloneMembersExistError:
+            return SKIPPED, 0
+        except (CloneRegisteredSubjectError, CloneReportDatetimeError,
+                ObjectDoesNotExist) as e:
+            self.errors.update({pk: str(e)})
+            return FAILED, 0
+        return CLONED, clone.members.count()
+
+    @contextmanager
+    def prefetch(self, chunk):
+        """A context manager that caches the RegisteredSubject dobs of
+        the members each household in a chunk will be cloned from with
+        one query.
+
+        As in `get_previous_members`, these are the members of the
+        most recent previous survey_schedule with members. The dob
+        cache holds the whole chunk within, see
+        `CloneSession.reserve_dobs`.
+        """
+        previous_survey_schedules = [
+            survey_schedule.field_value for survey_schedule in
+            self.session.get_previous_survey_schedules(self.survey_schedule)]
+        read_database = self.read_database or getattr(
+            settings, 'MEMBER_CLONE_READ_DATABASE', None)
+        with clone_reads_from(read_database):
+            members = {}
+            for household, survey_schedule, internal_identifier in (
+                    self.model_cls.objects.filter(
+                        household_structure__household__in=[
+                            household for _, household in chunk],
+                        survey_schedule__in=previous_survey_schedules).values_list(
+                            'household_structure__household', 'survey_schedule',
+                            'internal_identifier')):
+                members.setdefault(household, {}).setdefault(
+                    survey_schedule, []).append(internal_identifier)
+            internal_identifiers = []
+            for by_survey_schedule in members.values():
+                internal_identifiers.extend(by_survey_schedule[min(
+                    by_survey_schedule, key=previous_survey_schedules.index)])
+        with self.session.reserve_dobs(len(internal_identifiers)):
+            with clone_reads_from(read_database):
+                self.session.prefetch_dobs(internal_identifiers)
+            yield
+
+    def update(self, status, members_count):
+        self.counts[status] += 1
+        self.members_count += members_count
+
+    def get_or_create_clone_run(self):
+        if not self.clone_run:
+            self.clone_run = self.clone_run_model_cls.objects.create(
+                member_model=self.model_cls._meta.label_lower,
+                survey_schedule=self.survey_schedule.field_value,
+                report_datetime=self.report_datetime)
+        return self.clone_run
+
+    def save_checkpoint(self, last_household_id=None):
+        clone_run = self.get_or_create_clone_run()
+        clone_run.last_household_id = str(last_household_id)
+        clone_run.cloned = self.counts[CLONED]
+        clone_run.skipped = self.counts[SKIPPED]
+        clone_run.failed = self.counts[FAILED]
+        clone_run.members_count = self.members_count
+        clone_run.save()
+
+    @contextmanager
+    def restore_checkpoint_on_error(self):
+        """A context manager that restores the counts, errors and
+        CloneRun checkpoint in memory if the block raises, e.g. if the
+        transaction saving the checkpoint is rolled back.
+
+        A retried chunk then resumes after the last household committed.
+        """
+        counts = dict(self.counts)
+        members_count = self.members_count
+        errors = dict(self.errors)
+        last_household_id = self.clone_run.last_household_id
+        try:
+            yield
+        except Exception:
+            self.counts = counts
+            self.members_count = members_count
+            self.errors = errors
+            self.clone_run.last_household_id = last_household_id
+            self.clone_run.cloned = counts[CLONED]
+            self.clone_run.skipped = counts[SKIPPED]
+            self.clone_run.failed = counts[FAILED]
+            self.clone_run.members_count = members_count
+            raise
+
+    def save_status(self, status):
+        clone_run = self.get_or_create_clone_run()
+        clone_run.status = status
+        clone_run.save(update_fields=['status'])
+
+    def run_chunk(self, chunk):
+        """Clones a chunk of households, saving the checkpoint with
+        each household.
+
+        Each household and its checkpoint commit in their own
+        transaction so the lock on its household_structure is held
+        only for that household's clone. If a household raises, the
+        checkpoint is that of the last household cloned.
+        """
+        if self.profiler:
+            with self.profiler.capture('chunk-{}'.format(chunk[0][1])):
+                return self.clone_chunk(chunk)
+        return self.clone_chunk(chunk)
+
+    def clone_chunk(self, chunk):
+        with self.prefetch(chunk):
+            for pk, household_id in chunk:
+                with self.restore_checkpoint_on_error(), transaction.atomic():
+                    self.update(*self.clone_household(pk))
+                    self.save_checkpoint(last_household_id=household_id)
+
+    def check_duplicates_or_raise(self):
+        """Raises CloneDuplicateIdentityError if a member appears in
+        more than one household in this or a previous survey_schedule.
+        """
+        survey_schedules = [self.survey_schedule] + self.session.get_previous_survey_schedules(
+            self.survey_schedule)
+        DuplicateIdentityDetector(
+            survey_schedules=survey_schedules, model=self.model).check_or_raise()
+
+    def run(self):
+        """Clones all households, resuming after the CloneRun
+        checkpoint if there is one, and returns a dictionary of
+        counts by status.
+        """
+        if self.check_duplicates:
+            self.check_duplicates_or_raise()
+        clone_run = self.get_or_create_clone_run()
+        self.profiler = self.get_profiler('clonerun-{}'.format(clone_run.pk))
+        self.save_status(RUNNING)
+        retries = 0
+        try:
+            while True:
+                chunk = self.next_chunk(clone_run.last_household_id)
+                if not chunk:
+                    break
+                if not self.chunk_size_controller:
+                    self.run_chunk(chunk)
+                else:
+                    started = time.monotonic()
+                    try:
+                        self.run_chunk(chunk)
+                    except TRANSIENT_ERRORS as e:
+                        retries += 1
+                        if retries > self.max_retries or not is_transient_error(e):
+                            raise
+                        self.chunk_size = self.chunk_size_controller.record(
+                            len(chunk), error=e)
+                        continue
+                    retries = 0
+                    self.chunk_size = self.chunk_size_controller.record(
+                        len(chunk), seconds=time.monotonic() - started)
+        except Exception:
+            self.save_status(FAILED)
+            raise
+        self.save_status(DONE)
+        return self.counts
+
+    async def arun(self):
+        """Clones all households, at most `concurrency` at a time, and
+        returns a dictionary of counts by status.
+
+        ORM work is offloaded to `executor`. If a household raises,
+        the other workers are cancelled and the exception is raised.
+        """
+        loop = asyncio.get_event_loop()
+        if self.check_duplicates:
+            await loop.run_in_executor(
+                self.executor, partial(run_in_worker, self.check_duplicates_or_raise))
+        pks = iter(await loop.run_in_executor(
+            self.executor, partial(run_in_worker, self.household_structure_pks)))
+
+        self.profiler = self.get_profiler(
+            'arun-{}'.format(get_utcnow().strftime('%Y%m%d%H%M%S%f')))
+
+        async def worker():
+            for pk in pks:
+                result = await loop.run_in_executor(
+                    self.executor, partial(
+                        run_in_worker, self.clone_household, pk, profiler=self.profiler))
+                self.update(*result)
+
+        workers = [asyncio.ensure_future(worker()) for _ in range(self.concurrency)]
+        try:
+            await asyncio.gather(*workers)
+        except Exception:
+            for task in workers:
+                task.cancel()
+            raise
+        return self.counts
@@ -0,0 +1,194 @@
+import threading
+
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from django.apps import apps as django_apps
+
+from .clone import get_previous_survey_schedules, get_registered_dobs
+from .model_mixins import CloneRegisteredSubjectError, validate_clone_report_datetime
+
+
+class LRUCache:
+
+    """A thread-safe mapping that holds at most `maxsize` items,
+    evicting the least recently used.
+    """
+
+    def __init__(self, maxsize=None):
+        self.maxsize = maxsize
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self):
+        return '{}(maxsize={})'.format(self.__class__.__name__, self.maxsize)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, key):
+        return key in self.items
+
+    def get(self, key, default=None):
+        with self.lock:
+            try:
+                self.items.move_to_end(key)
+            except KeyError:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return self.items[key]
+
+    def set(self, key, value):
+        with self.lock:
+            self.items[key] = value
+            self.items.move_to_end(key)
+            while len(self.items) > self.maxsize:
+                self.items.popitem(last=False)
+
+    def resize(self, maxsize):
+        """Sets `maxsize`, evicting the least recently used items
+        if the cache is now too big.
+        """
+        with self.lock:
+            self.maxsize = maxsize
+            while len(self.items) > self.maxsize:
+                self.items.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.items.clear()
+
+
+class CloneSession:
+
+    """Caches lookups shared by the `Clone` calls of one run.
+
+    Caches model classes, previous survey_schedule chains, validated
+    report_datetime windows and RegisteredSubject dobs. Each cache
+    is bounded and evicts the least recently used items.
+
+        * maxsize: maximum items per cache. Default: 100.
+        * dob_maxsize: maximum cached dobs. `CloneRunner` reserves
+          room for the dobs prefetched for a chunk while the chunk is
+          cloned, see `reserve_dobs`. Default: 10000.
+
+    Pass the session to `Clone` or `CloneRunner` (which creates one
+    per runner by default):
+
+        with CloneSession() as session:
+            for household_structure in household_structures:
+                Clone(household_structure=household_structure,
+                      report_datetime=report_datetime, session=session)
+
+    Use one session per run; cached dobs do not see later changes
+    to RegisteredSubject.
+    """
+
+    maxsize = 100
+    dob_maxsize = 10000
+
+    def __init__(self, maxsize=None, dob_maxsize=None):
+        self.models = LRUCache(maxsize=maxsize or self.maxsize)
+        self.previous_survey_schedules = LRUCache(maxsize=maxsize or self.maxsize)
+        self.windows = LRUCache(maxsize=maxsize or self.maxsize)
+        self.registered_dobs = LRUCache(maxsize=dob_maxsize or self.dob_maxsize)
+
+    def __repr__(self):
+        return '{}()'.format(self.__class__.__name__)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.clear()
+
+    def clear(self):
+        for cache in [self.models, self.previous_survey_schedules,
+                      self.windows, self.registered_dobs]:
+            cache.clear()
+
+    def get_model(self, model):
+        """Returns the model class for a label_lower or model class.
+        """
+        model_cls = self.models.get(model)
+        if not model_cls:
+            try:
+                model_cls = django_apps.get_model(*model.split('.'))
+            except AttributeError:
+                model_cls = model
+            self.models.set(model, model_cls)
+        return model_cls
+
+    def get_previous_survey_schedules(self, survey_schedule):
+        """Returns a list of survey_schedule objects before
+        `survey_schedule`, most recent first.
+        """
+        previous = self.previous_survey_schedules.get(survey_schedule.field_value)
+        if previous is None:
+            previous = get_previous_survey_schedules(survey_schedule)
+            self.previous_survey_schedules.set(survey_schedule.field_value, previous)
+        return previous
+
+    def validate_report_datetime(self, survey_schedule, report_datetime):
+        """Raises CloneReportDatetimeError if `report_datetime` is not
+        within the survey_schedule's window. Valid combinations are
+        cached.
+        """
+        key = (survey_schedule.field_value, report_datetime)
+        if not self.windows.get(key):
+            validate_clone_report_datetime(survey_schedule, report_datetime)
+            self.windows.set(key, True)
+
+    @contextmanager
+    def reserve_dobs(self, size):
+        """A context manager that grows the dob cache, if needed, to
+        hold `size` dobs so none prefetched within are evicted before
+        they are used.
+
+        The configured maxsize is restored on exit, evicting the least
+        recently used dobs.
+        """
+        maxsize = self.registered_dobs.maxsize
+        if size > maxsize:
+            self.registered_dobs.resize(size)
+        try:
+            yield
+        finally:
+            self.registered_dobs.resize(maxsize)
+
+    def prefetch_dobs(self, internal_identifiers):
+        """Fetches and caches the dobs of RegisteredSubjects not
+        already cached with one query.
+        """
+        internal_identifiers = list(internal_identifiers)
+        missing = set(
+            internal_identifier.hex for internal_identifier in internal_identifiers
+            if internal_identifier.hex not in self.registered_dobs)
+        if missing:
+            for registration_identifier, dob in get_registered_dobs(missing).items():
+                self.registered_dobs.set(registration_identifier, (dob, ))
+
+    def get_dobs(self, internal_identifiers):
+        """Returns a dictionary of {internal_identifier.hex: dob}.
+
+        Raises CloneRegisteredSubjectError if a RegisteredSubject
+        does not exist.
+        """
+        self.prefetch_dobs(internal_identifiers)
+        dobs = {}
+        for internal_identifier in internal_identifiers:
+            value = self.registered_dobs.get(internal_identifier.hex)
+            if value is None:
+                # not registered, or evicted while prefetching
+                self.prefetch_dobs([internal_identifier])
+                value = self.registered_dobs.get(internal_identifier.hex)
+            if value is None:
+                raise CloneRegisteredSubjectError(
+                    'RegisteredSubject instance unexpectedly missing when '
+                    'cloning member! Got internal identifier = {}.'.format(
+                        internal_identifier))
+            dobs.update({internal_identifier.hex: value[0]})
+        return dobs
@@ -0,0 +1,27 @@
+from django.dispatch import Signal
+
+# Sent once per household (Clone, CloneBundle) or per batch
+# (ClonePlanLoader) with the list of new members, inside the
+# transaction that created them.
+#
+#   * sender: the household member model class.
+#   * members: list of new household member instances.
+#   * household_structure: the household_structure cloned into, or
+#     None if members span several household_structures.
+#   * bulk: True if members were bulk inserted, in which case `save`
+#     was not called and no per-row pre_save/post_save signals were
+#     sent.
+#
+# Receivers that handle members in bulk should connect to this signal;
+# use `Clone(bulk=True)` to skip the per-row save path entirely.
+members_cloned = Signal(providing_args=['members', 'household_structure', 'bulk'])
+
+# Sent by the app when a household_structure is visited, e.g. when a
+# household log entry is saved. Creating a household_structure is not a
+# visit; structures for every survey_schedule are usually created with
+# the household. See `connect_clone_queue`.
+#
+#   * sender: the household_structure model class.
+#   * household_structure: the household_structure visited.
+#   * report_datetime: the datetime of the visit.
+household_structure_visited = Signal(providing_args=['household_structure', 'report_datetime'])
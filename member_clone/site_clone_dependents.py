@@ -0,0 +1,77 @@
+from collections import OrderedDict
+
+from django.apps import apps as django_apps
+from django.utils.module_loading import import_module, module_has_submodule
+
+
+class AlreadyRegistered(Exception):
+    pass
+
+
+class SiteCloneDependents:
+
+    """A registry of `CloneDependent`s, models cloned together with
+    the household members they relate to.
+
+    `Clone` and `CloneMovers` call `clone` in the same transaction as
+    the member insert, so that for each registered model all
+    instances of all new members are added with one query and one
+    bulk insert.
+
+    Register in a `clone_dependents.py` module of an app; these are
+    imported by `autodiscover` when member_clone is ready.
+    """
+
+    def __init__(self):
+        self.registry = OrderedDict()
+
+    def __repr__(self):
+        return '{}()'.format(self.__class__.__name__)
+
+    def register(self, dependent=None):
+        label_lower = dependent.model_cls._meta.label_lower
+        if label_lower in self.registry:
+            raise AlreadyRegistered(
+                'Clone dependent already registered. Got {}.'.format(label_lower))
+        self.registry.update({label_lower: dependent})
+
+    def unregister(self, model=None):
+        self.registry.pop(model, None)
+
+    def get_dependents(self, member_model_cls=None):
+        """Returns a list of dependents of the member model.
+        """
+        return [dependent for dependent in self.registry.values()
+                if dependent.member_model_cls == member_model_cls]
+
+    def clone(self, member_model_cls=None, member_pks=None):
+        """Clones the dependents of the source members and returns a
+        dictionary of {label_lower: number created}.
+
+            * member_pks: a dictionary of {source member pk: new member pk}.
+
+        Must be called within the transaction that created the new
+        members.
+        """
+        counts = {}
+        if not member_pks:
+            return counts
+        for dependent in self.get_dependents(member_model_cls):
+            new_objs = [
+                dependent.build(obj, member_pks[getattr(obj, dependent.member_attname)])
+                for obj in dependent.sources(list(member_pks))]
+            dependent.model_cls.objects.bulk_create(new_objs)
+            counts.update({dependent.model_cls._meta.label_lower: len(new_objs)})
+        return counts
+
+    def autodiscover(self, module_name=None):
+        """Imports `module_name` from each installed app to register
+        its dependents. Default: 'clone_dependents'.
+        """
+        module_name = module_name or 'clone_dependents'
+        for app_config in django_apps.get_app_configs():
+            if module_has_submodule(import_module(app_config.name), module_name):
+                import_module('{}.{}'.format(app_config.name, module_name))
+
+
+site_clone_dependents = SiteCloneDependents()
@@ -0,0 +1,167 @@
+import os
+
+from django.apps import apps as django_apps
+
+from .managers import clone_updated_expression
+
+# column: numpy dtype. Strings are ASCII bytes; age_in_years is -1 if unknown.
+SNAPSHOT_COLUMNS = [
+    ('internal_identifier', 'S32'),
+    ('household', 'S36'),
+    ('age_in_years', 'i2'),
+    ('gender', 'S1'),
+    ('cloned', '?'),
+    ('clone_updated', '?'),
+    ('survival_status', 'S16'),
+]
+
+
+def import_numpy():
+    """Returns the numpy module or raises ImportError with a hint.
+    """
+    try:
+        import numpy
+    except ImportError as e:
+        raise ImportError(
+            'Member snapshots require numpy. Install with '
+            '`pip install member-clone[snapshots]`. Got {}'.format(e))
+    return numpy
+
+
+class MemberSnapshot:
+
+    """A columnar snapshot of the members of one survey_schedule.
+
+    `write` saves a NumPy structured array, one row per member sorted
+    by internal_identifier, to `<directory>/<survey_schedule>.npy`.
+    `load` memory-maps the file so columns are read without loading
+    model instances or copying the file into memory.
+
+        MemberSnapshot.write(survey_schedule=..., directory='/snapshots')
+        snapshot = MemberSnapshot.load(survey_schedule=..., directory='/snapshots')
+        snapshot['age_in_years'].mean()
+
+    Join snapshots of two rounds by internal_identifier with `join`.
+
+    Requires numpy, imported on first use.
+    """
+
+    model = 'member.householdmember'
+    chunk_size = 10000
+
+    def __init__(self, array=None, survey_schedule=None, path=None):
+        self.array = array
+        self.survey_schedule = survey_schedule
+        self.path = path
+
+    def __repr__(self):
+        return '{}(survey_schedule={})'.format(
+            self.__class__.__name__, self.survey_schedule)
+
+    def __len__(self):
+        return len(self.array)
+
+    def __getitem__(self, key):
+        return self.array[key]
+
+    @staticmethod
+    def dtype():
+        return import_numpy().dtype(SNAPSHOT_COLUMNS)
+
+    @staticmethod
+    def get_path(survey_schedule=None, directory=None):
+        field_value = getattr(survey_schedule, 'field_value', survey_schedule)
+        return os.path.join(directory, '{}.npy'.format(field_value))
+
+    @classmethod
+    def members(cls, survey_schedule=None, model=None):
+        """Returns a values_list queryset of snapshot rows ordered by
+        internal_identifier.
+        """
+        model = model or cls.model
+        try:
+            model_cls = django_apps.get_model(*model.split('.'))
+        except AttributeError:
+            model_cls = model
+        return model_cls.objects.filter(
+            survey_schedule=survey_schedule.field_value).annotate(
+                snapshot_clone_updated=clone_updated_expression()).order_by(
+                    'internal_identifier', 'pk').values_list(
+                        'internal_identifier', 'household_structure__household',
+                        'age_in_years', 'gender', 'cloned', 'snapshot_clone_updated',
+                        'survival_status')
+
+    @classmethod
+    def write(cls, survey_schedule=None, directory=None, model=None, chunk_size=None):
+        """Writes the snapshot and returns its path.
+
+        Rows are streamed into a memory-mapped file, `chunk_size`
+        rows at a time, so memory does not grow with the number of
+        members.
+        """
+        numpy = import_numpy()
+        chunk_size = chunk_size or cls.chunk_size
+        members = cls.members(survey_schedule=survey_schedule, model=model)
+        count = members.count()
+        os.makedirs(directory, exist_ok=True)
+        path = cls.get_path(survey_schedule, directory)
+        tmp_path = '{}.tmp'.format(path)
+        array = numpy.lib.format.open_memmap(
+            tmp_path, mode='w+', dtype=cls.dtype(), shape=(count, ))
+        index = 0
+        rows = []
+        for row in members[:count].iterator():
+            rows.append(cls.to_row(row))
+            if len(rows) == chunk_size:
+                array[index:index + len(rows)] = rows
+                index += len(rows)
+                rows = []
+        if rows:
+            array[index:index + len(rows)] = rows
+            index += len(rows)
+        array.flush()
+        del array
+        if index != count:
+            os.remove(tmp_path)
+            raise ValueError(
+                'Members changed while writing snapshot for {}. Expected {}, '
+                'got {}.'.format(survey_schedule.field_value, count, index))
+        os.replace(tmp_path, path)
+        return path
+
+    @staticmethod
+    def to_row(row):
+        (internal_identifier, household, age_in_years, gender, cloned,
+         clone_updated, survival_status) = row
+        return (
+            internal_identifier.hex.encode('ascii'),
+            str(household).encode('ascii'),
+            -1 if age_in_years is None else age_in_years,
+            (gender or '').encode('ascii'),
+            bool(cloned),
+            bool(clone_updated),
+            (survival_status or '').encode('ascii'))
+
+    @classmethod
+    def load(cls, survey_schedule=None, directory=None):
+        """Returns the snapshot with its array memory-mapped read-only.
+        """
+        numpy = import_numpy()
+        path = cls.get_path(survey_schedule, directory)
+        array = numpy.load(path, mmap_mode='r')
+        if array.dtype != cls.dtype():
+            raise ValueError('Unexpected snapshot columns in {}. Got {}.'.format(
+                path, array.dtype))
+        return cls(array=array, survey_schedule=survey_schedule, path=path)
+
+    def join(self, other):
+        """Returns a tuple of (internal_identifiers, indices in self,
+        indices in other) for members in both snapshots.
+
+        Index the snapshots with the returned indices to compare
+        columns, e.g. `other['age_in_years'][j] - self['age_in_years'][i]`.
+        """
+        numpy = import_numpy()
+        return numpy.intersect1d(
+            self.array['internal_identifier'], other.array['internal_identifier'],
+            return_indices=True)
@@ -0,0 +1,202 @@
+import random
+
+from uuid import UUID
+
+from dateutil.relativedelta import relativedelta
+from django.apps import apps as django_apps
+from django.db import transaction
+from edc_constants.constants import ALIVE, FEMALE, MALE
+from edc_registration.models import RegisteredSubject
+from survey.site_surveys import site_surveys
+
+from .constants import HEAD_OF_HOUSEHOLD
+
+FIRST_NAMES = {
+    FEMALE: ['ALICE', 'BONANG', 'DIKELEDI', 'GRACE', 'KEFILWE', 'LESEGO',
+             'MPHO', 'NALEDI', 'ONALENNA', 'TSHIDI'],
+    MALE: ['BOITUMELO', 'DAVID', 'ERWIN', 'KAGISO', 'KATLEGO', 'MOSES',
+           'NEO', 'OARABILE', 'PETER', 'THABO']}
+
+RELATIONS = ['spouse', 'son', 'daughter', 'cousin', 'grandparent', 'niece', 'nephew']
+
+# household size: weight
+HOUSEHOLD_SIZES = {1: 10, 2: 15, 3: 20, 4: 20, 5: 15, 6: 10, 7: 5, 8: 3, 10: 2}
+
+
+class SyntheticPopulation:
+
+    """Generates households, household_structures, members and
+    RegisteredSubjects in bulk for benchmarks and tests.
+
+    Output is determined by `seed`: generating twice with the same
+    options creates the same pks, identifiers, names and ages.
+
+        * households: number of households.
+        * seed: random seed. Default: 0.
+        * household_sizes: a dictionary of {size: weight}.
+          Default: HOUSEHOLD_SIZES.
+        * survey_schedules: survey_schedule objects, in order, to
+          create household_structures for. Default: all loaded.
+        * rounds: number of survey_schedules, from the first, in
+          which members are enumerated. Later household_structures
+          are left empty to be cloned into. Default: 1.
+        * absence_rate: probability that a household's members were
+          not enumerated in a round (a skipped round). Default: 0.
+        * dob_rate: probability that a RegisteredSubject has a dob.
+          Default: 0.5.
+        * batch_size: households per transaction. Default: 1000.
+
+    For example:
+
+        counts = SyntheticPopulation(households=100000, seed=1).generate()
+
+    Models other than the test models may require more fields;
+    override `household_options` and `member_options`.
+    """
+
+    model = 'member.householdmember'
+    batch_size = 1000
+    user_created = 'synthetic'
+
+    def __init__(self, households=None, seed=None, household_sizes=None,
+                 survey_schedules=None, rounds=None, absence_rate=None,
+                 dob_rate=None, batch_size=None, model=None):
+        self.model = model or self.model
+        self.households = households or 0
+        self.seed = seed or 0
+        self.household_sizes = household_sizes or HOUSEHOLD_SIZES
+        self.survey_schedules = survey_schedules or site_surveys.get_survey_schedules()
+        self.rounds = 1 if rounds is None else rounds
+        self.absence_rate = absence_rate or 0
+        self.dob_rate = 0.5 if dob_rate is None else dob_rate
+        self.batch_size = batch_size or self.batch_size
+        self.rng = random.Random(self.seed)
+
+    def __repr__(self):
+        return '{}(households={}, seed={})'.format(
+            self.__class__.__name__, self.households, self.seed)
+
+    @property
+    def model_cls(self):
+        try:
+            return django_apps.get_model(*self.model.split('.'))
+        except AttributeError:
+            return self.model
+
+    @property
+    def household_structure_model_cls(self):
+        return self.model_cls._meta.get_field('household_structure').related_model
+
+    @property
+    def household_model_cls(self):
+        return self.household_structure_model_cls._meta.get_field(
+            'household').related_model
+
+    def uuid(self):
+        return UUID(int=self.rng.getrandbits(128), version=4)
+
+    def household_options(self, index):
+        return dict(household_identifier='S{:09d}'.format(index))
+
+    def member_options(self, person, survey_schedule):
+        return {}
+
+    def people(self):
+        """Returns a list of dictionaries, one per person in a
+        new household, each with the person's age on the first
+        survey_schedule.
+        """
+        sizes = sorted(self.household_sizes)
+        size = self.rng.choices(sizes, weights=[self.household_sizes[s] for s in sizes])[0]
+        people = []
+        for index in range(0, size):
+            gender = self.rng.choice([FEMALE, MALE])
+            first_name = self.rng.choice(FIRST_NAMES[gender])
+            last_initial = self.rng.choice('ABCDEFGHIJKLMNOPRSTW')
+            people.append(dict(
+                internal_identifier=self.uuid(),
+                gender=gender,
+                first_name=first_name,
+                initials=first_name[0] + last_initial,
+                age_in_years=self.rng.randint(18, 70) if index == 0 else self.rng.randint(0, 80),
+                relation=HEAD_OF_HOUSEHOLD if index == 0 else self.rng.choice(RELATIONS),
+                has_dob=self.rng.random() < self.dob_rate))
+        return people
+
+    def generate_batch(self, start, stop):
+        """Generates households `start` to `stop` and returns a
+        dictionary of counts.
+        """
+        first = self.survey_schedules[0]
+        households, household_structures, members, registered_subjects = [], [], [], []
+        for index in range(start, stop):
+            household = self.household_model_cls(
+                pk=self.uuid(), **self.household_options(index))
+            households.append(household)
+            people = self.people()
+            for person in people:
+                dob = None
+                if person['has_dob']:
+                    dob = (first.start - relativedelta(
+                        years=person['age_in_years'],
+                        days=self.rng.randint(0, 364))).date()
+                registered_subjects.append(RegisteredSubject(
+                    pk=self.uuid(),
+                    subject_identifier=person['internal_identifier'].hex,
+                    registration_identifier=person['internal_identifier'].hex,
+                    dob=dob,
+                    user_created=self.user_created))
+            enumerated = False
+            for round_index, survey_schedule in enumerate(self.survey_schedules):
+                household_structure = self.household_structure_model_cls(
+                    pk=self.uuid(),
+                    household=household,
+                    survey_schedule=survey_schedule.field_value,
+                    user_created=self.user_created)
+                household_structures.append(household_structure)
+                if round_index >= self.rounds or self.rng.random() < self.absence_rate:
+                    continue
+                years = relativedelta(survey_schedule.start, first.start).years
+                for person in people:
+                    options = dict(
+                        pk=self.uuid(),
+                        household_structure=household_structure,
+                        survey_schedule=survey_schedule.field_value,
+                        report_datetime=survey_schedule.start,
+                        internal_identifier=person['internal_identifier'],
+                        first_name=person['first_name'],
+                        initials=person['initials'],
+                        gender=person['gender'],
+                        age_in_years=person['age_in_years'] + years,
+                        relation=(None if enumerated and person['relation'] == HEAD_OF_HOUSEHOLD
+                                  else person['relation']),
+                        survival_status=ALIVE,
+                        cloned=enumerated,
+                        cloned_datetime=survey_schedule.start if enumerated else None,
+                        user_created=self.user_created)
+                    options.update(self.member_options(person, survey_schedule))
+                    members.append(self.model_cls(**options))
+                enumerated = True
+        with transaction.atomic():
+            self.household_model_cls.objects.bulk_create(households)
+            self.household_structure_model_cls.objects.bulk_create(household_structures)
+            RegisteredSubject.objects.bulk_create(registered_subjects)
+            self.model_cls.objects.bulk_create(members)
+        return dict(
+            households=len(households),
+            household_structures=len(household_structures),
+            members=len(members),
+            registered_subjects=len(registered_subjects))
+
+    def generate(self):
+        """Generates the population and returns a dictionary of counts.
+        """
+        self.rng.seed(self.seed)
+        counts = dict(households=0, household_structures=0, members=0,
+                      registered_subjects=0)
+        for start in range(0, self.households, self.batch_size):
+            batch = self.generate_batch(
+                start, min(start + self.batch_size, self.households))
+            for key, value in batch.items():
+                counts[key] += value
+        return counts
@@ -0,0 +1,61 @@
+from faker import Faker
+from uuid import uuid4
+from model_mommy import mommy
+
+from edc_registration.models import RegisteredSubject
+from survey.site_surveys import site_surveys
+from survey.tests import SurveyTestHelper
+from survey.tests.surveys import survey_one
+
+from .models import HouseholdStructure, Household
+
+fake = Faker()
+
+
+class CloneTestMixin:
+
+    """Creates households with a household_structure in each
+    survey_schedule and members, each with a RegisteredSubject, in
+    survey_one.
+    """
+
+    survey_helper = SurveyTestHelper()
+
+    def make_household(self, members=None):
+        """Returns a new household.
+
+            * members: number of members in survey_one or a list of
+              dictionaries of options, one per member, see
+              `make_member`. Default: 0.
+        """
+        household = Household.objects.create()
+        for survey_schedule in site_surveys.get_survey_schedules():
+            HouseholdStructure.objects.create(
+                household=household,
+                survey_schedule=survey_schedule)
+        if isinstance(members, int):
+            members = [{}] * members
+        if members:
+            household_structure = HouseholdStructure.objects.get(
+                household=household, survey_schedule=survey_one.field_value)
+            for options in members:
+                self.make_member(household_structure, **options)
+        return household
+
+    def make_member(self, household_structure, dob=None, **options):
+        """Returns a new member of `household_structure` and creates
+        its RegisteredSubject with `dob`.
+
+        Other options are passed to the householdmember recipe.
+        """
+        internal_identifier = uuid4().hex
+        RegisteredSubject.objects.create(
+            subject_identifier=fake.credit_card_number(),
+            registration_identifier=internal_identifier,
+            dob=dob)
+        return mommy.make_recipe(
+            'member_clone.tests.householdmember',
+            household_structure=household_structure,
+            internal_identifier=internal_identifier,
+            report_datetime=survey_one.start,
+            **options)
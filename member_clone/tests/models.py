@@ -6,6 +6,7 @@ from edc_base.utils import get_utcnow
 from survey.iterators import SurveyScheduleIterator
 from survey.model_mixins import SurveyScheduleModelMixin
 
+from ..managers import CloneManager
 from ..model_mixins import CloneModelMixin, NextMemberModelMixin
 
 
@@ -57,9 +58,26 @@ class HouseholdMember(SurveyScheduleModelMixin, CloneModelMixin,
 
     relation = models.CharField(max_length=25, null=True)
 
+    objects = CloneManager()
+
     def __repr__(self):
         return f'{self.__class__.__name__}({self.survey_schedule})'
 
     def save(self, *args, **kwargs):
         self.survey_schedule = self.household_structure.survey_schedule
         super().save(*args, **kwargs)
+
+    class Meta:
+        index_together = (
+            ('survey_schedule', 'cloned', 'household_structure',
+             'personal_details_changed'),
+            ('internal_identifier', 'survey_schedule'), )
+
+
+class MemberDetail(BaseUuidModel):
+
+    household_member = models.ForeignKey(HouseholdMember)
+
+    detail = models.CharField(max_length=25)
+
+    status = models.CharField(max_length=25, null=True)
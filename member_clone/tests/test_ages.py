@@ -0,0 +1,71 @@
+from dateutil.relativedelta import relativedelta
+from django.test import TestCase, tag
+
+from edc_registration.models import RegisteredSubject
+from survey.tests.surveys import survey_one, survey_two
+
+from ..ages import CloneAgeRefresh
+from ..runner import CloneRunner
+from .models import HouseholdMember
+from .mixins import CloneTestMixin
+
+
+@tag('ages')
+class TestCloneAgeRefresh(CloneTestMixin, TestCase):
+
+    def setUp(self):
+        self.survey_helper.load_test_surveys(load_all=True)
+        for _ in range(0, 2):
+            self.make_household(members=[dict(age_in_years=30)] * 3)
+        CloneRunner(
+            survey_schedule=survey_two,
+            report_datetime=survey_two.start,
+            model='member_clone.householdmember').run()
+
+    def refresh(self, **kwargs):
+        return CloneAgeRefresh(
+            survey_schedule=survey_two,
+            model='member_clone.householdmember', **kwargs).refresh()
+
+    def test_refresh_unchanged(self):
+        self.assertEqual(self.refresh(), dict(updated=0, unchanged=6, skipped=0))
+
+    def test_refresh_after_report_datetime_changed(self):
+        HouseholdMember.objects.filter(
+            survey_schedule=survey_two.field_value).update(
+                report_datetime=survey_two.start + relativedelta(years=3))
+        self.assertEqual(
+            self.refresh(chunk_size=4), dict(updated=6, unchanged=0, skipped=0))
+        for member in HouseholdMember.objects.filter(
+                survey_schedule=survey_two.field_value):
+            source = HouseholdMember.objects.get(
+                survey_schedule=survey_one.field_value,
+                internal_identifier=member.internal_identifier)
+            born = source.report_datetime - relativedelta(years=source.age_in_years)
+            self.assertEqual(
+                member.age_in_years,
+                relativedelta(member.report_datetime, born).years)
+
+    def test_refresh_uses_dob(self):
+        member = HouseholdMember.objects.filter(
+            survey_schedule=survey_two.field_value).first()
+        RegisteredSubject.objects.filter(
+            registration_identifier=member.internal_identifier.hex).update(
+                dob=(member.report_datetime - relativedelta(years=50)).date())
+        self.assertEqual(self.refresh(), dict(updated=1, unchanged=5, skipped=0))
+        member.refresh_from_db()
+        self.assertEqual(member.age_in_years, 50)
+
+    def test_refresh_skips_without_dob_or_source(self):
+        member = HouseholdMember.objects.filter(
+            survey_schedule=survey_two.field_value).first()
+        HouseholdMember.objects.filter(
+            survey_schedule=survey_one.field_value,
+            internal_identifier=member.internal_identifier).delete()
+        self.assertEqual(self.refresh(), dict(updated=0, unchanged=5, skipped=1))
+
+    def test_refresh_ignores_members_not_cloned(self):
+        HouseholdMember.objects.filter(
+            survey_schedule=survey_two.field_value).update(
+                cloned=False, age_in_years=99)
+        self.assertEqual(self.refresh(), dict(updated=0, unchanged=0, skipped=0))
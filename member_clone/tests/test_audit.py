@@ -0,0 +1,147 @@
+import io
+
+from datetime import date
+from dateutil.relativedelta import relativedelta
+from unittest import skipUnless
+from django.test import TestCase, tag
+from edc_constants.constants import ALIVE, YES
+
+from edc_registration.models import RegisteredSubject
+from survey.tests.surveys import survey_one, survey_two
+
+from ..audit import CloneAudit
+from ..constants import HEAD_OF_HOUSEHOLD
+from ..runner import CloneRunner
+from .models import HouseholdMember
+from .mixins import CloneTestMixin
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+@tag('audit')
+@skipUnless(numpy, 'numpy is not installed')
+class TestCloneAudit(CloneTestMixin, TestCase):
+
+    def setUp(self):
+        self.survey_helper.load_test_surveys(load_all=True)
+        for _ in range(0, 3):
+            self.make_household(members=[
+                dict(relation=HEAD_OF_HOUSEHOLD, survival_status=ALIVE, age_in_years=30,
+                     dob=(survey_one.start - relativedelta(years=40)).date()),
+                dict(relation='cousin', survival_status=None, age_in_years=31,
+                     dob=(survey_one.start - relativedelta(years=40, days=1)).date())])
+        CloneRunner(
+            survey_schedule=survey_two,
+            report_datetime=survey_two.start,
+            model='member_clone.householdmember').run()
+
+    def audit(self, **kwargs):
+        audit = CloneAudit(
+            survey_schedule=survey_two, model='member_clone.householdmember', **kwargs)
+        return audit, list(audit.discrepancies())
+
+    def cloned_member(self):
+        return HouseholdMember.objects.filter(
+            survey_schedule=survey_two.field_value).order_by('pk').first()
+
+    def test_no_discrepancies(self):
+        audit, discrepancies = self.audit()
+        self.assertEqual(discrepancies, [])
+        self.assertEqual(audit.summary, dict(audited=6, discrepancies=0, missing_source=0))
+
+    def test_no_discrepancies_without_dob(self):
+        RegisteredSubject.objects.update(dob=None)
+        HouseholdMember.objects.filter(survey_schedule=survey_two.field_value).delete()
+        CloneRunner(
+            survey_schedule=survey_two,
+            report_datetime=survey_two.start + relativedelta(days=3),
+            model='member_clone.householdmember').run()
+        self.assertEqual(self.audit()[1], [])
+
+    def test_copied_field(self):
+        member = self.cloned_member()
+        HouseholdMember.objects.filter(pk=member.pk).update(first_name='CHANGED')
+        audit, discrepancies = self.audit()
+        self.assertEqual(len(discrepancies), 1)
+        self.assertEqual(discrepancies[0]['field'], 'first_name')
+        self.assertEqual(discrepancies[0]['actual'], 'CHANGED')
+        self.assertEqual(discrepancies[0]['pk'], str(member.pk))
+
+    def test_updated_members_excluded(self):
+        member = self.cloned_member()
+        HouseholdMember.objects.filter(pk=member.pk).update(
+            first_name='CHANGED', personal_details_changed=YES)
+        self.assertEqual(self.audit()[1], [])
+        self.assertEqual(len(self.audit(include_updated=True)[1]), 1)
+
+    def test_relation_and_survival_status(self):
+        HouseholdMember.objects.filter(
+            survey_schedule=survey_two.field_value, relation__isnull=True).update(
+                relation=HEAD_OF_HOUSEHOLD)
+        HouseholdMember.objects.filter(
+            survey_schedule=survey_two.field_value, relation='cousin').update(
+                survival_status=None)
+        discrepancies = self.audit()[1]
+        self.assertEqual(
+            sorted(d['field'] for d in discrepancies),
+            ['relation'] * 3 + ['survival_status'] * 3)
+        self.assertTrue(all(d['expected'] == ALIVE for d in discrepancies
+                            if d['field'] == 'survival_status'))
+
+    def test_age(self):
+        member = self.cloned_member()
+        HouseholdMember.objects.filter(pk=member.pk).update(
+            age_in_years=member.age_in_years + 1)
+        discrepancies = self.audit()[1]
+        self.assertEqual(len(discrepancies), 1)
+        self.assertEqual(discrepancies[0]['field'], 'age_in_years')
+        self.assertEqual(discrepancies[0]['expected'], member.age_in_years)
+
+    def test_missing_source(self):
+        member = self.cloned_member()
+        HouseholdMember.objects.filter(
+            survey_schedule=survey_one.field_value,
+            internal_identifier=member.internal_identifier).delete()
+        audit, discrepancies = self.audit()
+        self.assertEqual(len(discrepancies), 1)
+        self.assertEqual(discrepancies[0]['field'], 'source')
+        self.assertEqual(audit.summary['missing_source'], 1)
+
+    def test_expected_ages_match_clone_age_in_years(self):
+        """Asserts the array age calculation matches the scalar one,
+        including month ends and leap days.
+        """
+        from ..model_mixins import clone_age_in_years
+        audit = CloneAudit(survey_schedule=survey_two)
+        dobs = [date(2000, 2, 29), date(2000, 2, 29), date(1990, 1, 31), None, None, None]
+        source_ages = [None, None, None, 30, 16, 41]
+        source_report_datetimes = [None, None, None] + [
+            survey_one.start.replace(year=2016, month=2, day=29),
+            survey_one.start.replace(year=2016, month=3, day=31),
+            survey_one.start.replace(year=2016, month=1, day=15)]
+        report_datetimes = [
+            survey_one.start.replace(year=2017, month=2, day=28),
+            survey_one.start.replace(year=2017, month=3, day=1),
+            survey_one.start.replace(year=2017, month=2, day=28),
+            survey_one.start.replace(year=2017, month=2, day=28),
+            survey_one.start.replace(year=2017, month=4, day=30),
+            survey_one.start.replace(year=2017, month=1, day=14)]
+        expected, _ = audit.expected_ages(
+            dobs, source_ages, source_report_datetimes, report_datetimes)
+        self.assertEqual(list(expected), [
+            clone_age_in_years(dob=dob, age_in_years=age_in_years,
+                               source_report_datetime=source_report_datetime,
+                               report_datetime=report_datetime)
+            for dob, age_in_years, source_report_datetime, report_datetime in zip(
+                dobs, source_ages, source_report_datetimes, report_datetimes)])
+
+    def test_write_csv(self):
+        HouseholdMember.objects.filter(pk=self.cloned_member().pk).update(gender='M')
+        f = io.StringIO()
+        summary = CloneAudit(
+            survey_schedule=survey_two, model='member_clone.householdmember').write_csv(f)
+        self.assertEqual(summary['discrepancies'], 1)
+        self.assertEqual(len(f.getvalue().splitlines()), 2)
@@ -0,0 +1,120 @@
+from dateutil.relativedelta import relativedelta
+from unittest.mock import patch
+from django.test import TestCase, tag
+
+from edc_registration.models import RegisteredSubject
+from survey.tests.surveys import survey_one, survey_two
+
+from ..bundle import CloneBundle, iter_bundles
+from ..clone import Clone, CloneMembersExistError
+from ..constants import HEAD_OF_HOUSEHOLD
+from ..model_mixins import CloneRegisteredSubjectError, CloneReportDatetimeError
+from .models import HouseholdMember, HouseholdStructure
+from .mixins import CloneTestMixin
+
+
+@tag('bundle')
+class TestCloneBundle(CloneTestMixin, TestCase):
+
+    def setUp(self):
+        self.survey_helper.load_test_surveys(load_all=True)
+        self.household = self.make_household(members=[
+            dict(relation=relation) for relation in [HEAD_OF_HOUSEHOLD, 'cousin', 'cousin']])
+        self.household_structure = HouseholdStructure.objects.get(
+            household=self.household, survey_schedule=survey_two.field_value)
+
+    def test_build(self):
+        bundle = CloneBundle.build(
+            household_structure=self.household_structure,
+            model='member_clone.householdmember')
+        self.assertEqual(len(bundle.members), 3)
+        self.assertEqual(
+            bundle.household_structure_id, str(self.household_structure.pk))
+
+    def test_build_without_registered_subject_raises(self):
+        RegisteredSubject.objects.all().delete()
+        self.assertRaises(
+            CloneRegisteredSubjectError,
+            CloneBundle.build,
+            household_structure=self.household_structure,
+            model='member_clone.householdmember')
+
+    def test_apply_matches_clone(self):
+        member = HouseholdMember.objects.first()
+        rs = RegisteredSubject.objects.get(
+            registration_identifier=member.internal_identifier.hex)
+        rs.dob = (survey_one.start - relativedelta(years=40)).date()
+        rs.save()
+        for compress in [False, True]:
+            data = CloneBundle.build(
+                household_structure=self.household_structure,
+                model='member_clone.householdmember').dumps(compress=compress)
+            members = CloneBundle.loads(data).apply(report_datetime=survey_two.start)
+            self.assertEqual(len(members), 3)
+            bundled = {
+                obj.internal_identifier: (obj.age_in_years, obj.relation,
+                                          obj.survival_status, obj.cloned)
+                for obj in HouseholdMember.objects.filter(
+                    household_structure=self.household_structure)}
+            HouseholdMember.objects.filter(
+                household_structure=self.household_structure).delete()
+            clone = Clone(household_structure=self.household_structure,
+                          report_datetime=survey_two.start,
+                          model='member_clone.householdmember')
+            cloned = {
+                obj.internal_identifier: (obj.age_in_years, obj.relation,
+                                          obj.survival_status, obj.cloned)
+                for obj in clone.members}
+            self.assertEqual(bundled, cloned)
+            self.assertIn(41, [value[0] for value in cloned.values()])
+            clone.members.delete()
+
+    def test_apply_clones_with_model_clone(self):
+        bundle = CloneBundle.build(
+            household_structure=self.household_structure,
+            model='member_clone.householdmember')
+        clone = HouseholdMember.clone
+        with patch.object(HouseholdMember, 'clone', autospec=True,
+                          side_effect=clone) as mock_clone:
+            bundle.apply(report_datetime=survey_two.start)
+        self.assertEqual(mock_clone.call_count, 3)
+
+    def test_apply_members_exist_raises(self):
+        bundle = CloneBundle.build(
+            household_structure=self.household_structure,
+            model='member_clone.householdmember')
+        bundle.apply(report_datetime=survey_two.start)
+        self.assertRaises(
+            CloneMembersExistError, bundle.apply, report_datetime=survey_two.start)
+
+    def test_apply_bad_report_datetime_raises(self):
+        bundle = CloneBundle.build(
+            household_structure=self.household_structure,
+            model='member_clone.householdmember')
+        self.assertRaises(
+            CloneReportDatetimeError, bundle.apply,
+            report_datetime=survey_two.start - relativedelta(days=1))
+        self.assertFalse(HouseholdMember.objects.filter(
+            household_structure=self.household_structure).exists())
+
+    def test_iter_bundles_skips_failed_households(self):
+        household = self.make_household(members=1)
+        household_structure = HouseholdStructure.objects.get(
+            household=household, survey_schedule=survey_two.field_value)
+        HouseholdStructure.objects.get(
+            household=self.household, survey_schedule=survey_one.field_value).delete()
+        errors = {}
+        bundles = dict(iter_bundles(
+            survey_schedule=survey_two, model='member_clone.householdmember',
+            errors=errors))
+        self.assertEqual(list(bundles), [household_structure.pk])
+        self.assertEqual(list(errors), [self.household_structure.pk])
+
+    def test_iter_bundles(self):
+        bundles = dict(iter_bundles(
+            survey_schedule=survey_two, model='member_clone.householdmember'))
+        self.assertEqual(list(bundles), [self.household_structure.pk])
+        CloneBundle.loads(bundles[self.household_structure.pk]).apply(
+            report_datetime=survey_two.start)
+        self.assertEqual(dict(iter_bundles(
+            survey_schedule=survey_two, model='member_clone.householdmember')), {})
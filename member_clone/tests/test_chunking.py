@@ -0,0 +1,141 @@
+from unittest.mock import patch
+from django.db import OperationalError
+from django.test import TestCase, tag
+
+from survey.tests.surveys import survey_two
+
+from ..chunking import AdaptiveChunkSize
+from ..constants import CLONED, FAILED
+from ..runner import CloneRunner
+from .models import HouseholdMember
+from .mixins import CloneTestMixin
+
+
+@tag('chunking')
+class TestAdaptiveChunkSize(TestCase):
+
+    def controller(self, **kwargs):
+        options = dict(chunk_size=100, min_chunk_size=10, max_chunk_size=400,
+                       target_seconds=1.0)
+        options.update(kwargs)
+        return AdaptiveChunkSize(**options)
+
+    def test_grows_when_fast(self):
+        controller = self.controller()
+        self.assertEqual(controller.record(100, seconds=0.1), 200)
+        self.assertEqual(controller.record(200, seconds=0.1), 400)
+        self.assertEqual(controller.record(400, seconds=0.1), 400)
+        self.assertEqual(len(controller.adjustments), 2)
+
+    def test_shrinks_when_slow(self):
+        controller = self.controller()
+        self.assertEqual(controller.record(100, seconds=4.0), 25)
+        self.assertEqual(controller.record(25, seconds=100.0), 10)
+
+    def test_unchanged_near_target(self):
+        controller = self.controller()
+        self.assertEqual(controller.record(100, seconds=1.2), 100)
+        self.assertEqual(controller.adjustments, [])
+
+    def test_halves_on_error(self):
+        controller = self.controller()
+        self.assertEqual(
+            controller.record(100, error=OperationalError('lock wait timeout')), 50)
+        self.assertEqual(controller.error_rate, 1)
+
+    def test_does_not_grow_after_recent_error(self):
+        controller = self.controller(window=3)
+        controller.record(100, error=OperationalError())
+        self.assertEqual(controller.record(50, seconds=0.1), 50)
+        controller.record(50, seconds=0.1)
+        controller.record(50, seconds=0.1)
+        self.assertEqual(controller.record(50, seconds=0.1), 100)
+
+    def test_does_not_grow_on_short_last_chunk(self):
+        controller = self.controller()
+        self.assertEqual(controller.record(3, seconds=0.01), 100)
+
+    def test_logs_adjustments(self):
+        controller = self.controller()
+        with self.assertLogs('member_clone.chunking', level='INFO') as logs:
+            controller.record(100, seconds=0.1)
+        self.assertIn('100 -> 200', logs.output[0])
+
+
+@tag('chunking')
+class TestAdaptiveCloneRunner(CloneTestMixin, TestCase):
+
+    def setUp(self):
+        self.survey_helper.load_test_surveys(load_all=True)
+        for _ in range(0, 8):
+            self.make_household(members=1)
+
+    def runner(self):
+        return CloneRunner(
+            survey_schedule=survey_two,
+            report_datetime=survey_two.start,
+            model='member_clone.householdmember',
+            chunk_size=4,
+            adaptive=True,
+            min_chunk_size=1,
+            max_chunk_size=8,
+            target_seconds=60)
+
+    def test_adaptive_grows(self):
+        runner = self.runner()
+        counts = runner.run()
+        self.assertEqual(counts[CLONED], 8)
+        self.assertEqual(runner.chunk_size, 8)
+        self.assertEqual(runner.clone_run.cloned, 8)
+
+    def test_adaptive_retries_smaller_chunk_on_transient_error(self):
+        runner = self.runner()
+        run_chunk = runner.run_chunk
+        calls = []
+
+        def flaky_run_chunk(chunk):
+            calls.append(len(chunk))
+            if len(calls) == 1:
+                raise OperationalError('database is locked')
+            return run_chunk(chunk)
+
+        with patch.object(runner, 'run_chunk', side_effect=flaky_run_chunk):
+            counts = runner.run()
+        self.assertEqual(calls[:2], [4, 2])
+        self.assertEqual(counts[CLONED], 8)
+        self.assertEqual(HouseholdMember.objects.filter(
+            survey_schedule=survey_two.field_value).count(), 8)
+
+    def test_adaptive_retry_after_checkpoint_error(self):
+        """Asserts a household whose checkpoint transaction is rolled
+        back is cloned again on retry and not counted twice.
+        """
+        runner = self.runner()
+        save_checkpoint = CloneRunner.save_checkpoint
+        calls = []
+
+        def flaky_save_checkpoint(runner, last_household_id=None):
+            calls.append(last_household_id)
+            save_checkpoint(runner, last_household_id=last_household_id)
+            if len(calls) == 2:
+                raise OperationalError('database is locked')
+
+        with patch.object(CloneRunner, 'save_checkpoint', autospec=True,
+                          side_effect=flaky_save_checkpoint):
+            counts = runner.run()
+        self.assertEqual(calls[1], calls[2])
+        self.assertEqual(counts[CLONED], 8)
+        self.assertEqual(runner.members_count, 8)
+        runner.clone_run.refresh_from_db()
+        self.assertEqual(runner.clone_run.cloned, 8)
+        self.assertEqual(runner.clone_run.members_count, 8)
+        self.assertEqual(HouseholdMember.objects.filter(
+            survey_schedule=survey_two.field_value).count(), 8)
+
+    def test_adaptive_raises_after_max_retries(self):
+        runner = self.runner()
+        with patch.object(runner, 'run_chunk',
+                          side_effect=OperationalError('database is locked')):
+            self.assertRaises(OperationalError, runner.run)
+        runner.clone_run.refresh_from_db()
+        self.assertEqual(runner.clone_run.status, FAILED)
@@ -1,6 +1,8 @@
 from faker import Faker
 from dateutil.relativedelta import relativedelta
+from unittest.mock import patch
 from uuid import uuid4
+from django.db.models.query import QuerySet
 from django.test import TestCase, tag
 from model_mommy import mommy
 
@@ -356,3 +358,35 @@ class TestCloneMembers(TestCase):
             survey_schedule=survey_one.field_value)
         household_member = household_structure.householdmember_set.all().first()
         self.assertIsNotNone(household_member.internal_identifier)
+
+    def test_clone_locks_household_structure(self):
+        next_household_structure = self.first_household_structure.next
+        select_for_update = QuerySet.select_for_update
+        with patch.object(QuerySet, 'select_for_update', autospec=True,
+                          side_effect=select_for_update) as mock_lock:
+            Clone(
+                household_structure=next_household_structure,
+                report_datetime=next_household_structure.survey_schedule_object.start,
+                model='member_clone.householdmember')
+        self.assertEqual(mock_lock.call_count, 1)
+
+    def test_clone_does_not_lock_if_not_create(self):
+        next_household_structure = self.first_household_structure.next
+        with patch.object(QuerySet, 'select_for_update') as mock_lock:
+            Clone(
+                household_structure=next_household_structure,
+                report_datetime=next_household_structure.survey_schedule_object.start,
+                model='member_clone.householdmember',
+                create=False)
+        mock_lock.assert_not_called()
+
+    def test_safe_to_clone_with_household_structure(self):
+        next_household_structure = self.first_household_structure.next
+        clone = Clone(
+            household_structure=next_household_structure,
+            report_datetime=next_household_structure.survey_schedule_object.start,
+            model='member_clone.householdmember')
+        self.assertRaises(
+            CloneMembersExistError,
+            clone.safe_to_clone_or_raise,
+            household_structure=next_household_structure)
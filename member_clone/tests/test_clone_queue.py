@@ -0,0 +1,256 @@
+from datetime import timedelta
+from dateutil.relativedelta import relativedelta
+from unittest.mock import patch
+from django.db import OperationalError
+from django.test import TestCase, tag
+
+from edc_base.utils import get_utcnow
+from edc_registration.models import RegisteredSubject
+from survey.tests.surveys import survey_one, survey_two
+
+from ..clone import Clone, is_transient_error
+from ..clone_queue import CloneQueue, CloneQueueWorker, connect_clone_queue
+from ..constants import QUEUED, RUNNING, DONE, FAILED, CLONED, SKIPPED
+from ..models import CloneJob
+from ..signals import household_structure_visited
+from .models import HouseholdMember, HouseholdStructure
+from .mixins import CloneTestMixin
+
+
+@tag('queue')
+class TestCloneQueue(CloneTestMixin, TestCase):
+
+    def setUp(self):
+        self.survey_helper.load_test_surveys(load_all=True)
+        for _ in range(0, 2):
+            self.make_household(members=2)
+        self.queue = CloneQueue(model='member_clone.householdmember')
+        self.household_structures = HouseholdStructure.objects.filter(
+            survey_schedule=survey_two.field_value)
+
+    def enqueue_all(self):
+        for household_structure in self.household_structures:
+            self.queue.enqueue(
+                household_structure=household_structure,
+                report_datetime=survey_two.start)
+
+    def test_enqueue(self):
+        household_structure = self.household_structures[0]
+        job, created = self.queue.enqueue(
+            household_structure=household_structure,
+            report_datetime=survey_two.start)
+        self.assertTrue(created)
+        self.assertEqual(job.status, QUEUED)
+        self.assertEqual(
+            self.queue.get_job(household_structure=household_structure), job)
+        self.assertEqual(HouseholdMember.objects.filter(
+            survey_schedule=survey_two.field_value).count(), 0)
+
+    def test_enqueue_dedups(self):
+        household_structure = self.household_structures[0]
+        job, _ = self.queue.enqueue(
+            household_structure=household_structure,
+            report_datetime=survey_two.start)
+        job2, created = self.queue.enqueue(
+            household_structure=household_structure,
+            report_datetime=survey_two.start)
+        self.assertFalse(created)
+        self.assertEqual(job.pk, job2.pk)
+        self.assertEqual(CloneJob.objects.all().count(), 1)
+
+    def visit(self, household_structure, report_datetime):
+        household_structure_visited.send(
+            sender=HouseholdStructure,
+            household_structure=household_structure,
+            report_datetime=report_datetime)
+
+    def test_connect_clone_queue(self):
+        receiver = connect_clone_queue(queue=self.queue)
+        try:
+            household_structure = self.household_structures[0]
+            self.visit(household_structure, survey_two.start)
+            self.visit(HouseholdStructure.objects.get(
+                household=household_structure.household,
+                survey_schedule=survey_one.field_value), survey_one.start)
+        finally:
+            household_structure_visited.disconnect(
+                sender=HouseholdStructure, dispatch_uid=receiver.dispatch_uid)
+        self.assertEqual(CloneJob.objects.all().count(), 1)
+        self.assertEqual(
+            self.queue.get_job(household_structure=household_structure).status, QUEUED)
+
+    def test_connect_clone_queue_not_enqueued_on_create(self):
+        """Asserts creating all of a household's structures at once
+        enqueues nothing to lease before the visit.
+        """
+        receiver = connect_clone_queue(queue=self.queue)
+        try:
+            household = self.make_household()
+            self.assertIsNone(self.queue.lease(leased_by='worker1'))
+            household_structure = HouseholdStructure.objects.get(
+                household=household, survey_schedule=survey_two.field_value)
+            self.visit(household_structure, survey_two.start)
+        finally:
+            household_structure_visited.disconnect(
+                sender=HouseholdStructure, dispatch_uid=receiver.dispatch_uid)
+        job = self.queue.lease(leased_by='worker1')
+        self.assertEqual(job.household_structure_pk, str(household_structure.pk))
+        self.assertEqual(job.report_datetime, survey_two.start)
+
+    def test_connect_clone_queue_skips_visit_outside_window(self):
+        receiver = connect_clone_queue(queue=self.queue)
+        try:
+            self.visit(
+                self.household_structures[0],
+                survey_two.start - relativedelta(days=1))
+        finally:
+            household_structure_visited.disconnect(
+                sender=HouseholdStructure, dispatch_uid=receiver.dispatch_uid)
+        self.assertEqual(CloneJob.objects.all().count(), 0)
+
+    def test_drain(self):
+        self.enqueue_all()
+        worker = CloneQueueWorker(queue=self.queue)
+        self.assertEqual(worker.drain(), 2)
+        self.assertEqual(
+            self.queue.counts(), {QUEUED: 0, RUNNING: 0, DONE: 2, FAILED: 0})
+        for job in CloneJob.objects.all():
+            self.assertEqual(job.result, CLONED)
+            self.assertEqual(job.members_count, 2)
+        self.assertEqual(HouseholdMember.objects.filter(
+            survey_schedule=survey_two.field_value).count(), 4)
+
+    def test_drain_skips_households_with_members(self):
+        household_structure = self.household_structures[0]
+        Clone(household_structure=household_structure,
+              report_datetime=survey_two.start,
+              model='member_clone.householdmember')
+        self.queue.enqueue(
+            household_structure=household_structure,
+            report_datetime=survey_two.start)
+        CloneQueueWorker(queue=self.queue).drain()
+        job = self.queue.get_job(household_structure=household_structure)
+        self.assertEqual(job.status, DONE)
+        self.assertEqual(job.result, SKIPPED)
+
+    def test_lease(self):
+        self.enqueue_all()
+        job1 = self.queue.lease(leased_by='worker1')
+        job2 = self.queue.lease(leased_by='worker2')
+        self.assertNotEqual(job1.pk, job2.pk)
+        self.assertEqual(job1.status, RUNNING)
+        self.assertEqual(job1.attempts, 1)
+        self.assertIsNone(self.queue.lease(leased_by='worker3'))
+
+    def test_expired_lease_is_leased_again(self):
+        self.queue.enqueue(
+            household_structure=self.household_structures[0],
+            report_datetime=survey_two.start)
+        job = self.queue.lease(leased_by='worker1')
+        self.assertIsNone(self.queue.lease(leased_by='worker2'))
+        CloneJob.objects.filter(pk=job.pk).update(
+            lease_expires=get_utcnow() - timedelta(seconds=1))
+        job = self.queue.lease(leased_by='worker2')
+        self.assertEqual(job.leased_by, 'worker2')
+        self.assertEqual(job.attempts, 2)
+
+    def test_transient_error_is_retried(self):
+        self.enqueue_all()
+        worker = CloneQueueWorker(queue=self.queue)
+        with patch.object(CloneQueueWorker, 'clone_cls',
+                          side_effect=OperationalError('deadlock')):
+            job = worker.process_next()
+        job.refresh_from_db()
+        self.assertEqual(job.status, QUEUED)
+        self.assertGreater(job.available_datetime, get_utcnow())
+        self.assertIn('deadlock', job.last_error)
+
+    def test_transient_error_fails_after_max_attempts(self):
+        self.queue = CloneQueue(
+            model='member_clone.householdmember', max_attempts=1)
+        self.enqueue_all()
+        worker = CloneQueueWorker(queue=self.queue)
+        with patch.object(CloneQueueWorker, 'clone_cls',
+                          side_effect=OperationalError('deadlock')):
+            job = worker.process_next()
+        job.refresh_from_db()
+        self.assertEqual(job.status, FAILED)
+
+    def test_permanent_operational_error_is_not_retried(self):
+        self.enqueue_all()
+        worker = CloneQueueWorker(queue=self.queue)
+        with patch.object(CloneQueueWorker, 'clone_cls',
+                          side_effect=OperationalError('no such table: member_householdmember')):
+            job = worker.process_next()
+        job.refresh_from_db()
+        self.assertEqual(job.status, FAILED)
+        self.assertEqual(job.attempts, 1)
+
+    def test_is_transient_error(self):
+        class DriverError(Exception):
+            pgcode = None
+
+        for message in ['database is locked', 'Deadlock found when trying to get lock']:
+            self.assertTrue(is_transient_error(OperationalError(message)))
+        for message in ['no such table: x', 'password authentication failed']:
+            self.assertFalse(is_transient_error(OperationalError(message)))
+        self.assertFalse(is_transient_error(ValueError('deadlock')))
+        for cause, expected in [(DriverError(1213, 'Deadlock'), True),
+                                (DriverError(1146, "Table doesn't exist"), False)]:
+            error = OperationalError(*cause.args)
+            error.__cause__ = cause
+            self.assertEqual(is_transient_error(error), expected)
+        cause = DriverError('could not obtain lock')
+        cause.pgcode = '55P03'
+        error = OperationalError('could not obtain lock')
+        error.__cause__ = cause
+        self.assertTrue(is_transient_error(error))
+
+    def test_error_is_not_retried(self):
+        RegisteredSubject.objects.all().delete()
+        self.enqueue_all()
+        CloneQueueWorker(queue=self.queue).drain()
+        self.assertEqual(
+            self.queue.counts(), {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 2})
+
+    def test_done_job_without_members_is_queued_again(self):
+        household_structure = self.household_structures[0]
+        HouseholdMember.objects.filter(
+            household_structure__household=household_structure.household).delete()
+        self.queue.enqueue(
+            household_structure=household_structure,
+            report_datetime=survey_two.start)
+        CloneQueueWorker(queue=self.queue).drain()
+        job = self.queue.get_job(household_structure=household_structure)
+        self.assertEqual(job.status, DONE)
+        self.assertEqual(job.members_count, 0)
+        job, created = self.queue.enqueue(
+            household_structure=household_structure,
+            report_datetime=survey_two.start)
+        self.assertFalse(created)
+        self.assertEqual(job.status, QUEUED)
+
+    def test_done_job_with_members_is_not_queued_again(self):
+        household_structure = self.household_structures[0]
+        self.queue.enqueue(
+            household_structure=household_structure,
+            report_datetime=survey_two.start)
+        CloneQueueWorker(queue=self.queue).drain()
+        job, _ = self.queue.enqueue(
+            household_structure=household_structure,
+            report_datetime=survey_two.start)
+        self.assertEqual(job.status, DONE)
+
+    def test_failed_job_can_be_queued_again(self):
+        RegisteredSubject.objects.all().delete()
+        household_structure = self.household_structures[0]
+        self.queue.enqueue(
+            household_structure=household_structure,
+            report_datetime=survey_two.start)
+        CloneQueueWorker(queue=self.queue).drain()
+        job, created = self.queue.enqueue(
+            household_structure=household_structure,
+            report_datetime=survey_two.start)
+        self.assertFalse(created)
+        self.assertEqual(job.status, QUEUED)
+        self.assertEqual(job.attempts, 0)
@@ -0,0 +1,162 @@
+from io import StringIO
+from django.db import connection
+from django.test import TestCase, tag
+from django.test.utils import CaptureQueriesContext
+
+from survey.tests.surveys import survey_one, survey_two
+
+from ..bundle import CloneBundle
+from ..clone import Clone
+from ..clone_dependent import CloneDependent
+from ..movers import CloneMovers
+from ..plan import ClonePlan, ClonePlanLoader, read_jsonl
+from ..site_clone_dependents import SiteCloneDependents, AlreadyRegistered
+from .models import HouseholdMember, HouseholdStructure, Household, MemberDetail
+from .mixins import CloneTestMixin
+
+
+class ResetStatusDependent(CloneDependent):
+
+    def build(self, obj, member_pk):
+        new_obj = super().build(obj, member_pk)
+        new_obj.status = None
+        return new_obj
+
+
+class FailingDependent(CloneDependent):
+
+    def build(self, obj, member_pk):
+        raise ValueError('build failed')
+
+
+@tag('dependents')
+class TestCloneDependents(CloneTestMixin, TestCase):
+
+    def setUp(self):
+        self.survey_helper.load_test_surveys(load_all=True)
+        self.household = self.make_household()
+        household_structure = HouseholdStructure.objects.get(
+            household=self.household, survey_schedule=survey_one.field_value)
+        for _ in range(0, 3):
+            member = self.make_member(household_structure)
+            for detail in ['a', 'b']:
+                MemberDetail.objects.create(
+                    household_member=member, detail=detail, status='done')
+        self.household_structure = HouseholdStructure.objects.get(
+            household=self.household, survey_schedule=survey_two.field_value)
+        self.dependents = SiteCloneDependents()
+
+    def clone(self, **kwargs):
+        return Clone(
+            household_structure=self.household_structure,
+            report_datetime=survey_two.start,
+            model='member_clone.householdmember',
+            dependents=self.dependents,
+            **kwargs)
+
+    def test_register(self):
+        self.dependents.register(CloneDependent(model='member_clone.memberdetail'))
+        self.assertEqual(
+            self.dependents.get_dependents(HouseholdMember)[0].model_cls, MemberDetail)
+        self.assertEqual(self.dependents.get_dependents(Household), [])
+        self.assertRaises(
+            AlreadyRegistered,
+            self.dependents.register,
+            CloneDependent(model='member_clone.memberdetail'))
+
+    def test_clone_without_dependents(self):
+        clone = self.clone()
+        self.assertEqual(clone.dependents_counts, {})
+        self.assertEqual(MemberDetail.objects.all().count(), 6)
+
+    def test_clone_dependents(self):
+        self.dependents.register(CloneDependent(model='member_clone.memberdetail'))
+        for bulk in [False, True]:
+            HouseholdMember.objects.filter(
+                household_structure=self.household_structure).delete()
+            clone = self.clone(bulk=bulk)
+            self.assertEqual(clone.dependents_counts, {'member_clone.memberdetail': 6})
+            for member in clone.members:
+                source = HouseholdMember.objects.get(
+                    pk=clone.source_pks[member.internal_identifier])
+                self.assertEqual(
+                    sorted(member.memberdetail_set.values_list('detail', 'status')),
+                    sorted(source.memberdetail_set.values_list('detail', 'status')))
+
+    def test_clone_dependents_bulk_insert(self):
+        self.dependents.register(CloneDependent(model='member_clone.memberdetail'))
+        with CaptureQueriesContext(connection) as context:
+            self.clone(bulk=True)
+        inserts = [query for query in context.captured_queries
+                   if query['sql'].startswith('INSERT')
+                   and MemberDetail._meta.db_table in query['sql']]
+        self.assertEqual(len(inserts), 1)
+
+    def test_clone_dependents_build(self):
+        self.dependents.register(ResetStatusDependent(model='member_clone.memberdetail'))
+        self.clone()
+        self.assertEqual(MemberDetail.objects.filter(
+            household_member__survey_schedule=survey_two.field_value,
+            status__isnull=True).count(), 6)
+
+    def test_clone_dependents_rolls_back(self):
+        self.dependents.register(FailingDependent(model='member_clone.memberdetail'))
+        self.assertRaises(ValueError, self.clone)
+        self.assertEqual(HouseholdMember.objects.filter(
+            household_structure=self.household_structure).count(), 0)
+
+    def test_movers_clone_dependents(self):
+        self.dependents.register(CloneDependent(
+            model='member_clone.memberdetail', exclude_fields=['status']))
+        household = Household.objects.create()
+        household_structure = HouseholdStructure.objects.create(
+            household=household, survey_schedule=survey_two.field_value)
+        member = HouseholdMember.objects.filter(
+            survey_schedule=survey_one.field_value).first()
+        movers = CloneMovers(
+            internal_identifiers=[member.internal_identifier],
+            household_structure=household_structure,
+            report_datetime=survey_two.start,
+            model='member_clone.householdmember',
+            dependents=self.dependents)
+        self.assertEqual(movers.dependents_counts, {'member_clone.memberdetail': 2})
+        self.assertEqual(
+            sorted(movers.members[0].memberdetail_set.values_list('detail', 'status')),
+            [('a', None), ('b', None)])
+
+    def test_plan_loader_clone_dependents(self):
+        self.dependents.register(CloneDependent(model='member_clone.memberdetail'))
+        f = StringIO()
+        ClonePlan(
+            survey_schedule=survey_two,
+            report_datetime=survey_two.start,
+            model='member_clone.householdmember').write_jsonl(f)
+        f.seek(0)
+        ClonePlanLoader(
+            model='member_clone.householdmember', batch_size=2,
+            dependents=self.dependents).load(read_jsonl(f))
+        members = HouseholdMember.objects.filter(survey_schedule=survey_two.field_value)
+        self.assertEqual(members.count(), 3)
+        for member in members:
+            source = HouseholdMember.objects.get(
+                survey_schedule=survey_one.field_value,
+                internal_identifier=member.internal_identifier)
+            self.assertEqual(
+                sorted(member.memberdetail_set.values_list('detail', 'status')),
+                sorted(source.memberdetail_set.values_list('detail', 'status')))
+
+    def test_bundle_apply_clone_dependents(self):
+        self.dependents.register(CloneDependent(model='member_clone.memberdetail'))
+        data = CloneBundle.build(
+            household_structure=self.household_structure,
+            model='member_clone.householdmember').dumps(compress=True)
+        bundle = CloneBundle.loads(data)
+        members = bundle.apply(report_datetime=survey_two.start, dependents=self.dependents)
+        self.assertEqual(bundle.dependents_counts, {'member_clone.memberdetail': 6})
+        for member in members:
+            source = HouseholdMember.objects.get(
+                survey_schedule=survey_one.field_value,
+                internal_identifier=member.internal_identifier)
+            self.assertEqual(
+                sorted(member.memberdetail_set.values_list('detail', 'status')),
+                sorted(source.memberdetail_set.values_list('detail', 'status')))
@@ -0,0 +1,109 @@
+import csv
+import io
+
+from django.test import TestCase, tag
+from model_mommy import mommy
+
+from survey.tests.surveys import survey_one, survey_two
+
+from ..duplicates import DuplicateIdentityDetector, CloneDuplicateIdentityError
+from ..models import CloneRun
+from ..runner import CloneRunner
+from .models import HouseholdMember, HouseholdStructure
+from .mixins import CloneTestMixin
+
+
+@tag('duplicates')
+class TestDuplicateIdentityDetector(CloneTestMixin, TestCase):
+
+    def setUp(self):
+        self.survey_helper.load_test_surveys(load_all=True)
+        self.household_structures = []
+        for _ in range(0, 3):
+            household = self.make_household(members=2)
+            self.household_structures.append(HouseholdStructure.objects.get(
+                household=household, survey_schedule=survey_one.field_value))
+
+    def make_duplicate(self, household_structures):
+        member = HouseholdMember.objects.filter(
+            household_structure=self.household_structures[0]).first()
+        for household_structure in household_structures:
+            mommy.make_recipe(
+                'member_clone.tests.householdmember',
+                household_structure=household_structure,
+                internal_identifier=member.internal_identifier,
+                report_datetime=survey_one.start)
+        return member
+
+    def test_no_duplicates(self):
+        detector = DuplicateIdentityDetector(model='member_clone.householdmember')
+        self.assertEqual(list(detector.duplicates()), [])
+        self.assertEqual(detector.summary, dict(members=6, duplicates=0))
+        self.assertFalse(detector.exists())
+
+    def test_duplicates(self):
+        member = self.make_duplicate(self.household_structures[1:])
+        detector = DuplicateIdentityDetector(model='member_clone.householdmember')
+        duplicates = list(detector.duplicates())
+        self.assertEqual(len(duplicates), 1)
+        self.assertEqual(duplicates[0]['internal_identifier'], str(member.internal_identifier))
+        self.assertEqual(duplicates[0]['survey_schedule'], survey_one.field_value)
+        self.assertEqual(
+            sorted(duplicates[0]['households']),
+            sorted(str(obj.household.pk) for obj in self.household_structures))
+        self.assertEqual(detector.summary, dict(members=8, duplicates=1))
+
+    def test_same_household_is_not_duplicate(self):
+        self.make_duplicate(self.household_structures[:1])
+        detector = DuplicateIdentityDetector(model='member_clone.householdmember')
+        self.assertFalse(detector.exists())
+
+    def test_other_survey_schedule_is_not_duplicate(self):
+        household_structure = HouseholdStructure.objects.get(
+            household=self.household_structures[1].household,
+            survey_schedule=survey_two.field_value)
+        self.make_duplicate([household_structure])
+        detector = DuplicateIdentityDetector(model='member_clone.householdmember')
+        self.assertFalse(detector.exists())
+
+    def test_survey_schedules(self):
+        self.make_duplicate(self.household_structures[1:2])
+        self.assertFalse(DuplicateIdentityDetector(
+            survey_schedules=[survey_two],
+            model='member_clone.householdmember').exists())
+        self.assertTrue(DuplicateIdentityDetector(
+            survey_schedules=[survey_one],
+            model='member_clone.householdmember').exists())
+
+    def test_write_csv(self):
+        self.make_duplicate(self.household_structures[1:2])
+        f = io.StringIO()
+        summary = DuplicateIdentityDetector(
+            model='member_clone.householdmember').write_csv(f)
+        f.seek(0)
+        rows = list(csv.DictReader(f))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(len(rows[0]['households'].split()), 2)
+        self.assertEqual(summary['duplicates'], 1)
+
+    def test_runner_check_duplicates(self):
+        self.make_duplicate(self.household_structures[1:2])
+        runner = CloneRunner(
+            survey_schedule=survey_two,
+            report_datetime=survey_two.start,
+            model='member_clone.householdmember',
+            check_duplicates=True)
+        self.assertRaises(CloneDuplicateIdentityError, runner.run)
+        self.assertEqual(CloneRun.objects.all().count(), 0)
+        self.assertEqual(HouseholdMember.objects.filter(
+            survey_schedule=survey_two.field_value).count(), 0)
+
+    def test_runner_check_duplicates_passes(self):
+        counts = CloneRunner(
+            survey_schedule=survey_two,
+            report_datetime=survey_two.start,
+            model='member_clone.householdmember',
+            check_duplicates=True).run()
+        self.assertEqual(HouseholdMember.objects.filter(
+            survey_schedule=survey_two.field_value).count(), 6)
+        self.assertEqual(sum(counts.values()), 3)
@@ -0,0 +1,58 @@
+import os
+import subprocess
+import sys
+
+from django.test import SimpleTestCase, tag
+
+# modules only needed when cloning, imported on first use
+LAZY_MODULES = [
+    'arrow', 'asyncio', 'dateutil.relativedelta', 'edc_base.utils',
+    'edc_registration.models', 'survey.iterators']
+
+# cumulative import time budget for member_clone.model_mixins as a
+# fraction of that of django.db.models, which the mixins build on.
+# Relative, so it holds on slow and fast machines alike; importing the
+# RegisteredSubject model or arrow at import again exceeds it.
+IMPORT_TIME_BUDGET = 0.5
+
+# django.db.models is imported first so its time is not counted in
+# that of member_clone.model_mixins
+IMPORT_MODEL_MIXINS = (
+    'import django; from django.conf import settings; settings.configure(); '
+    'django.setup(); import django.db.models; import member_clone.model_mixins')
+
+
+@tag('imports')
+class TestImportTime(SimpleTestCase):
+
+    def importtime(self):
+        """Returns a dictionary of {module: cumulative import time in us}
+        for a fresh interpreter importing member_clone.model_mixins.
+        """
+        env = dict(os.environ)
+        env.pop('DJANGO_SETTINGS_MODULE', None)
+        env.update(PYTHONPATH=os.pathsep.join(path for path in sys.path if path))
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', IMPORT_MODEL_MIXINS],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env,
+            universal_newlines=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        modules = {}
+        for line in result.stderr.splitlines():
+            if line.startswith('import time:') and '|' in line:
+                _, cumulative, module = line[len('import time:'):].split('|')
+                if cumulative.strip().isdigit():
+                    modules.update({module.strip(): int(cumulative)})
+        return modules
+
+    def test_clone_dependencies_not_imported(self):
+        modules = self.importtime()
+        self.assertIn('member_clone.model_mixins', modules)
+        for module in LAZY_MODULES:
+            self.assertNotIn(module, modules)
+
+    def test_import_time_budget(self):
+        modules = self.importtime()
+        self.assertLess(
+            modules['member_clone.model_mixins'],
+            modules['django.db.models'] * IMPORT_TIME_BUDGET)
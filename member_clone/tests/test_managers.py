@@ -0,0 +1,57 @@
+from django.test import TestCase, tag
+
+from edc_constants.constants import YES
+from survey.tests.surveys import survey_two
+
+from ..runner import CloneRunner
+from .models import HouseholdMember
+from .mixins import CloneTestMixin
+
+
+@tag('managers')
+class TestCloneQuerySet(CloneTestMixin, TestCase):
+
+    def setUp(self):
+        self.survey_helper.load_test_surveys(load_all=True)
+        for _ in range(0, 2):
+            self.make_household(members=3)
+        CloneRunner(
+            survey_schedule=survey_two,
+            report_datetime=survey_two.start,
+            model='member_clone.householdmember').run()
+        self.updated_member = HouseholdMember.objects.filter(
+            survey_schedule=survey_two.field_value).first()
+        self.updated_member.personal_details_changed = YES
+        self.updated_member.save()
+
+    def test_annotate_clone_updated_matches_property(self):
+        for member in HouseholdMember.objects.all().annotate_clone_updated():
+            self.assertEqual(member.is_clone_updated, member.clone_updated)
+
+    def test_clone_updated(self):
+        self.assertEqual(
+            HouseholdMember.objects.clone_not_updated().count(), 5)
+        self.assertEqual(
+            HouseholdMember.objects.clone_updated().filter(
+                survey_schedule=survey_two.field_value).get(),
+            self.updated_member)
+
+    def test_pending_update_counts(self):
+        counts = {
+            row['household_structure']: row
+            for row in HouseholdMember.objects.pending_update_counts()}
+        self.assertEqual(len(counts), 2)
+        row = counts[self.updated_member.household_structure_id]
+        self.assertEqual(row['survey_schedule'], survey_two.field_value)
+        self.assertEqual(row['cloned_count'], 3)
+        self.assertEqual(row['pending_count'], 2)
+        self.assertEqual(
+            sum(row['pending_count'] for row in counts.values()), 5)
+
+    def test_pending_update_counts_by_survey_schedule(self):
+        counts = list(
+            HouseholdMember.objects.pending_update_counts_by_survey_schedule())
+        self.assertEqual(counts, [dict(
+            survey_schedule=survey_two.field_value,
+            cloned_count=6,
+            pending_count=5)])
@@ -0,0 +1,174 @@
+from dateutil.relativedelta import relativedelta
+from uuid import uuid4
+from unittest.mock import patch
+from django.test import TestCase, tag
+
+from edc_registration.models import RegisteredSubject
+from survey.tests.surveys import survey_one, survey_two
+
+from ..clone import Clone, CloneMembersExistError
+from ..constants import HEAD_OF_HOUSEHOLD
+from ..duplicates import CloneDuplicateIdentityError
+from ..model_mixins import CloneRegisteredSubjectError
+from ..movers import CloneMovers
+from .models import HouseholdMember, HouseholdStructure
+from .mixins import CloneTestMixin
+
+
+@tag('movers')
+class TestCloneMovers(CloneTestMixin, TestCase):
+
+    def setUp(self):
+        self.survey_helper.load_test_surveys(load_all=True)
+        self.households = [self.make_household() for _ in range(0, 2)]
+        household_structure = HouseholdStructure.objects.get(
+            household=self.households[0], survey_schedule=survey_one.field_value)
+        self.internal_identifiers = []
+        for relation in [HEAD_OF_HOUSEHOLD, 'cousin', 'cousin']:
+            member = self.make_member(
+                household_structure, relation=relation, age_in_years=30)
+            self.internal_identifiers.append(member.internal_identifier)
+        self.household_structure = HouseholdStructure.objects.get(
+            household=self.households[1], survey_schedule=survey_two.field_value)
+
+    def test_clone_movers(self):
+        movers = CloneMovers(
+            internal_identifiers=self.internal_identifiers[:2],
+            household_structure=self.household_structure,
+            report_datetime=survey_two.start,
+            model='member_clone.householdmember')
+        self.assertEqual(len(movers.members), 2)
+        self.assertEqual(movers.not_found, [])
+        members = HouseholdMember.objects.filter(
+            household_structure=self.household_structure)
+        self.assertEqual(members.count(), 2)
+        for member in members:
+            self.assertTrue(member.cloned)
+            self.assertNotEqual(member.relation, HEAD_OF_HOUSEHOLD)
+            source = HouseholdMember.objects.get(
+                pk=movers.source_pks[member.internal_identifier])
+            self.assertEqual(source.household_structure.household, self.households[0])
+
+    def test_clone_movers_with_model_clone(self):
+        clone = HouseholdMember.clone
+        with patch.object(HouseholdMember, 'clone', autospec=True,
+                          side_effect=clone) as mock_clone:
+            CloneMovers(
+                internal_identifiers=self.internal_identifiers[:2],
+                household_structure=self.household_structure,
+                report_datetime=survey_two.start,
+                model='member_clone.householdmember')
+        self.assertEqual(mock_clone.call_count, 2)
+
+    def test_clone_movers_age_from_dob(self):
+        RegisteredSubject.objects.filter(
+            registration_identifier=self.internal_identifiers[0]).update(
+                dob=(survey_two.start - relativedelta(years=50)).date())
+        movers = CloneMovers(
+            internal_identifiers=self.internal_identifiers[:1],
+            household_structure=self.household_structure,
+            report_datetime=survey_two.start,
+            model='member_clone.householdmember')
+        self.assertEqual(movers.members[0].age_in_years, 50)
+
+    def test_clone_movers_latest_appearance(self):
+        """Asserts the source is the latest appearance, here in
+        another household in a later survey_schedule.
+        """
+        survey_three = survey_two.next
+        moved_to = HouseholdStructure.objects.get(
+            household=self.households[1], survey_schedule=survey_two.field_value)
+        CloneMovers(
+            internal_identifiers=self.internal_identifiers[:1],
+            household_structure=moved_to,
+            report_datetime=survey_two.start,
+            model='member_clone.householdmember')
+        household_structure = HouseholdStructure.objects.get(
+            household=self.households[0], survey_schedule=survey_three.field_value)
+        movers = CloneMovers(
+            internal_identifiers=self.internal_identifiers[:1],
+            household_structure=household_structure,
+            report_datetime=survey_three.start,
+            model='member_clone.householdmember')
+        source = HouseholdMember.objects.get(
+            pk=movers.source_pks[movers.members[0].internal_identifier])
+        self.assertEqual(source.household_structure, moved_to)
+
+    def test_clone_movers_not_found(self):
+        internal_identifier = uuid4()
+        movers = CloneMovers(
+            internal_identifiers=[internal_identifier, self.internal_identifiers[0]],
+            household_structure=self.household_structure,
+            report_datetime=survey_two.start,
+            model='member_clone.householdmember')
+        self.assertEqual(len(movers.members), 1)
+        self.assertEqual(movers.not_found, [internal_identifier])
+
+    def test_clone_movers_existing_raises(self):
+        options = dict(
+            internal_identifiers=self.internal_identifiers[:1],
+            household_structure=self.household_structure,
+            report_datetime=survey_two.start,
+            model='member_clone.householdmember')
+        CloneMovers(**options)
+        self.assertRaises(CloneMembersExistError, CloneMovers, **options)
+
+    def test_clone_movers_existing_in_other_household_raises(self):
+        """Asserts a mover already cloned with their old household
+        is not cloned again into the new one.
+        """
+        Clone(
+            household_structure=HouseholdStructure.objects.get(
+                household=self.households[0], survey_schedule=survey_two.field_value),
+            report_datetime=survey_two.start,
+            model='member_clone.householdmember')
+        self.assertRaises(
+            CloneDuplicateIdentityError,
+            CloneMovers,
+            internal_identifiers=self.internal_identifiers[:1],
+            household_structure=self.household_structure,
+            report_datetime=survey_two.start,
+            model='member_clone.householdmember')
+        self.assertEqual(HouseholdMember.objects.filter(
+            household_structure=self.household_structure).count(), 0)
+
+    def test_clone_old_household_after_movers(self):
+        """Asserts a mover cloned into their new household is not
+        cloned again with their old household.
+        """
+        CloneMovers(
+            internal_identifiers=self.internal_identifiers[:1],
+            household_structure=self.household_structure,
+            report_datetime=survey_two.start,
+            model='member_clone.householdmember')
+        clone = Clone(
+            household_structure=HouseholdStructure.objects.get(
+                household=self.households[0], survey_schedule=survey_two.field_value),
+            report_datetime=survey_two.start,
+            model='member_clone.householdmember')
+        self.assertEqual(clone.members.count(), 2)
+        self.assertEqual(len(clone.moved), 1)
+        self.assertEqual(HouseholdMember.objects.filter(
+            survey_schedule=survey_two.field_value,
+            internal_identifier=self.internal_identifiers[0]).count(), 1)
+
+    def test_clone_movers_without_registered_subject_raises(self):
+        RegisteredSubject.objects.all().delete()
+        self.assertRaises(
+            CloneRegisteredSubjectError,
+            CloneMovers,
+            internal_identifiers=self.internal_identifiers[:1],
+            household_structure=self.household_structure,
+            report_datetime=survey_two.start,
+            model='member_clone.householdmember')
+
+    def test_clone_movers_create_false(self):
+        movers = CloneMovers(
+            internal_identifiers=self.internal_identifiers,
+            household_structure=self.household_structure,
+            report_datetime=survey_two.start,
+            model='member_clone.householdmember',
+            create=False)
+        self.assertEqual(len(movers.members), 3)
+        self.assertEqual(HouseholdMember.objects.filter(
+            household_structure=self.household_structure).count(), 0)
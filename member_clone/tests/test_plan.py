@@ -0,0 +1,129 @@
+from io import StringIO
+from django.test import TestCase, tag
+
+from survey.tests.surveys import survey_one, survey_two
+
+from ..clone import Clone
+from ..constants import HEAD_OF_HOUSEHOLD
+from ..plan import ClonePlan, ClonePlanLoader, read_csv, read_jsonl
+from .models import HouseholdMember, HouseholdStructure
+from .mixins import CloneTestMixin
+
+
+@tag('plan')
+class TestClonePlan(CloneTestMixin, TestCase):
+
+    def setUp(self):
+        self.survey_helper.load_test_surveys(load_all=True)
+        self.households = [
+            self.make_household(members=[
+                dict(relation=HEAD_OF_HOUSEHOLD), dict(relation='cousin')])
+            for _ in range(0, 2)]
+        self.plan = ClonePlan(
+            survey_schedule=survey_two,
+            report_datetime=survey_two.start,
+            model='member_clone.householdmember')
+
+    def test_rows(self):
+        rows = list(self.plan.rows())
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(
+            self.plan.summary,
+            dict(households=2, skipped=0, failed=0, members=4, errors={}))
+        for row in rows:
+            source = HouseholdMember.objects.get(pk=row['source_pk'])
+            self.assertEqual(str(source.internal_identifier), row['internal_identifier'])
+            self.assertEqual(row['survey_schedule'], survey_two.field_value)
+            self.assertEqual(row['age_in_years'], 26)
+            self.assertTrue(row['cloned'])
+            self.assertNotEqual(row['relation'], HEAD_OF_HOUSEHOLD)
+        self.assertEqual(HouseholdMember.objects.filter(
+            survey_schedule=survey_two.field_value).count(), 0)
+
+    def test_rows_skips_households_with_members(self):
+        Clone(household=self.households[0],
+              survey_schedule=survey_two,
+              report_datetime=survey_two.start,
+              model='member_clone.householdmember')
+        self.assertEqual(len(list(self.plan.rows())), 2)
+        self.assertEqual(self.plan.summary['skipped'], 1)
+
+    def test_rows_continues_after_failed_household(self):
+        HouseholdStructure.objects.get(
+            household=self.households[0], survey_schedule=survey_one.field_value).delete()
+        household_structure = HouseholdStructure.objects.get(
+            household=self.households[0], survey_schedule=survey_two.field_value)
+        self.assertEqual(len(list(self.plan.rows())), 2)
+        self.assertEqual(self.plan.summary['households'], 1)
+        self.assertEqual(self.plan.summary['failed'], 1)
+        self.assertEqual(list(self.plan.summary['errors']), [str(household_structure.pk)])
+
+    def test_jsonl_round_trip(self):
+        f = StringIO()
+        self.plan.write_jsonl(f)
+        f.seek(0)
+        counts = ClonePlanLoader(
+            model='member_clone.householdmember', batch_size=3).load(read_jsonl(f))
+        self.assertEqual(counts, dict(created=4, members_exist=0))
+        for member in HouseholdMember.objects.filter(
+                survey_schedule=survey_two.field_value):
+            self.assertTrue(member.cloned)
+            self.assertFalse(member.clone_updated)
+            self.assertEqual(member.age_in_years, 26)
+            self.assertEqual(
+                member.household_structure.survey_schedule, survey_two.field_value)
+
+    def test_csv_round_trip(self):
+        f = StringIO()
+        self.plan.write_csv(f)
+        f.seek(0)
+        counts = ClonePlanLoader(
+            model='member_clone.householdmember').load(read_csv(f))
+        self.assertEqual(counts, dict(created=4, members_exist=0))
+        member = HouseholdMember.objects.filter(
+            survey_schedule=survey_two.field_value, relation__isnull=True).first()
+        self.assertIsNone(member.personal_details_changed)
+
+    def test_load_skips_existing_members(self):
+        f = StringIO()
+        self.plan.write_jsonl(f)
+        Clone(household=self.households[0],
+              survey_schedule=survey_two,
+              report_datetime=survey_two.start,
+              model='member_clone.householdmember')
+        f.seek(0)
+        counts = ClonePlanLoader(
+            model='member_clone.householdmember').load(read_jsonl(f))
+        self.assertEqual(counts, dict(created=2, members_exist=2))
+        self.assertEqual(HouseholdMember.objects.filter(
+            survey_schedule=survey_two.field_value).count(), 4)
+
+    def test_load_skips_households_enumerated_since_export(self):
+        f = StringIO()
+        self.plan.write_jsonl(f)
+        household_structure = HouseholdStructure.objects.get(
+            household=self.households[0], survey_schedule=survey_two.field_value)
+        self.make_member(household_structure)
+        f.seek(0)
+        counts = ClonePlanLoader(
+            model='member_clone.householdmember').load(read_jsonl(f))
+        self.assertEqual(counts, dict(created=2, members_exist=2))
+        self.assertEqual(HouseholdMember.objects.filter(
+            household_structure=household_structure).count(), 1)
+
+    def test_load_batches_hold_whole_households(self):
+        f = StringIO()
+        self.plan.write_jsonl(f)
+        f.seek(0)
+        loader = ClonePlanLoader(model='member_clone.householdmember', batch_size=1)
+        batches = []
+        load_batch = loader.load_batch
+
+        def record_batch(rows):
+            batches.append(len(rows))
+            return load_batch(rows)
+
+        loader.load_batch = record_batch
+        counts = loader.load(read_jsonl(f))
+        self.assertEqual(batches, [2, 2])
+        self.assertEqual(counts, dict(created=4, members_exist=0))
@@ -0,0 +1,113 @@
+import os
+import pstats
+import shutil
+import tempfile
+import threading
+
+from django.test import TestCase, tag
+
+from survey.tests.surveys import survey_two
+
+from ..clone import Clone
+from ..profiling import CloneProfiler
+from ..runner import CloneRunner
+from .models import HouseholdStructure
+from .mixins import CloneTestMixin
+
+
+@tag('profiling')
+class TestCloneProfiler(CloneTestMixin, TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.survey_helper.load_test_surveys(load_all=True)
+        for _ in range(0, 4):
+            self.make_household(members=1)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_capture_every(self):
+        profiler = CloneProfiler(directory=self.directory, every=2, top=5)
+        for index in range(0, 4):
+            with profiler.capture('block-{}'.format(index)):
+                sum(range(0, 1000))
+        self.assertEqual(len(profiler.captures), 2)
+        self.assertEqual(
+            sorted(os.listdir(self.directory)),
+            ['block-0.prof', 'block-0.txt', 'block-2.prof', 'block-2.txt'])
+        pstats.Stats(os.path.join(self.directory, 'block-0.prof'))
+        with open(os.path.join(self.directory, 'block-0.txt')) as f:
+            summary = f.read()
+        self.assertIn('Top 5 functions by cumulative time', summary)
+        self.assertIn('Top 5 allocations by line', summary)
+
+    def test_capture_without_memory(self):
+        profiler = CloneProfiler(directory=self.directory, memory=False)
+        with profiler.capture('block'):
+            pass
+        with open(profiler.captures[0]) as f:
+            self.assertNotIn('allocations', f.read())
+
+    def test_capture_default_directory(self):
+        profiler = CloneProfiler()
+        try:
+            with profiler.capture('block'):
+                pass
+            self.assertEqual(
+                sorted(os.listdir(profiler.directory)), ['block.prof', 'block.txt'])
+        finally:
+            shutil.rmtree(profiler.directory)
+
+    def test_sampled_from_threads(self):
+        profiler = CloneProfiler(directory=self.directory, every=3)
+        sampled = []
+
+        def sample():
+            for _ in range(0, 300):
+                if profiler.sampled():
+                    sampled.append(True)
+
+        threads = [threading.Thread(target=sample) for _ in range(0, 4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(profiler.calls, 1200)
+        self.assertEqual(len(sampled), 400)
+
+    def test_clone_profiler(self):
+        profiler = CloneProfiler(directory=self.directory)
+        household_structure = HouseholdStructure.objects.filter(
+            survey_schedule=survey_two.field_value).first()
+        clone = Clone(
+            household_structure=household_structure,
+            report_datetime=survey_two.start,
+            model='member_clone.householdmember',
+            profiler=profiler)
+        self.assertEqual(clone.members.count(), 1)
+        self.assertEqual(len(profiler.captures), 1)
+        self.assertIn(str(household_structure.household.pk), profiler.captures[0])
+
+    def test_runner_profiles_chunks(self):
+        runner = CloneRunner(
+            survey_schedule=survey_two,
+            report_datetime=survey_two.start,
+            model='member_clone.householdmember',
+            chunk_size=1,
+            profile_directory=self.directory,
+            profile_every=2)
+        runner.run()
+        run_directory = os.path.join(
+            self.directory, 'clonerun-{}'.format(runner.clone_run.pk))
+        self.assertEqual(len(runner.profiler.captures), 2)
+        self.assertEqual(len(os.listdir(run_directory)), 4)
+
+    def test_runner_not_profiling(self):
+        runner = CloneRunner(
+            survey_schedule=survey_two,
+            report_datetime=survey_two.start,
+            model='member_clone.householdmember')
+        runner.run()
+        self.assertIsNone(runner.profiler)
+        self.assertEqual(os.listdir(self.directory), [])
@@ -0,0 +1,118 @@
+import csv
+import json
+
+from io import StringIO
+from django.test import TestCase, tag
+
+from survey.tests.surveys import survey_one, survey_two, survey_three
+
+from ..clone import Clone
+from ..constants import READY, MEMBERS_EXIST, NO_PREVIOUS_MEMBERS
+from ..constants import MISSING_HOUSEHOLD_STRUCTURE
+from ..movers import CloneMovers
+from ..report import ClonePreflightReport
+from .models import HouseholdMember, HouseholdStructure
+from .mixins import CloneTestMixin
+
+
+@tag('report')
+class TestClonePreflightReport(CloneTestMixin, TestCase):
+
+    def setUp(self):
+        self.survey_helper.load_test_surveys(load_all=True)
+        self.households = [
+            self.make_household(members=members) for members in [3, 2, 0]]
+
+    def rows(self, survey_schedule):
+        report = ClonePreflightReport(
+            survey_schedule=survey_schedule,
+            model='member_clone.householdmember')
+        return {row['household']: row for row in report.rows()}, report.summary
+
+    def test_report(self):
+        rows, summary = self.rows(survey_two)
+        row = rows[str(self.households[0].pk)]
+        self.assertEqual(row['status'], READY)
+        self.assertEqual(row['source_survey_schedule'], survey_one.field_value)
+        self.assertEqual(row['members_to_clone'], 3)
+        self.assertEqual(rows[str(self.households[2].pk)]['status'], NO_PREVIOUS_MEMBERS)
+        self.assertEqual(summary[READY], 2)
+        self.assertEqual(summary['members_to_clone'], 5)
+
+    def test_report_members_exist(self):
+        Clone(household=self.households[0],
+              survey_schedule=survey_two,
+              report_datetime=survey_two.start,
+              model='member_clone.householdmember')
+        rows, summary = self.rows(survey_two)
+        row = rows[str(self.households[0].pk)]
+        self.assertEqual(row['status'], MEMBERS_EXIST)
+        self.assertEqual(row['existing_members'], 3)
+        self.assertEqual(row['members_to_clone'], 0)
+        self.assertEqual(summary[MEMBERS_EXIST], 1)
+
+    def test_report_walks_back_to_members(self):
+        rows, _ = self.rows(survey_three)
+        row = rows[str(self.households[1].pk)]
+        self.assertEqual(row['status'], READY)
+        self.assertEqual(row['source_survey_schedule'], survey_one.field_value)
+        self.assertEqual(row['members_to_clone'], 2)
+
+    def test_report_missing_household_structure(self):
+        HouseholdStructure.objects.filter(
+            household=self.households[1],
+            survey_schedule=survey_two.field_value).delete()
+        rows, _ = self.rows(survey_three)
+        row = rows[str(self.households[1].pk)]
+        self.assertEqual(row['status'], MISSING_HOUSEHOLD_STRUCTURE)
+        self.assertEqual(row['source_survey_schedule'], survey_two.field_value)
+
+    def test_report_matches_clone(self):
+        rows, _ = self.rows(survey_two)
+        for household in self.households:
+            clone = Clone(household=household,
+                          survey_schedule=survey_two,
+                          report_datetime=survey_two.start,
+                          model='member_clone.householdmember',
+                          create=False)
+            self.assertEqual(
+                len(clone.members), rows[str(household.pk)]['members_to_clone'])
+
+    def test_report_excludes_moved_members(self):
+        member = HouseholdMember.objects.filter(
+            household_structure__household=self.households[0]).first()
+        CloneMovers(
+            internal_identifiers=[member.internal_identifier],
+            household_structure=HouseholdStructure.objects.get(
+                household=self.households[2], survey_schedule=survey_two.field_value),
+            report_datetime=survey_two.start,
+            model='member_clone.householdmember')
+        rows, summary = self.rows(survey_two)
+        row = rows[str(self.households[0].pk)]
+        self.assertEqual(row['status'], READY)
+        self.assertEqual(row['members_to_clone'], 2)
+        self.assertEqual(rows[str(self.households[2].pk)]['status'], MEMBERS_EXIST)
+        self.assertEqual(summary[READY], 2)
+        self.assertEqual(summary['members_to_clone'], 4)
+        clone = Clone(household=self.households[0],
+                      survey_schedule=survey_two,
+                      report_datetime=survey_two.start,
+                      model='member_clone.householdmember',
+                      create=False)
+        self.assertEqual(len(clone.members), row['members_to_clone'])
+
+    def test_write_csv(self):
+        f = StringIO()
+        report = ClonePreflightReport(
+            survey_schedule=survey_two, model='member_clone.householdmember')
+        report.write_csv(f)
+        f.seek(0)
+        self.assertEqual(len(list(csv.DictReader(f))), 3)
+
+    def test_write_json(self):
+        f = StringIO()
+        report = ClonePreflightReport(
+            survey_schedule=survey_two, model='member_clone.householdmember')
+        summary = report.write_json(f)
+        self.assertEqual(len(json.loads(f.getvalue())), 3)
+        self.assertEqual(summary['members_to_clone'], 5)
@@ -0,0 +1,68 @@
+from dateutil.relativedelta import relativedelta
+from django.test import TestCase, tag
+
+from edc_base.utils import get_utcnow
+from edc_constants.constants import YES
+from survey.tests.surveys import survey_one, survey_two
+
+from ..rollback import CloneRollback
+from ..runner import CloneRunner
+from .models import HouseholdMember
+from .mixins import CloneTestMixin
+
+
+@tag('rollback')
+class TestCloneRollback(CloneTestMixin, TestCase):
+
+    def setUp(self):
+        self.survey_helper.load_test_surveys(load_all=True)
+        for _ in range(0, 2):
+            self.make_household(members=3)
+        CloneRunner(
+            survey_schedule=survey_two,
+            report_datetime=survey_two.start,
+            model='member_clone.householdmember').run()
+
+    def test_rollback(self):
+        counts = CloneRollback(
+            survey_schedule=survey_two,
+            model='member_clone.householdmember',
+            chunk_size=4).rollback()
+        self.assertEqual(counts, dict(deleted=6, cascaded=0, refused=0))
+        self.assertEqual(HouseholdMember.objects.filter(
+            survey_schedule=survey_two.field_value).count(), 0)
+        self.assertEqual(HouseholdMember.objects.filter(
+            survey_schedule=survey_one.field_value).count(), 6)
+
+    def test_rollback_refuses_updated_members(self):
+        member = HouseholdMember.objects.filter(
+            survey_schedule=survey_two.field_value).first()
+        member.personal_details_changed = YES
+        member.save()
+        counts = CloneRollback(
+            survey_schedule=survey_two,
+            model='member_clone.householdmember').rollback()
+        self.assertEqual(counts, dict(deleted=5, cascaded=0, refused=1))
+        self.assertEqual(HouseholdMember.objects.get(
+            survey_schedule=survey_two.field_value), member)
+
+    def test_rollback_cloned_datetime_window(self):
+        member = HouseholdMember.objects.filter(
+            survey_schedule=survey_two.field_value).first()
+        HouseholdMember.objects.filter(pk=member.pk).update(
+            cloned_datetime=get_utcnow() - relativedelta(days=2))
+        counts = CloneRollback(
+            survey_schedule=survey_two,
+            model='member_clone.householdmember',
+            cloned_after=get_utcnow() - relativedelta(days=1)).rollback()
+        self.assertEqual(counts['deleted'], 5)
+        self.assertEqual(HouseholdMember.objects.get(
+            survey_schedule=survey_two.field_value), member)
+
+    def test_rollback_ignores_members_not_cloned(self):
+        counts = CloneRollback(
+            survey_schedule=survey_one,
+            model='member_clone.householdmember').rollback()
+        self.assertEqual(counts['deleted'], 0)
+        self.assertEqual(HouseholdMember.objects.filter(
+            survey_schedule=survey_one.field_value).count(), 6)
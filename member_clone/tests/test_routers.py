@@ -0,0 +1,74 @@
+from django.db import connections
+from django.test import TestCase, TransactionTestCase, tag
+from django.test.utils import CaptureQueriesContext
+
+from edc_registration.models import RegisteredSubject
+from survey.tests.surveys import survey_two
+
+from ..clone import Clone
+from ..routers import CloneReadRouter, clone_reads_from
+from .models import HouseholdMember, HouseholdStructure
+from .mixins import CloneTestMixin
+
+
+@tag('routers')
+class TestCloneReadRouter(TestCase):
+
+    def test_router_inactive(self):
+        self.assertIsNone(CloneReadRouter().db_for_read(HouseholdMember))
+
+    def test_router_active(self):
+        with clone_reads_from('replica'):
+            self.assertEqual(
+                CloneReadRouter().db_for_read(HouseholdMember), 'replica')
+            with clone_reads_from(None):
+                self.assertIsNone(CloneReadRouter().db_for_read(HouseholdMember))
+            self.assertEqual(
+                CloneReadRouter().db_for_read(HouseholdMember), 'replica')
+        self.assertIsNone(CloneReadRouter().db_for_read(HouseholdMember))
+
+
+@tag('routers')
+class TestCloneReadDatabase(CloneTestMixin, TransactionTestCase):
+
+    """Uses TransactionTestCase so that data is committed and
+    visible to the `replica` alias, a test mirror of `default`.
+    """
+
+    multi_db = True
+
+    def setUp(self):
+        self.survey_helper.load_test_surveys(load_all=True)
+        self.household = self.make_household(members=3)
+        self.household_structure = HouseholdStructure.objects.get(
+            household=self.household, survey_schedule=survey_two.field_value)
+
+    def test_clone_reads_from_replica(self):
+        with CaptureQueriesContext(connections['replica']) as replica_queries:
+            clone = Clone(household_structure=self.household_structure,
+                          report_datetime=survey_two.start,
+                          model='member_clone.householdmember',
+                          read_database='replica')
+        self.assertEqual(clone.members.count(), 3)
+        sql = ' '.join(query['sql'] for query in replica_queries)
+        self.assertIn(RegisteredSubject._meta.db_table, sql)
+        self.assertIn(HouseholdMember._meta.db_table, sql)
+
+    def test_clone_checks_existing_members_on_primary(self):
+        """Asserts no query against the target household_structure
+        is sent to the replica.
+        """
+        with CaptureQueriesContext(connections['replica']) as replica_queries:
+            Clone(household_structure=self.household_structure,
+                  report_datetime=survey_two.start,
+                  model='member_clone.householdmember',
+                  read_database='replica')
+        for query in replica_queries:
+            self.assertNotIn(self.household_structure.pk.hex, query['sql'])
+
+    def test_clone_without_read_database(self):
+        with CaptureQueriesContext(connections['replica']) as replica_queries:
+            Clone(household_structure=self.household_structure,
+                  report_datetime=survey_two.start,
+                  model='member_clone.householdmember')
+        self.assertEqual(len(replica_queries), 0)
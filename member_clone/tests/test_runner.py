@@ -0,0 +1,225 @@
+import asyncio
+
+from concurrent.futures import Executor, Future
+from unittest.mock import patch
+from django.core.management import CommandError, call_command
+from django.db import OperationalError
+from django.test import TestCase, tag
+
+from edc_registration.models import RegisteredSubject
+from survey.tests.surveys import survey_one, survey_two
+
+from ..clone import Clone
+from ..constants import CLONED, SKIPPED, FAILED, DONE
+from ..models import CloneRun
+from ..runner import CloneRunner
+from .models import HouseholdMember, HouseholdStructure, Household
+from .mixins import CloneTestMixin
+
+
+class InlineExecutor(Executor):
+
+    """An executor that runs calls in the calling thread so that
+    tests share the test case's database connection.
+    """
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        future.set_result(fn(*args, **kwargs))
+        return future
+
+
+@tag('runner')
+class TestCloneRunner(CloneTestMixin, TestCase):
+
+    def setUp(self):
+        self.survey_helper.load_test_surveys(load_all=True)
+        for _ in range(0, 3):
+            self.make_household(members=2)
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_run(self):
+        runner = CloneRunner(
+            survey_schedule=survey_two,
+            report_datetime=survey_two.start,
+            model='member_clone.householdmember')
+        counts = runner.run()
+        self.assertEqual(counts, {CLONED: 3, SKIPPED: 0, FAILED: 0})
+        self.assertEqual(runner.members_count, 6)
+        self.assertEqual(HouseholdMember.objects.filter(
+            survey_schedule=survey_two.field_value).count(), 6)
+
+    def test_run_skips_households_with_members(self):
+        runner = CloneRunner(
+            survey_schedule=survey_two,
+            report_datetime=survey_two.start,
+            model='member_clone.householdmember')
+        runner.run()
+        runner = CloneRunner(
+            survey_schedule=survey_two,
+            report_datetime=survey_two.start,
+            model='member_clone.householdmember')
+        counts = runner.run()
+        self.assertEqual(counts, {CLONED: 0, SKIPPED: 3, FAILED: 0})
+
+    def test_run_records_failures(self):
+        RegisteredSubject.objects.all().delete()
+        runner = CloneRunner(
+            survey_schedule=survey_two,
+            report_datetime=survey_two.start,
+            model='member_clone.householdmember')
+        counts = runner.run()
+        self.assertEqual(counts, {CLONED: 0, SKIPPED: 0, FAILED: 3})
+        self.assertEqual(len(runner.errors), 3)
+        self.assertEqual(HouseholdMember.objects.filter(
+            survey_schedule=survey_two.field_value).count(), 0)
+
+    def test_run_records_missing_household_structure(self):
+        household = Household.objects.all().order_by('id').first()
+        HouseholdStructure.objects.get(
+            household=household, survey_schedule=survey_one.field_value).delete()
+        runner = CloneRunner(
+            survey_schedule=survey_two,
+            report_datetime=survey_two.start,
+            model='member_clone.householdmember')
+        counts = runner.run()
+        self.assertEqual(counts, {CLONED: 2, SKIPPED: 0, FAILED: 1})
+        self.assertEqual(len(runner.errors), 1)
+        self.assertEqual(CloneRun.objects.get(pk=runner.clone_run.pk).status, DONE)
+
+    def test_arun_records_missing_household_structure(self):
+        household = Household.objects.all().order_by('id').first()
+        HouseholdStructure.objects.get(
+            household=household, survey_schedule=survey_one.field_value).delete()
+        runner = CloneRunner(
+            survey_schedule=survey_two,
+            report_datetime=survey_two.start,
+            model='member_clone.householdmember',
+            executor=InlineExecutor())
+        counts = self.loop.run_until_complete(runner.arun())
+        self.assertEqual(counts, {CLONED: 2, SKIPPED: 0, FAILED: 1})
+
+    def test_run_checkpoints(self):
+        runner = CloneRunner(
+            survey_schedule=survey_two,
+            report_datetime=survey_two.start,
+            model='member_clone.householdmember',
+            chunk_size=2)
+        runner.run()
+        clone_run = CloneRun.objects.get(pk=runner.clone_run.pk)
+        self.assertEqual(clone_run.status, DONE)
+        self.assertEqual(clone_run.cloned, 3)
+        self.assertEqual(clone_run.members_count, 6)
+        self.assertEqual(
+            clone_run.last_household_id,
+            str(Household.objects.all().order_by('id').last().pk))
+
+    def test_run_resumes_from_checkpoint(self):
+        runner = CloneRunner(
+            survey_schedule=survey_two,
+            report_datetime=survey_two.start,
+            model='member_clone.householdmember',
+            chunk_size=1)
+        clone_household = CloneRunner.clone_household
+        calls = []
+
+        def interrupt(runner, pk):
+            calls.append(pk)
+            if len(calls) == 2:
+                raise OperationalError('lost connection')
+            return clone_household(runner, pk)
+
+        with patch.object(CloneRunner, 'clone_household', autospec=True,
+                          side_effect=interrupt):
+            self.assertRaises(OperationalError, runner.run)
+        clone_run = CloneRun.objects.get(pk=runner.clone_run.pk)
+        self.assertEqual(clone_run.status, FAILED)
+        self.assertEqual(clone_run.cloned, 1)
+        self.assertEqual(HouseholdMember.objects.filter(
+            survey_schedule=survey_two.field_value).count(), 2)
+
+        runner = CloneRunner.from_clone_run(clone_run)
+        with patch.object(CloneRunner, 'clone_household', autospec=True,
+                          side_effect=clone_household) as mock_clone_household:
+            counts = runner.run()
+        self.assertEqual(mock_clone_household.call_count, 2)
+        self.assertEqual(counts, {CLONED: 3, SKIPPED: 0, FAILED: 0})
+        self.assertEqual(runner.members_count, 6)
+        self.assertEqual(CloneRun.objects.get(pk=clone_run.pk).status, DONE)
+
+    def test_run_commits_households_cloned_before_error(self):
+        runner = CloneRunner(
+            survey_schedule=survey_two,
+            report_datetime=survey_two.start,
+            model='member_clone.householdmember',
+            chunk_size=3)
+        clone_household = CloneRunner.clone_household
+        calls = []
+
+        def interrupt(runner, pk):
+            calls.append(pk)
+            if len(calls) == 2:
+                raise OperationalError('lost connection')
+            return clone_household(runner, pk)
+
+        with patch.object(CloneRunner, 'clone_household', autospec=True,
+                          side_effect=interrupt):
+            self.assertRaises(OperationalError, runner.run)
+        clone_run = CloneRun.objects.get(pk=runner.clone_run.pk)
+        self.assertEqual(clone_run.cloned, 1)
+        self.assertEqual(
+            clone_run.last_household_id,
+            str(Household.objects.all().order_by('id').first().pk))
+        self.assertEqual(HouseholdMember.objects.filter(
+            survey_schedule=survey_two.field_value).count(), 2)
+
+    def test_run_checkpoints_each_household(self):
+        runner = CloneRunner(
+            survey_schedule=survey_two,
+            report_datetime=survey_two.start,
+            model='member_clone.householdmember',
+            chunk_size=3)
+        clone_household = CloneRunner.clone_household
+        checkpoints = []
+
+        def record_checkpoint(runner, pk):
+            if runner.clone_run:
+                clone_run = CloneRun.objects.get(pk=runner.clone_run.pk)
+                checkpoints.append((clone_run.cloned, clone_run.members_count))
+            return clone_household(runner, pk)
+
+        with patch.object(CloneRunner, 'clone_household', autospec=True,
+                          side_effect=record_checkpoint):
+            runner.run()
+        self.assertEqual(checkpoints, [(0, 0), (1, 2), (2, 4)])
+
+    def test_command_resume_invalid_clone_run(self):
+        for resume in ['not-a-uuid', '00000000-0000-0000-0000-000000000000']:
+            self.assertRaises(
+                CommandError, call_command, 'clone_members', resume=resume)
+
+    def test_arun(self):
+        runner = CloneRunner(
+            survey_schedule=survey_two,
+            report_datetime=survey_two.start,
+            model='member_clone.householdmember',
+            concurrency=2,
+            executor=InlineExecutor())
+        counts = self.loop.run_until_complete(runner.arun())
+        self.assertEqual(counts, {CLONED: 3, SKIPPED: 0, FAILED: 0})
+        self.assertEqual(HouseholdMember.objects.filter(
+            survey_schedule=survey_two.field_value).count(), 6)
+
+    def test_acreate(self):
+        household_structure = HouseholdStructure.objects.filter(
+            survey_schedule=survey_two.field_value).first()
+        clone = self.loop.run_until_complete(Clone.acreate(
+            executor=InlineExecutor(),
+            household_structure=household_structure,
+            report_datetime=survey_two.start,
+            model='member_clone.householdmember'))
+        self.assertEqual(clone.members.count(), 2)
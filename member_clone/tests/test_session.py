@@ -0,0 +1,192 @@
+from dateutil.relativedelta import relativedelta
+from unittest.mock import patch
+from django.db import connection
+from django.test import TestCase, tag
+from django.test.utils import CaptureQueriesContext
+
+from edc_registration.models import RegisteredSubject
+from survey.tests.surveys import survey_one, survey_two, survey_three
+
+from ..clone import Clone
+from ..model_mixins import CloneRegisteredSubjectError, CloneReportDatetimeError
+from ..runner import CloneRunner
+from ..session import CloneSession, LRUCache
+from .models import HouseholdMember, HouseholdStructure
+from .mixins import CloneTestMixin
+
+
+@tag('session')
+class TestLRUCache(TestCase):
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(maxsize=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertEqual(len(cache), 2)
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+        self.assertIsNone(cache.get('b'))
+
+
+@tag('session')
+class TestCloneSession(CloneTestMixin, TestCase):
+
+    def setUp(self):
+        self.survey_helper.load_test_surveys(load_all=True)
+        for _ in range(0, 3):
+            self.make_household(
+                members=[dict(dob=(survey_one.start - relativedelta(years=40)).date())] * 2)
+
+    def test_clone_with_session(self):
+        session = CloneSession()
+        for household_structure in HouseholdStructure.objects.filter(
+                survey_schedule=survey_two.field_value):
+            clone = Clone(
+                household_structure=household_structure,
+                report_datetime=survey_two.start,
+                model='member_clone.householdmember',
+                session=session)
+            self.assertEqual(clone.members.count(), 2)
+            for member in clone.members:
+                self.assertEqual(member.age_in_years, 41)
+        self.assertEqual(len(session.registered_dobs), 6)
+        self.assertEqual(len(session.previous_survey_schedules), 1)
+
+    def test_session_clones_with_model_clone(self):
+        """Asserts a runner, which always uses a session, clones
+        members through the model's `clone` so overrides apply.
+        """
+        clone = HouseholdMember.clone
+
+        def relabel(obj, *args, **kwargs):
+            new_obj = clone(obj, *args, **kwargs)
+            new_obj.initials = 'XX'
+            return new_obj
+
+        with patch.object(HouseholdMember, 'clone', autospec=True,
+                          side_effect=relabel) as mock_clone:
+            CloneRunner(
+                survey_schedule=survey_two,
+                report_datetime=survey_two.start,
+                model='member_clone.householdmember').run()
+        self.assertEqual(mock_clone.call_count, 6)
+        for member in HouseholdMember.objects.filter(
+                survey_schedule=survey_two.field_value):
+            self.assertEqual(member.initials, 'XX')
+            self.assertEqual(member.age_in_years, 41)
+
+    def test_session_caches_model(self):
+        session = CloneSession()
+        with patch('member_clone.session.django_apps.get_model',
+                   return_value=HouseholdMember) as get_model:
+            for _ in range(0, 3):
+                self.assertEqual(
+                    session.get_model('member_clone.householdmember'), HouseholdMember)
+        self.assertEqual(get_model.call_count, 1)
+
+    def test_session_validates_report_datetime(self):
+        session = CloneSession()
+        session.validate_report_datetime(survey_two, survey_two.start)
+        self.assertEqual(len(session.windows), 1)
+        self.assertRaises(
+            CloneReportDatetimeError,
+            session.validate_report_datetime,
+            survey_two, survey_one.start)
+        self.assertEqual(len(session.windows), 1)
+
+    def test_session_missing_registered_subject(self):
+        RegisteredSubject.objects.all().delete()
+        household_structure = HouseholdStructure.objects.filter(
+            survey_schedule=survey_two.field_value).first()
+        self.assertRaises(
+            CloneRegisteredSubjectError,
+            Clone,
+            household_structure=household_structure,
+            report_datetime=survey_two.start,
+            model='member_clone.householdmember',
+            session=CloneSession())
+
+    def test_session_dob_eviction(self):
+        session = CloneSession(dob_maxsize=1)
+        internal_identifiers = list(HouseholdMember.objects.values_list(
+            'internal_identifier', flat=True))
+        dobs = session.get_dobs(internal_identifiers)
+        self.assertEqual(len(dobs), 6)
+        self.assertEqual(len(session.registered_dobs), 1)
+
+    def test_runner_prefetches_dobs(self):
+        with CaptureQueriesContext(connection) as context:
+            CloneRunner(
+                survey_schedule=survey_two,
+                report_datetime=survey_two.start,
+                model='member_clone.householdmember',
+                chunk_size=10).run()
+        registered_subject_queries = [
+            query for query in context.captured_queries
+            if RegisteredSubject._meta.db_table in query['sql']]
+        self.assertEqual(len(registered_subject_queries), 1)
+        self.assertEqual(HouseholdMember.objects.filter(
+            survey_schedule=survey_two.field_value).count(), 6)
+
+    def test_runner_prefetch_reserves_dob_cache(self):
+        session = CloneSession(dob_maxsize=2)
+        with CaptureQueriesContext(connection) as context:
+            CloneRunner(
+                survey_schedule=survey_two,
+                report_datetime=survey_two.start,
+                model='member_clone.householdmember',
+                chunk_size=10,
+                session=session).run()
+        registered_subject_queries = [
+            query for query in context.captured_queries
+            if RegisteredSubject._meta.db_table in query['sql']]
+        self.assertEqual(len(registered_subject_queries), 1)
+        self.assertEqual(session.registered_dobs.maxsize, 2)
+        self.assertEqual(len(session.registered_dobs), 2)
+
+    def test_session_reserve_dobs(self):
+        session = CloneSession(dob_maxsize=1)
+        internal_identifiers = list(HouseholdMember.objects.values_list(
+            'internal_identifier', flat=True))
+        with session.reserve_dobs(len(internal_identifiers)):
+            session.prefetch_dobs(internal_identifiers)
+            self.assertEqual(len(session.registered_dobs), 6)
+        self.assertEqual(session.registered_dobs.maxsize, 1)
+        self.assertEqual(len(session.registered_dobs), 1)
+
+    def test_runner_prefetches_source_members_only(self):
+        """Asserts dobs are prefetched only for members of the
+        survey_schedule each household is cloned from.
+        """
+        CloneRunner(
+            survey_schedule=survey_two,
+            report_datetime=survey_two.start,
+            model='member_clone.householdmember').run()
+        HouseholdMember.objects.filter(survey_schedule=survey_two.field_value).first().delete()
+        runner = CloneRunner(
+            survey_schedule=survey_three,
+            report_datetime=survey_three.start,
+            model='member_clone.householdmember')
+        runner.run()
+        self.assertEqual(len(runner.session.registered_dobs), 5)
+
+    def test_session_without_previous_members(self):
+        """Asserts report_datetime is not validated if there are no
+        members to clone, as without a session.
+        """
+        household = self.make_household()
+        clone = Clone(
+            household_structure=HouseholdStructure.objects.get(
+                household=household, survey_schedule=survey_two.field_value),
+            report_datetime=survey_one.start,
+            model='member_clone.householdmember',
+            session=CloneSession())
+        self.assertEqual(clone.members.count(), 0)
+
+    def test_context_clears(self):
+        with CloneSession() as session:
+            session.get_model('member_clone.householdmember')
+            self.assertEqual(len(session.models), 1)
+        self.assertEqual(len(session.models), 0)
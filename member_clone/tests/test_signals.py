@@ -0,0 +1,76 @@
+from django.db.models.signals import post_save
+from django.test import TestCase, tag
+
+from survey.tests.surveys import survey_two
+
+from ..bundle import CloneBundle
+from ..clone import Clone
+from ..signals import members_cloned
+from .models import HouseholdMember, HouseholdStructure
+from .mixins import CloneTestMixin
+
+
+@tag('signals')
+class TestMembersClonedSignal(CloneTestMixin, TestCase):
+
+    def setUp(self):
+        self.survey_helper.load_test_surveys(load_all=True)
+        self.household = self.make_household(members=3)
+        self.household_structure = HouseholdStructure.objects.get(
+            household=self.household, survey_schedule=survey_two.field_value)
+        self.received = []
+        self.saved = []
+        members_cloned.connect(self.members_cloned_receiver)
+        post_save.connect(self.post_save_receiver, sender=HouseholdMember)
+
+    def tearDown(self):
+        members_cloned.disconnect(self.members_cloned_receiver)
+        post_save.disconnect(self.post_save_receiver, sender=HouseholdMember)
+
+    def members_cloned_receiver(self, sender, members=None, household_structure=None,
+                                bulk=None, **kwargs):
+        self.received.append((sender, members, household_structure, bulk))
+
+    def post_save_receiver(self, sender, instance=None, **kwargs):
+        self.saved.append(instance)
+
+    def test_sent_once_per_household(self):
+        Clone(household_structure=self.household_structure,
+              report_datetime=survey_two.start,
+              model='member_clone.householdmember')
+        self.assertEqual(len(self.received), 1)
+        sender, members, household_structure, bulk = self.received[0]
+        self.assertEqual(sender, HouseholdMember)
+        self.assertEqual(len(members), 3)
+        self.assertEqual(household_structure, self.household_structure)
+        self.assertFalse(bulk)
+        self.assertEqual(len(self.saved), 3)
+
+    def test_bulk_skips_per_row_signals(self):
+        clone = Clone(household_structure=self.household_structure,
+                      report_datetime=survey_two.start,
+                      model='member_clone.householdmember',
+                      bulk=True)
+        self.assertEqual(clone.members.count(), 3)
+        self.assertEqual(len(self.saved), 0)
+        self.assertEqual(len(self.received), 1)
+        _, members, _, bulk = self.received[0]
+        self.assertTrue(bulk)
+        self.assertEqual(
+            sorted([obj.pk for obj in members]),
+            sorted([obj.pk for obj in clone.members]))
+
+    def test_not_sent_if_not_create(self):
+        Clone(household_structure=self.household_structure,
+              report_datetime=survey_two.start,
+              model='member_clone.householdmember',
+              create=False)
+        self.assertEqual(self.received, [])
+
+    def test_sent_by_bundle(self):
+        CloneBundle.build(
+            household_structure=self.household_structure,
+            model='member_clone.householdmember').apply(
+                report_datetime=survey_two.start)
+        self.assertEqual(len(self.received), 1)
+        self.assertEqual(len(self.saved), 0)
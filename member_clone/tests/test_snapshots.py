@@ -0,0 +1,81 @@
+import shutil
+import tempfile
+
+from unittest import skipUnless
+from django.test import TestCase, tag
+from edc_constants.constants import YES
+
+from survey.tests.surveys import survey_one, survey_two
+
+from ..runner import CloneRunner
+from ..snapshots import MemberSnapshot
+from .models import HouseholdMember
+from .mixins import CloneTestMixin
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+@tag('snapshots')
+@skipUnless(numpy, 'numpy is not installed')
+class TestMemberSnapshot(CloneTestMixin, TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.survey_helper.load_test_surveys(load_all=True)
+        for _ in range(0, 3):
+            self.make_household(members=[dict(age_in_years=30)] * 2)
+        CloneRunner(
+            survey_schedule=survey_two,
+            report_datetime=survey_two.start,
+            model='member_clone.householdmember').run()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write_and_load(self, survey_schedule, **kwargs):
+        MemberSnapshot.write(
+            survey_schedule=survey_schedule, directory=self.directory,
+            model='member_clone.householdmember', **kwargs)
+        return MemberSnapshot.load(
+            survey_schedule=survey_schedule, directory=self.directory)
+
+    def test_write_and_load(self):
+        snapshot = self.write_and_load(survey_two, chunk_size=4)
+        self.assertEqual(len(snapshot), 6)
+        self.assertIsInstance(snapshot.array, numpy.memmap)
+        self.assertTrue(snapshot['cloned'].all())
+        self.assertFalse(snapshot['clone_updated'].any())
+        identifiers = list(snapshot['internal_identifier'])
+        self.assertEqual(identifiers, sorted(identifiers))
+        member = HouseholdMember.objects.get(
+            survey_schedule=survey_two.field_value,
+            internal_identifier=identifiers[0].decode())
+        self.assertEqual(snapshot['age_in_years'][0], member.age_in_years)
+        self.assertEqual(
+            snapshot['household'][0].decode(),
+            str(member.household_structure.household.pk))
+
+    def test_clone_updated(self):
+        member = HouseholdMember.objects.filter(
+            survey_schedule=survey_two.field_value).first()
+        member.personal_details_changed = YES
+        member.save()
+        snapshot = self.write_and_load(survey_two)
+        self.assertEqual(snapshot['clone_updated'].sum(), 1)
+
+    def test_join(self):
+        HouseholdMember.objects.filter(
+            survey_schedule=survey_two.field_value).first().delete()
+        one = self.write_and_load(survey_one)
+        two = self.write_and_load(survey_two)
+        identifiers, i, j = one.join(two)
+        self.assertEqual(len(identifiers), 5)
+        self.assertTrue((one['internal_identifier'][i] == two['internal_identifier'][j]).all())
+        self.assertTrue((two['age_in_years'][j] - one['age_in_years'][i] >= 0).all())
+
+    def test_empty_survey_schedule(self):
+        snapshot = self.write_and_load(survey_two.next)
+        self.assertEqual(len(snapshot), 0)
@@ -0,0 +1,74 @@
+from django.test import TestCase, tag
+
+from edc_registration.models import RegisteredSubject
+from survey.site_surveys import site_surveys
+from survey.tests import SurveyTestHelper
+from survey.tests.surveys import survey_one, survey_two
+
+from ..constants import CLONED
+from ..runner import CloneRunner
+from ..synthetic import SyntheticPopulation
+from .models import HouseholdMember, HouseholdStructure, Household
+
+
+@tag('synthetic')
+class TestSyntheticPopulation(TestCase):
+
+    survey_helper = SurveyTestHelper()
+
+    def setUp(self):
+        self.survey_helper.load_test_surveys(load_all=True)
+
+    def population(self, **kwargs):
+        options = dict(households=20, seed=7, batch_size=6,
+                       model='member_clone.householdmember')
+        options.update(kwargs)
+        return SyntheticPopulation(**options)
+
+    def test_generate(self):
+        counts = self.population().generate()
+        survey_schedules = site_surveys.get_survey_schedules()
+        self.assertEqual(counts['households'], 20)
+        self.assertEqual(Household.objects.all().count(), 20)
+        self.assertEqual(
+            HouseholdStructure.objects.all().count(), 20 * len(survey_schedules))
+        self.assertEqual(HouseholdMember.objects.all().count(), counts['members'])
+        self.assertEqual(RegisteredSubject.objects.all().count(), counts['members'])
+        self.assertEqual(HouseholdMember.objects.filter(
+            survey_schedule=survey_one.field_value).count(), counts['members'])
+
+    def test_deterministic(self):
+        self.population().generate()
+        members = list(HouseholdMember.objects.order_by('pk').values_list(
+            'pk', 'internal_identifier', 'first_name', 'age_in_years'))
+        HouseholdMember.objects.all().delete()
+        HouseholdStructure.objects.all().delete()
+        Household.objects.all().delete()
+        RegisteredSubject.objects.all().delete()
+        self.population(batch_size=20).generate()
+        self.assertEqual(members, list(HouseholdMember.objects.order_by('pk').values_list(
+            'pk', 'internal_identifier', 'first_name', 'age_in_years')))
+
+    def test_household_sizes(self):
+        counts = self.population(household_sizes={3: 1}).generate()
+        self.assertEqual(counts['members'], 60)
+
+    def test_rounds_and_absence(self):
+        counts = self.population(
+            household_sizes={2: 1}, rounds=2, absence_rate=1).generate()
+        self.assertEqual(counts['members'], 0)
+        self.population(
+            households=1, seed=8, household_sizes={2: 1}, rounds=2).generate()
+        members = HouseholdMember.objects.filter(survey_schedule=survey_two.field_value)
+        self.assertEqual(members.count(), 2)
+        self.assertTrue(all(member.cloned for member in members))
+
+    def test_clone_generated(self):
+        counts = self.population().generate()
+        clone_counts = CloneRunner(
+            survey_schedule=survey_two,
+            report_datetime=survey_two.start,
+            model='member_clone.householdmember').run()
+        self.assertEqual(clone_counts[CLONED], 20)
+        self.assertEqual(HouseholdMember.objects.filter(
+            survey_schedule=survey_two.field_value).count(), counts['members'])
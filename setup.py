@@ -21,6 +21,7 @@ setup(
     description='Clone (copy) enumerated members from one year to the next.',
     long_description=README,
     zip_safe=False,
+    extras_require={'snapshots': ['numpy']},
     keywords='django member clone',
     classifiers=[
         'Environment :: Web Environment',